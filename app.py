@@ -8,6 +8,12 @@ from flask_migrate import Migrate
 from flask_session import Session
 from config import config_dict
 from models import db
+from utils.query_profiler import init_query_profiler
+from cli import register_commands
+from utils.quiz_sessions import init_quiz_session_sweeper
+from utils.submission_queue import init_submission_writer
+from utils.badge_jobs import init_badge_worker
+from utils.quiz_regrade import init_regrade_worker
 from routes.authentication import auth_bp
 from routes.super_admin import admin_bp
 from routes.lecturers import lecturer_bp
@@ -37,8 +43,14 @@ CORS(app, resources={
 Session(app)
 
 db.init_app(app)
+init_query_profiler(app)
 mail = Mail(app)
 migrate = Migrate(app, db)
+register_commands(app)
+init_quiz_session_sweeper(app)
+init_submission_writer(app)
+init_badge_worker(app)
+init_regrade_worker(app)
 
 print("Environment:", os.getenv("FLASK_ENV"))
 print("Database URI:", os.getenv("SQLALCHEMY_DATABASE_URI"))
@@ -0,0 +1,180 @@
+"""Sustained quiz submission throughput, sync vs queued (write-behind) mode.
+
+Seeds one institution, N students and two identical quizzes attached to a lesson
+section, then fires concurrent POST /api/student/quiz/<id>/submit requests
+through the Flask test client, first with QUIZ_SUBMISSION_MODE="sync" and then
+with "queued" while the background submission writer runs. Each submit is
+preceded by the POST /start that opens its quiz session, so the rates cover
+both requests; a student's submissions run one after another. The engine keeps
+the pool settings from config.py, so requests compete for the same 5+2
+connections as in production.
+
+    python benchmarks/quiz_submissions.py --database-url mysql+pymysql://root:@localhost/lms_bench
+
+The target database must be empty (tables are created, never dropped). Any
+non-200 response fails the run with a non-zero exit status.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True, help="SQLAlchemy URL of an empty database")
+    parser.add_argument("--students", type=int, default=2000, help="Each student submits once per mode by default")
+    parser.add_argument("--submissions", type=int, default=2000, help="Submissions per mode")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--flush-interval", type=float, default=0.5, help="Writer interval in queued mode (seconds)")
+    return parser.parse_args()
+
+args = parse_args()
+os.environ["FLASK_ENV"] = "development"
+os.environ["SQLALCHEMY_DATABASE_URI"] = args.database_url
+os.environ["QUERY_PROFILER_ENABLED"] = "False"
+os.environ["QUIZ_SESSION_SWEEPER_ENABLED"] = "False"
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from app import app
+    from models import db
+    from models.institutions import Institution
+    from models.users import User
+    from models.courses import Course
+    from models.course_lessons import Lesson
+    from models.lesson_section import LessonSection
+    from models.quizzes import Quiz
+    from models.quiz_questions import QuizQuestion
+    from models.quiz_submission import QuizSubmission
+    from utils.background import PeriodicWorker
+    from utils.submission_queue import flush_submissions
+    from utils.tokens import get_jwt_token
+
+QUESTIONS = 10
+
+def seed():
+    db.create_all()
+    if db.session.query(User.id).first() is not None:
+        sys.exit("Refusing to run: the target database already has users")
+
+    institution = Institution(name="Benchmark", email="bench@example.com")
+    db.session.add(institution)
+    db.session.flush()
+    lecturer = User(username="bench-lecturer", email="lecturer@example.com", full_name="Lecturer",
+                    role="lecturer", institution_id=institution.id)
+    lecturer.set_password("bench")
+    # One hash for everyone; nobody logs in, requests carry a signed token
+    students = [
+        User(username=f"bench-student-{i}", email=f"student{i}@example.com", full_name=f"Student {i}",
+             role="student", institution_id=institution.id, password_hash=lecturer.password_hash)
+        for i in range(args.students)
+    ]
+    db.session.add(lecturer)
+    db.session.add_all(students)
+    course = Course(title="Benchmark", institution_id=institution.id)
+    db.session.add(course)
+    db.session.flush()
+    lesson = Lesson(course_id=course.id, title="Benchmark")
+    db.session.add(lesson)
+    db.session.flush()
+
+    quiz_ids = {}
+    for order, mode in enumerate(("sync", "queued"), start=1):
+        quiz = Quiz(title=f"Benchmark {mode}", lecturer_id=lecturer.id, max_attempts=args.submissions, passing_score=50)
+        db.session.add(quiz)
+        db.session.flush()
+        for q in range(QUESTIONS):
+            db.session.add(QuizQuestion(quiz_id=quiz.id, question_text=f"Q{q}", question_type="short_answer",
+                                        correct_answer=f"a{q}"))
+        db.session.add(LessonSection(lesson_id=lesson.id, title=f"Quiz {mode}", content_type="quiz",
+                                     order=order, quiz_id=quiz.id))
+        quiz_ids[mode] = quiz.id
+    db.session.commit()
+    return [s.id for s in students], quiz_ids
+
+def make_clients(student_ids):
+    clients = {}
+    for student_id in student_ids:
+        client = app.test_client()
+        client.set_cookie("access_token", get_jwt_token({"user_id": student_id, "role": "student", "institution_id": 1}))
+        clients[student_id] = client
+    return clients
+
+def run(mode, quiz_id, clients):
+    app.config["QUIZ_SUBMISSION_MODE"] = mode
+    student_ids = list(clients)
+    answers = {f"short_answer-{q}": f"a{q}" for q in range(QUESTIONS)}
+    errors = []
+
+    def post(client, url, **kwargs):
+        try:
+            response = client.post(url, **kwargs)
+        except Exception as e:  # DevConfig propagates exceptions (pool timeouts, lock waits)
+            errors.append(f"{url}: {type(e).__name__}")
+            return False
+        if response.status_code != 200:
+            errors.append(f"{url}: {response.status_code}")
+            return False
+        return True
+
+    def submit_all(student_index):
+        # Sessions are one per student and quiz, so a student's attempts are sequential
+        client = clients[student_ids[student_index]]
+        for _ in range(student_index, args.submissions, len(student_ids)):
+            if post(client, f"/api/student/quiz/{quiz_id}/start"):
+                post(client, f"/api/student/quiz/{quiz_id}/submit", json={"answers": answers})
+
+    writer = None
+    if mode == "queued":
+        writer = PeriodicWorker(app, "benchmark-writer", args.flush_interval,
+                                lambda: flush_submissions(app.config["QUIZ_SUBMISSION_BATCH"])).start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(submit_all, range(min(len(student_ids), args.submissions))))
+    accepted = time.perf_counter() - started
+
+    if writer is not None:
+        writer.stop()
+        with app.app_context():
+            flush_submissions(app.config["QUIZ_SUBMISSION_BATCH"])
+            pending = QuizSubmission.query.filter_by(status="pending").count()
+        if pending:
+            errors.append(f"{pending} pending")
+    written = time.perf_counter() - started
+
+    ok = args.submissions - len(errors)
+    return {
+        "mode": mode,
+        "accepted_per_s": ok / accepted,
+        "written_per_s": ok / written,
+        "request_s": accepted,
+        "total_s": written,
+        "errors": errors,
+    }
+
+def main():
+    with app.app_context():
+        student_ids, quiz_ids = seed()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        clients = make_clients(student_ids)
+        results = [run(mode, quiz_ids[mode], clients) for mode in ("sync", "queued")]
+
+    print(f"{args.submissions} submissions per mode, {args.students} students, concurrency {args.concurrency}")
+    print(f"{'mode':<8}{'accepted/s':>12}{'written/s':>12}{'requests s':>12}{'total s':>10}{'errors':>8}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['accepted_per_s']:>12.1f}{r['written_per_s']:>12.1f}"
+              f"{r['request_s']:>12.2f}{r['total_s']:>10.2f}{len(r['errors']):>8}")
+
+    errors = [f"{r['mode']} {e}" for r in results for e in r["errors"]]
+    if errors:
+        sys.exit(f"Benchmark failed with {len(errors)} errors, first: {errors[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import click
+from models import db
+from models.quizzes import Quiz
+from utils.activity_service import backfill_activity_events
+from utils.quiz_regrade import regrade_quiz
+from utils.quiz_sessions import sweep_expired_sessions
+from utils.submission_queue import flush_submissions, retry_failed_submissions
+from utils.badge_jobs import process_badge_jobs, retry_failed_badge_jobs
+from utils.student_stats import repair_stats
+from utils.badge_backfill import backfill_badges
+from utils.question_bank import FORMATS as QUESTION_FORMATS, detect_format, import_questions, export_questions
+
+def register_commands(app):
+
+    @app.cli.command("backfill-activity")
+    @click.option("--chunk-size", default=5000, show_default=True, help="Source rows per INSERT ... SELECT.")
+    def backfill_activity(chunk_size):
+        """Populate activity_events from badges, quiz attempts, submissions and section progress."""
+        inserted = backfill_activity_events(chunk_size=chunk_size)
+        for event_type, count in inserted.items():
+            click.echo(f"{event_type}: {count} events added")
+
+    @app.cli.command("regrade-quiz")
+    @click.argument("quiz_id", type=int)
+    @click.option("--chunk-size", default=500, show_default=True, help="Attempts graded and written per batch.")
+    def regrade_quiz_command(quiz_id, chunk_size):
+        """Regrade every stored attempt of QUIZ_ID against its current answers."""
+        summary = regrade_quiz(quiz_id, chunk_size=chunk_size)
+        if summary is None:
+            raise click.ClickException(f"Quiz {quiz_id} not found")
+        click.echo(
+            f"Quiz {quiz_id}: {summary['attempts_scanned']} attempts scanned, "
+            f"{summary['attempts_updated']} updated, {summary['students_flipped']} students changed pass status, "
+            f"{summary['badges_awarded']} badges awarded"
+        )
+
+    @app.cli.command("sweep-quiz-sessions")
+    @click.option("--batch-size", default=100, show_default=True, help="Sessions fetched per batch.")
+    def sweep_quiz_sessions(batch_size):
+        """Grade timed quiz sessions whose deadline has passed."""
+        summary = sweep_expired_sessions(batch_size=batch_size)
+        click.echo(f"{summary['graded']} sessions graded, {summary['failed']} failed")
+
+    @app.cli.command("flush-quiz-submissions")
+    @click.option("--batch-size", default=200, show_default=True, help="Submissions written per transaction.")
+    @click.option("--retry-failed", is_flag=True, help="Re-queue submissions that could not be written before.")
+    def flush_quiz_submissions(batch_size, retry_failed):
+        """Write queued quiz submissions now instead of waiting for the background writer."""
+        if retry_failed:
+            requeued = retry_failed_submissions()
+            db.session.commit()
+            click.echo(f"{requeued} failed submissions re-queued")
+        summary = flush_submissions(batch_size=batch_size)
+        click.echo(f"{summary['written']} submissions written, {summary['failed']} failed")
+
+    @app.cli.command("import-questions")
+    @click.argument("quiz_id", type=int)
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(QUESTION_FORMATS), help="Defaults to the file extension.")
+    @click.option("--chunk-size", default=500, show_default=True, help="Questions inserted per transaction.")
+    def import_quiz_questions(quiz_id, path, fmt, chunk_size):
+        """Append the questions in a CSV / JSON Lines file to a quiz."""
+        if db.session.get(Quiz, quiz_id) is None:
+            raise click.ClickException(f"Quiz {quiz_id} not found")
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            summary = import_questions(quiz_id, stream, fmt or detect_format(path), chunk_size=chunk_size)
+        click.echo(f"{summary['imported']} questions imported, {summary['error_count']} rows rejected")
+        for error in summary["errors"]:
+            click.echo(f"  line {error['line']}: {error['error']}")
+
+    @app.cli.command("export-questions")
+    @click.argument("quiz_id", type=int)
+    @click.argument("output", type=click.File("w", encoding="utf-8"), default="-")
+    @click.option("--format", "fmt", type=click.Choice(QUESTION_FORMATS), default="csv", show_default=True)
+    def export_quiz_questions(quiz_id, output, fmt):
+        """Write a quiz's questions as CSV / JSON Lines (stdout by default)."""
+        if db.session.get(Quiz, quiz_id) is None:
+            raise click.ClickException(f"Quiz {quiz_id} not found")
+        for chunk in export_questions(quiz_id, fmt):
+            output.write(chunk)
+
+    @app.cli.command("process-badge-jobs")
+    @click.option("--batch-size", default=500, show_default=True, help="Students evaluated per transaction.")
+    @click.option("--retry-failed", is_flag=True, help="Re-queue students whose evaluation failed before.")
+    def process_badge_jobs_command(batch_size, retry_failed):
+        """Evaluate badges for every student queued by deferred evaluation."""
+        if retry_failed:
+            requeued = retry_failed_badge_jobs()
+            db.session.commit()
+            click.echo(f"{requeued} failed jobs re-queued")
+        summary = process_badge_jobs(batch_size=batch_size)
+        click.echo(f"{summary['students']} students evaluated, {summary['badges_awarded']} badges awarded, {summary['failed']} failed")
+
+    @app.cli.command("repair-student-stats")
+    @click.option("--chunk-size", default=1000, show_default=True, help="Students recomputed per transaction.")
+    def repair_student_stats(chunk_size):
+        """Recompute the student_stats counters from the source tables."""
+        summary = repair_stats(chunk_size=chunk_size)
+        click.echo(f"{summary['students']} students checked, {summary['repaired']} rows repaired, {summary['created']} created")
+
+    @app.cli.command("backfill-badges")
+    @click.option("--institution-id", type=int, help="Only students of this institution.")
+    @click.option("--degree-id", type=int, help="Only students enrolled in this degree.")
+    @click.option("--chunk-size", default=500, show_default=True, help="Students evaluated per transaction.")
+    @click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="Worker processes.")
+    @click.option("--checkpoint", type=click.Path(dir_okay=False), help="Progress file; an existing one is resumed.")
+    def backfill_badges_command(institution_id, degree_id, chunk_size, workers, checkpoint):
+        """Award badges students have already earned, e.g. after adding a badge or changing a threshold."""
+        def report(state, total):
+            click.echo(f"{state['students']}/{total} students, {state['badges_awarded']} badges awarded")
+
+        try:
+            state = backfill_badges(
+                institution_id=institution_id, degree_id=degree_id, chunk_size=chunk_size,
+                workers=workers, checkpoint=checkpoint, progress=report
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Done: {state['students']} students, {state['badges_awarded']} badges awarded")
@@ -27,15 +27,67 @@ class Config:
     SESSION_COOKIE_SAMESITE = os.getenv("SESSION_COOKIE_SAMESITE", "Lax")
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
 
+    # Per-request SQL query counting / N+1 detection (utils/query_profiler.py); on by default in dev and tests only
+    QUERY_PROFILER_ENABLED = os.getenv("QUERY_PROFILER_ENABLED", "False") == "True"
+    QUERY_PROFILER_HEADERS = False
+    QUERY_METRICS_TOKEN = os.getenv("QUERY_METRICS_TOKEN")
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+
+    # Seconds a cached student lesson skeleton may live (keys are also versioned)
+    LESSON_CACHE_TTL = int(os.getenv("LESSON_CACHE_TTL", 600))
+    # Degree quiz trees, answer keys and student quiz payloads; keys carry cache_versions bumped when quizzes change
+    QUIZ_CATALOGUE_CACHE_TTL = int(os.getenv("QUIZ_CATALOGUE_CACHE_TTL", 600))
+    QUIZ_ANSWER_KEY_CACHE_TTL = int(os.getenv("QUIZ_ANSWER_KEY_CACHE_TTL", 600))
+    QUIZ_PAYLOAD_CACHE_TTL = int(os.getenv("QUIZ_PAYLOAD_CACHE_TTL", 600))
+    BADGE_RULES_CACHE_TTL = int(os.getenv("BADGE_RULES_CACHE_TTL", 300))
+    # Quiz item analysis; keys carry the latest attempt id and a cache_versions entry
+    QUIZ_ANALYTICS_CACHE_TTL = int(os.getenv("QUIZ_ANALYTICS_CACHE_TTL", 3600))
+    # Student -> accessible course ids; keys carry cache_versions bumped on enrolment / course changes
+    ACCESS_SCOPE_CACHE_TTL = int(os.getenv("ACCESS_SCOPE_CACHE_TTL", 300))
+    # Seconds a worker reuses those versions before re-reading them; bounds how late other workers see a change
+    ACCESS_SCOPE_VERSION_TTL = float(os.getenv("ACCESS_SCOPE_VERSION_TTL", 5))
+
+    # Server-side quiz sessions (utils/quiz_sessions.py); intervals in seconds
+    QUIZ_SESSION_SWEEPER_ENABLED = os.getenv("QUIZ_SESSION_SWEEPER_ENABLED", "True") == "True"
+    QUIZ_SESSION_SWEEP_INTERVAL = int(os.getenv("QUIZ_SESSION_SWEEP_INTERVAL", 15))
+    QUIZ_SESSION_SWEEP_BATCH = int(os.getenv("QUIZ_SESSION_SWEEP_BATCH", 100))
+    QUIZ_SESSION_GRACE_SECONDS = int(os.getenv("QUIZ_SESSION_GRACE_SECONDS", 30))
+    # Autosaves of a session are written at most this often per worker (keep below the grace period)
+    QUIZ_AUTOSAVE_INTERVAL = int(os.getenv("QUIZ_AUTOSAVE_INTERVAL", 10))
+
+    # Background regrades requested from the lecturer API (utils/quiz_regrade.py)
+    QUIZ_REGRADE_WORKER_ENABLED = os.getenv("QUIZ_REGRADE_WORKER_ENABLED", "True") == "True"
+    QUIZ_REGRADE_INTERVAL = float(os.getenv("QUIZ_REGRADE_INTERVAL", 10))
+    QUIZ_REGRADE_CHUNK = int(os.getenv("QUIZ_REGRADE_CHUNK", 500))
+    QUIZ_REGRADE_STALE_AFTER = int(os.getenv("QUIZ_REGRADE_STALE_AFTER", 3600))
+
+    # "sync" writes each quiz attempt in the request; "queued" grades in the request
+    # and leaves the writes to a background writer (utils/submission_queue.py)
+    QUIZ_SUBMISSION_MODE = os.getenv("QUIZ_SUBMISSION_MODE", "sync")
+    QUIZ_SUBMISSION_FLUSH_INTERVAL = float(os.getenv("QUIZ_SUBMISSION_FLUSH_INTERVAL", 2))
+    QUIZ_SUBMISSION_BATCH = int(os.getenv("QUIZ_SUBMISSION_BATCH", 200))
+
+    # "sync" evaluates badges in the request; "deferred" queues the student for
+    # the background evaluator (utils/badge_jobs.py)
+    BADGE_EVALUATION_MODE = os.getenv("BADGE_EVALUATION_MODE", "sync")
+    BADGE_JOB_INTERVAL = float(os.getenv("BADGE_JOB_INTERVAL", 5))
+    BADGE_JOB_BATCH = int(os.getenv("BADGE_JOB_BATCH", 500))
+
 class DevConfig(Config):
     """Development Configuration"""
     DEBUG = True
     TESTING = False
+    QUERY_PROFILER_ENABLED = os.getenv("QUERY_PROFILER_ENABLED", "True") == "True"
+    QUERY_PROFILER_HEADERS = True
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI', 'mysql+pymysql://root:@localhost/lms_db2')
 
 class TestConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    QUERY_PROFILER_ENABLED = os.getenv("QUERY_PROFILER_ENABLED", "True") == "True"
+    QUERY_PROFILER_HEADERS = True
+    QUIZ_SESSION_SWEEPER_ENABLED = False
+    QUIZ_REGRADE_WORKER_ENABLED = False
 
 class ProdConfig(Config):
     """Production Configuration (Heroku deployment)"""
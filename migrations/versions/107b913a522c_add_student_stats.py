@@ -0,0 +1,42 @@
+"""Add student_stats counters
+
+Rows are seeded from the source tables the first time a student's counters are
+read or updated; run `flask repair-student-stats` to build them all up front.
+
+Revision ID: 107b913a522c
+Revises: 7dd3787aae50
+Create Date: 2026-10-18 19:27:44.120596
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '107b913a522c'
+down_revision = '7dd3787aae50'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('sections_completed', sa.Integer(), nullable=False),
+    sa.Column('quizzes_attempted', sa.Integer(), nullable=False),
+    sa.Column('quizzes_passed', sa.Integer(), nullable=False),
+    sa.Column('perfect_scores', sa.Integer(), nullable=False),
+    sa.Column('assignments_submitted', sa.Integer(), nullable=False),
+    sa.Column('on_time_submissions', sa.Integer(), nullable=False),
+    sa.Column('early_submissions', sa.Integer(), nullable=False),
+    sa.Column('badges_earned', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('student_id', name='unique_student_stats_student')
+    )
+
+
+def downgrade():
+    op.drop_table('student_stats')
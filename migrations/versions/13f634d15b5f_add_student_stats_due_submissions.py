@@ -0,0 +1,40 @@
+"""Add due_submissions to student_stats
+
+Existing rows are filled from assignment_submissions, so the dashboard
+punctuality summary can be served from student_stats.
+
+Revision ID: 13f634d15b5f
+Revises: aa0218119eb5
+Create Date: 2026-10-18 21:38:52.771046
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '13f634d15b5f'
+down_revision = 'aa0218119eb5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('student_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('due_submissions', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(sa.text("""
+        UPDATE student_stats SET due_submissions = (
+            SELECT COUNT(assignment_submissions.id)
+            FROM assignment_submissions
+            JOIN assignments ON assignments.id = assignment_submissions.assignment_id
+            WHERE assignment_submissions.student_id = student_stats.student_id
+              AND assignments.due_date IS NOT NULL
+              AND assignment_submissions.submitted_at IS NOT NULL
+        )
+    """))
+
+
+def downgrade():
+    with op.batch_alter_table('student_stats', schema=None) as batch_op:
+        batch_op.drop_column('due_submissions')
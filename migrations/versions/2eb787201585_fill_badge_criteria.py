@@ -0,0 +1,58 @@
+"""Fill badges.criteria with rules for the built-in badges
+
+Revision ID: 2eb787201585
+Revises: 55a9d7d5f1b2
+Create Date: 2026-10-18 18:05:37.615402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2eb787201585'
+down_revision = '55a9d7d5f1b2'
+branch_labels = None
+depends_on = None
+
+badges = sa.table('badges',
+    sa.column('name', sa.String),
+    sa.column('criteria', sa.String)
+)
+
+# The thresholds utils/badge_service.py used to hard-code, as "<metric>:<threshold>"
+LEGACY_CRITERIA = {
+    'Section Starter': 'sections_completed:1',
+    'Section Explorer': 'sections_completed:5',
+    'Section Pro': 'sections_completed:10',
+    'First Quiz Win': 'quizzes_passed:1',
+    'Quiz Warrior': 'quizzes_passed:3',
+    'Quiz Master': 'quizzes_passed:5',
+    'Perfect Quiz Score': 'perfect_scores:1',
+    'First Submission': 'assignments_submitted:1',
+    'On a Roll': 'assignments_submitted:5',
+    'Assignment Hero': 'assignments_submitted:10',
+    'Course Finisher': 'courses_completed:1',
+    'Early Bird': 'early_submissions:1',
+    'Always On Time': 'on_time_submissions:5',
+}
+
+
+def upgrade():
+    conn = op.get_bind()
+    for name, criteria in LEGACY_CRITERIA.items():
+        conn.execute(
+            badges.update()
+            .where(badges.c.name == name, sa.or_(badges.c.criteria.is_(None), badges.c.criteria == ''))
+            .values(criteria=criteria)
+        )
+
+
+def downgrade():
+    conn = op.get_bind()
+    for name, criteria in LEGACY_CRITERIA.items():
+        conn.execute(
+            badges.update()
+            .where(badges.c.name == name, badges.c.criteria == criteria)
+            .values(criteria=None)
+        )
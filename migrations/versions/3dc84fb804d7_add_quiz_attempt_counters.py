@@ -0,0 +1,73 @@
+"""Add quiz_attempt_counters and unique attempt numbers per student and quiz
+
+Revision ID: 3dc84fb804d7
+Revises: bcc2805076c3
+Create Date: 2026-10-18 15:48:12.560931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3dc84fb804d7'
+down_revision = 'bcc2805076c3'
+branch_labels = None
+depends_on = None
+
+quiz_attempts = sa.table('quiz_attempts',
+    sa.column('id', sa.Integer),
+    sa.column('student_id', sa.Integer),
+    sa.column('quiz_id', sa.Integer),
+    sa.column('attempts_used', sa.Integer)
+)
+
+
+def upgrade():
+    op.create_table('quiz_attempt_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('attempts_used', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('student_id', 'quiz_id', name='unique_student_quiz_counter')
+    )
+
+    # Renumber (student, quiz) groups that raced into duplicate attempt numbers
+    conn = op.get_bind()
+    duplicated = conn.execute(
+        sa.select(quiz_attempts.c.student_id, quiz_attempts.c.quiz_id)
+        .group_by(quiz_attempts.c.student_id, quiz_attempts.c.quiz_id, quiz_attempts.c.attempts_used)
+        .having(sa.func.count(quiz_attempts.c.id) > 1)
+        .distinct()
+    ).all()
+    for student_id, quiz_id in duplicated:
+        attempt_ids = conn.execute(
+            sa.select(quiz_attempts.c.id)
+            .where(quiz_attempts.c.student_id == student_id, quiz_attempts.c.quiz_id == quiz_id)
+            .order_by(quiz_attempts.c.id)
+        ).scalars().all()
+        conn.execute(
+            quiz_attempts.update().where(quiz_attempts.c.id == sa.bindparam('attempt_id')).values(attempts_used=sa.bindparam('number')),
+            [{'attempt_id': attempt_id, 'number': number} for number, attempt_id in enumerate(attempt_ids, start=1)]
+        )
+
+    op.execute(sa.text("""
+        INSERT INTO quiz_attempt_counters (student_id, quiz_id, attempts_used, updated_at)
+        SELECT student_id, quiz_id, MAX(attempts_used), CURRENT_TIMESTAMP
+        FROM quiz_attempts
+        GROUP BY student_id, quiz_id
+    """))
+
+    with op.batch_alter_table('quiz_attempts', schema=None) as batch_op:
+        batch_op.create_unique_constraint('unique_student_quiz_attempt', ['student_id', 'quiz_id', 'attempts_used'])
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_attempts', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_student_quiz_attempt', type_='unique')
+
+    op.drop_table('quiz_attempt_counters')
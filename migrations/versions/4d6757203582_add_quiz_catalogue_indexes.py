@@ -0,0 +1,44 @@
+"""Add indexes for enrolment-scoped quiz lookups
+
+Revision ID: 4d6757203582
+Revises: 962a20daecd6
+Create Date: 2026-10-18 12:20:44.018362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d6757203582'
+down_revision = '962a20daecd6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.create_index('ix_courses_degree_id', ['degree_id'], unique=False)
+
+    with op.batch_alter_table('enrolments', schema=None) as batch_op:
+        batch_op.create_index('ix_enrolments_student_degree', ['student_id', 'degree_id'], unique=False)
+
+    with op.batch_alter_table('lesson_section', schema=None) as batch_op:
+        batch_op.create_index('ix_lesson_section_lesson_quiz', ['lesson_id', 'quiz_id'], unique=False)
+
+    with op.batch_alter_table('quiz_attempts', schema=None) as batch_op:
+        batch_op.create_index('ix_quiz_attempts_student_quiz', ['student_id', 'quiz_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_attempts', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_attempts_student_quiz')
+
+    with op.batch_alter_table('lesson_section', schema=None) as batch_op:
+        batch_op.drop_index('ix_lesson_section_lesson_quiz')
+
+    with op.batch_alter_table('enrolments', schema=None) as batch_op:
+        batch_op.drop_index('ix_enrolments_student_degree')
+
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.drop_index('ix_courses_degree_id')
@@ -0,0 +1,44 @@
+"""Add quiz_regrade_jobs for background regrades
+
+Revision ID: 4f52b0eeb5ac
+Revises: 13f634d15b5f
+Create Date: 2026-10-18 22:06:41.309827
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f52b0eeb5ac'
+down_revision = '13f634d15b5f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('quiz_regrade_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('summary', sa.JSON(), nullable=True),
+    sa.Column('error', sa.String(length=255), nullable=True),
+    sa.Column('requested_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+    sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('quiz_regrade_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_quiz_regrade_jobs_status_id', ['status', 'id'], unique=False)
+        batch_op.create_index('ix_quiz_regrade_jobs_quiz_status', ['quiz_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_regrade_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_regrade_jobs_quiz_status')
+        batch_op.drop_index('ix_quiz_regrade_jobs_status_id')
+
+    op.drop_table('quiz_regrade_jobs')
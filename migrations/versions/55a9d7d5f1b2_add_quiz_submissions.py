@@ -0,0 +1,44 @@
+"""Add quiz_submissions queue for write-behind quiz submissions
+
+Revision ID: 55a9d7d5f1b2
+Revises: 7fa7ddc1c6cc
+Create Date: 2026-10-18 17:20:41.902215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '55a9d7d5f1b2'
+down_revision = '7fa7ddc1c6cc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('quiz_submissions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('attempts_used', sa.Integer(), nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempt_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(length=255), nullable=True),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['attempt_id'], ['quiz_attempts.id'], ),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('quiz_submissions', schema=None) as batch_op:
+        batch_op.create_index('ix_quiz_submissions_status_id', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_submissions', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_submissions_status_id')
+
+    op.drop_table('quiz_submissions')
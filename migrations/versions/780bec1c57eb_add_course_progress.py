@@ -0,0 +1,69 @@
+"""Add course_progress aggregate table
+
+Revision ID: 780bec1c57eb
+Revises: 726288a19b9b
+Create Date: 2026-10-18 09:12:41.532118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '780bec1c57eb'
+down_revision = '726288a19b9b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('course_progress',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('completed_sections', sa.Integer(), nullable=False),
+    sa.Column('total_sections', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('student_id', 'course_id', name='unique_student_course_progress')
+    )
+    with op.batch_alter_table('course_progress', schema=None) as batch_op:
+        batch_op.create_index('ix_course_progress_course_id', ['course_id'], unique=False)
+
+    # Backfill from existing completions
+    op.execute(sa.text("""
+        INSERT INTO course_progress (student_id, course_id, completed_sections, total_sections, updated_at)
+        SELECT sp.student_id, l.course_id, COUNT(sp.id),
+               (SELECT COUNT(ls2.id) FROM lesson_section ls2
+                JOIN course_lessons l2 ON l2.id = ls2.lesson_id
+                WHERE l2.course_id = l.course_id),
+               CURRENT_TIMESTAMP
+        FROM section_progress sp
+        JOIN lesson_section ls ON ls.id = sp.section_id
+        JOIN course_lessons l ON l.id = ls.lesson_id
+        GROUP BY sp.student_id, l.course_id
+    """))
+
+    # Degree-level rollup into the previously unused enrolments.progress
+    op.execute(sa.text("""
+        UPDATE enrolments SET progress = COALESCE((
+            SELECT ROUND(SUM(cp.completed_sections) * 100.0 / NULLIF((
+                SELECT COUNT(ls.id) FROM lesson_section ls
+                JOIN course_lessons l ON l.id = ls.lesson_id
+                JOIN courses c2 ON c2.id = l.course_id
+                WHERE c2.degree_id = enrolments.degree_id
+            ), 0), 2)
+            FROM course_progress cp
+            JOIN courses c ON c.id = cp.course_id
+            WHERE c.degree_id = enrolments.degree_id AND cp.student_id = enrolments.student_id
+        ), 0)
+    """))
+
+
+def downgrade():
+    with op.batch_alter_table('course_progress', schema=None) as batch_op:
+        batch_op.drop_index('ix_course_progress_course_id')
+
+    op.drop_table('course_progress')
@@ -0,0 +1,42 @@
+"""Add badge_evaluation_jobs and index user_badges by student and award time
+
+Revision ID: 7dd3787aae50
+Revises: 2eb787201585
+Create Date: 2026-10-18 18:41:09.528163
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7dd3787aae50'
+down_revision = '2eb787201585'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('badge_evaluation_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('requested_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('student_id', name='unique_badge_evaluation_job_student')
+    )
+    with op.batch_alter_table('badge_evaluation_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_badge_evaluation_jobs_requested_at', ['requested_at'], unique=False)
+
+    with op.batch_alter_table('user_badges', schema=None) as batch_op:
+        batch_op.create_index('ix_user_badges_student_awarded', ['student_id', 'awarded_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_badges', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_badges_student_awarded')
+
+    with op.batch_alter_table('badge_evaluation_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_badge_evaluation_jobs_requested_at')
+
+    op.drop_table('badge_evaluation_jobs')
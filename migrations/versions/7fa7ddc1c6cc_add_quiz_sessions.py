@@ -0,0 +1,45 @@
+"""Add quiz_sessions for server-side timing and autosave
+
+Revision ID: 7fa7ddc1c6cc
+Revises: 3dc84fb804d7
+Create Date: 2026-10-18 16:32:05.184377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7fa7ddc1c6cc'
+down_revision = '3dc84fb804d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('quiz_sessions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('deadline', sa.DateTime(), nullable=True),
+    sa.Column('answers', sa.JSON(), nullable=True),
+    sa.Column('saved_at', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempt_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['attempt_id'], ['quiz_attempts.id'], ),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('quiz_sessions', schema=None) as batch_op:
+        batch_op.create_index('ix_quiz_sessions_student_quiz_status', ['student_id', 'quiz_id', 'status'], unique=False)
+        batch_op.create_index('ix_quiz_sessions_status_deadline', ['status', 'deadline'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_sessions_status_deadline')
+        batch_op.drop_index('ix_quiz_sessions_student_quiz_status')
+
+    op.drop_table('quiz_sessions')
@@ -0,0 +1,53 @@
+"""Award each badge at most once per student
+
+Duplicate user_badges rows (from concurrent evaluations) are removed first,
+keeping the earliest award, together with their activity entries; the
+badges_earned counters are then recounted.
+
+Revision ID: 818c8d4be8c6
+Revises: 4f52b0eeb5ac
+Create Date: 2026-10-18 23:12:05.417392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '818c8d4be8c6'
+down_revision = '4f52b0eeb5ac'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(sa.text("""
+        DELETE FROM activity_events
+        WHERE event_type = 'badge' AND source_id IN (
+            SELECT id FROM user_badges WHERE id NOT IN (
+                SELECT MIN(id) FROM user_badges GROUP BY student_id, badge_id
+            )
+        )
+    """))
+    # The grouped derived table is materialised, so MySQL lets it read the table being deleted from
+    op.execute(sa.text("""
+        DELETE FROM user_badges WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT MIN(id) AS id FROM user_badges GROUP BY student_id, badge_id
+            ) AS first_awards
+        )
+    """))
+    op.execute(sa.text("""
+        UPDATE student_stats SET badges_earned = (
+            SELECT COUNT(user_badges.id) FROM user_badges
+            WHERE user_badges.student_id = student_stats.student_id
+        )
+    """))
+
+    with op.batch_alter_table('user_badges', schema=None) as batch_op:
+        batch_op.create_unique_constraint('unique_student_badge', ['student_id', 'badge_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('user_badges', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_student_badge', type_='unique')
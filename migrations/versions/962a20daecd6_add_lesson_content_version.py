@@ -0,0 +1,26 @@
+"""Add content_version to course_lessons
+
+Revision ID: 962a20daecd6
+Revises: 780bec1c57eb
+Create Date: 2026-10-18 11:03:17.204551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '962a20daecd6'
+down_revision = '780bec1c57eb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('course_lessons', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('course_lessons', schema=None) as batch_op:
+        batch_op.drop_column('content_version')
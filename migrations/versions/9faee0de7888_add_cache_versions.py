@@ -0,0 +1,31 @@
+"""Add cache_versions for cross-process cache invalidation
+
+Revision ID: 9faee0de7888
+Revises: 107b913a522c
+Create Date: 2026-10-18 20:02:13.448107
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9faee0de7888'
+down_revision = '107b913a522c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name', name='unique_cache_version_name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_versions')
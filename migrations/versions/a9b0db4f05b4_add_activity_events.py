@@ -0,0 +1,40 @@
+"""Add activity_events log
+
+Revision ID: a9b0db4f05b4
+Revises: cf1aa8ed8080
+Create Date: 2026-10-18 14:21:07.318455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9b0db4f05b4'
+down_revision = 'cf1aa8ed8080'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing history is loaded with `flask backfill-activity`
+    op.create_table('activity_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(length=20), nullable=False),
+    sa.Column('message', sa.String(length=300), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.Column('source_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('event_type', 'source_id', name='unique_activity_event_source')
+    )
+    with op.batch_alter_table('activity_events', schema=None) as batch_op:
+        batch_op.create_index('ix_activity_events_student_occurred', ['student_id', 'occurred_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('activity_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_activity_events_student_occurred')
+
+    op.drop_table('activity_events')
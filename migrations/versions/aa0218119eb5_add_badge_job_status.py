@@ -0,0 +1,28 @@
+"""Add status and error to badge_evaluation_jobs
+
+Revision ID: aa0218119eb5
+Revises: 9faee0de7888
+Create Date: 2026-10-18 21:04:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'aa0218119eb5'
+down_revision = '9faee0de7888'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('badge_evaluation_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), server_default='pending', nullable=False))
+        batch_op.add_column(sa.Column('error', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('badge_evaluation_jobs', schema=None) as batch_op:
+        batch_op.drop_column('error')
+        batch_op.drop_column('status')
@@ -0,0 +1,81 @@
+"""Index quiz_attempt_answers and backfill them from answers_temp
+
+Revision ID: bcc2805076c3
+Revises: a9b0db4f05b4
+Create Date: 2026-10-18 15:02:36.904417
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bcc2805076c3'
+down_revision = 'a9b0db4f05b4'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 1000
+
+quiz_attempts = sa.table('quiz_attempts',
+    sa.column('id', sa.Integer),
+    sa.column('answers_temp', sa.JSON)
+)
+quiz_attempt_answers = sa.table('quiz_attempt_answers',
+    sa.column('attempt_id', sa.Integer),
+    sa.column('question_id', sa.Integer),
+    sa.column('answer_text', sa.Text),
+    sa.column('is_correct', sa.Boolean)
+)
+
+
+def _answer_rows(attempt_id, feedback):
+    if isinstance(feedback, str):
+        feedback = json.loads(feedback)
+
+    rows = []
+    for entry in feedback or []:
+        # question keys look like "multiple_choice-12" or "mcq-12"
+        _, _, question_id = str(entry.get('question_id', '')).rpartition('-')
+        if not question_id.isdigit():
+            continue
+        submitted = entry.get('submitted_answer') or ''
+        rows.append({
+            'attempt_id': attempt_id,
+            'question_id': int(question_id),
+            'answer_text': '' if submitted == 'No Answer' else submitted,
+            'is_correct': bool(entry.get('is_correct')),
+        })
+    return rows
+
+
+def upgrade():
+    with op.batch_alter_table('quiz_attempt_answers', schema=None) as batch_op:
+        batch_op.create_index('ix_quiz_attempt_answers_question_correct', ['question_id', 'is_correct'], unique=False)
+
+    conn = op.get_bind()
+    already_stored = sa.exists().where(quiz_attempt_answers.c.attempt_id == quiz_attempts.c.id)
+    last_id = 0
+    while True:
+        attempts = conn.execute(
+            sa.select(quiz_attempts.c.id, quiz_attempts.c.answers_temp)
+            .where(quiz_attempts.c.id > last_id, quiz_attempts.c.answers_temp.isnot(None), ~already_stored)
+            .order_by(quiz_attempts.c.id)
+            .limit(CHUNK_SIZE)
+        ).all()
+        if not attempts:
+            break
+
+        rows = []
+        for attempt_id, feedback in attempts:
+            rows.extend(_answer_rows(attempt_id, feedback))
+        if rows:
+            conn.execute(quiz_attempt_answers.insert(), rows)
+        last_id = attempts[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_attempt_answers', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_attempt_answers_question_correct')
@@ -0,0 +1,38 @@
+"""Add courses.entry_lesson_id and announcements (course_id, created_at) index
+
+Revision ID: cf1aa8ed8080
+Revises: 4d6757203582
+Create Date: 2026-10-18 13:05:52.771930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cf1aa8ed8080'
+down_revision = '4d6757203582'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('entry_lesson_id', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('announcements', schema=None) as batch_op:
+        batch_op.create_index('ix_announcements_course_created', ['course_id', 'created_at'], unique=False)
+
+    op.execute(sa.text("""
+        UPDATE courses SET entry_lesson_id = (
+            SELECT MIN(l.id) FROM course_lessons l WHERE l.course_id = courses.id
+        )
+    """))
+
+
+def downgrade():
+    with op.batch_alter_table('announcements', schema=None) as batch_op:
+        batch_op.drop_index('ix_announcements_course_created')
+
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.drop_column('entry_lesson_id')
@@ -7,7 +7,12 @@ db = SQLAlchemy()
 from models.users import User
 from models.quiz_questions import QuizQuestion
 from models.section_progress import SectionProgress
+from models.course_progress import CourseProgress
+from models.activity_event import ActivityEvent
 from models.badges import Badge, UserBadge
+from models.badge_evaluation_job import BadgeEvaluationJob
+from models.student_stats import StudentStats
+from models.cache_version import CacheVersion
 from models.announcements import Announcement
 
 from models.institutions import Institution
@@ -23,6 +28,10 @@ from models.lesson_section import LessonSection
 
 from models.quizzes import Quiz
 from models.quiz_attempts import QuizAttempt
+from models.quiz_attempt_counter import QuizAttemptCounter
+from models.quiz_session import QuizSession
+from models.quiz_submission import QuizSubmission
+from models.quiz_regrade_job import QuizRegradeJob
 from models.quiz_attempts_answers import QuizAttemptAnswer
 from models.quiz_results import QuizResult
 
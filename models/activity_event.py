@@ -0,0 +1,30 @@
+from models import db
+from datetime import datetime
+
+class ActivityEvent(db.Model):
+    __tablename__ = "activity_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    event_type = db.Column(db.String(20), nullable=False)  # badge, quiz, assignment, section
+    message = db.Column(db.String(300), nullable=False)
+    occurred_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    source_id = db.Column(db.Integer, nullable=True)  # id of the user_badges / quiz_attempts / ... row
+
+    __table_args__ = (
+        db.Index("ix_activity_events_student_occurred", "student_id", "occurred_at"),
+        db.UniqueConstraint("event_type", "source_id", name="unique_activity_event_source"),
+    )
+
+    @property
+    def cursor(self):
+        return f"{self.occurred_at.isoformat()}_{self.id}"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "type": self.event_type,
+            "message": self.message,
+            "timestamp": self.occurred_at.isoformat(),
+            "cursor": self.cursor,
+        }
@@ -13,3 +13,7 @@ class Announcement(db.Model):
 
     course = db.relationship("Course", backref="announcements")
     lecturer = db.relationship("User", backref="announcements")
+
+    __table_args__ = (
+        db.Index("ix_announcements_course_created", "course_id", "created_at"),
+    )
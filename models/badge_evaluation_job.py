@@ -0,0 +1,22 @@
+from models import db
+from datetime import datetime
+
+class BadgeEvaluationJob(db.Model):
+    """A student whose badges need re-evaluating (BADGE_EVALUATION_MODE = "deferred").
+
+    One row per student: repeated requests before the worker runs collapse into one.
+    A student whose evaluation keeps failing is parked as "failed" until
+    `flask process-badge-jobs --retry-failed`.
+    """
+    __tablename__ = "badge_evaluation_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    requested_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, failed
+    error = db.Column(db.String(255), nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("student_id", name="unique_badge_evaluation_job_student"),
+        db.Index("ix_badge_evaluation_jobs_requested_at", "requested_at"),
+    )
@@ -20,3 +20,8 @@ class UserBadge(db.Model):
     awarded_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     badge = relationship("Badge")
+
+    __table_args__ = (
+        db.Index("ix_user_badges_student_awarded", "student_id", "awarded_at"),
+        db.UniqueConstraint("student_id", "badge_id", name="unique_student_badge"),
+    )
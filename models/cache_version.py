@@ -0,0 +1,15 @@
+from models import db
+from datetime import datetime
+
+class CacheVersion(db.Model):
+    """Version counter behind a family of per-process cache keys (utils/cache_versions.py)."""
+    __tablename__ = "cache_versions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("name", name="unique_cache_version_name"),
+    )
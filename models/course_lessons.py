@@ -9,6 +9,8 @@ class Lesson(db.Model):
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.now(), nullable=False)
+    # Bumped on every change to the lesson's student-facing content (see utils/lesson_cache.py)
+    content_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     course = relationship("Course", back_populates="lessons")
     contents = relationship("LessonSection", back_populates="lesson", cascade="all, delete-orphan")
@@ -0,0 +1,31 @@
+from models import db
+from datetime import datetime
+
+class CourseProgress(db.Model):
+    __tablename__ = "course_progress"
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey("courses.id"), nullable=False)
+    completed_sections = db.Column(db.Integer, nullable=False, default=0)
+    total_sections = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("student_id", "course_id", name="unique_student_course_progress"),
+        db.Index("ix_course_progress_course_id", "course_id"),
+    )
+
+    @property
+    def percentage(self):
+        if not self.total_sections:
+            return 0
+        return round(self.completed_sections / self.total_sections * 100, 2)
+
+    def to_dict(self):
+        return {
+            "course_id": self.course_id,
+            "completed_sections": self.completed_sections,
+            "total_sections": self.total_sections,
+            "progress": self.percentage,
+        }
@@ -1,4 +1,5 @@
 from models import db
+from sqlalchemy import select, func, update
 from sqlalchemy.orm import relationship
 
 class Course(db.Model):
@@ -11,12 +12,29 @@ class Course(db.Model):
     degree_id = db.Column(db.Integer, db.ForeignKey("degrees.id"), nullable=True)
     thumbnail_url = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.now(), nullable=False)
+    # Denormalized first lesson (lowest id), kept in sync by refresh_entry_lesson()
+    entry_lesson_id = db.Column(db.Integer, nullable=True)
 
     institution = relationship("Institution", back_populates="courses")  
     lessons = relationship("Lesson", back_populates="course", cascade="all, delete-orphan")
     degree = relationship("Degree", back_populates="courses")
     exams = relationship("Exam", back_populates="course", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index("ix_courses_degree_id", "degree_id"),
+    )
+
+    @staticmethod
+    def refresh_entry_lesson(course_id):
+        """Recompute entry_lesson_id after a lesson of the course is created or deleted."""
+        from models import Lesson
+
+        first_lesson = select(func.min(Lesson.id)).where(Lesson.course_id == course_id).scalar_subquery()
+        db.session.execute(
+            update(Course).where(Course.id == course_id).values(entry_lesson_id=first_lesson),
+            execution_options={"synchronize_session": False}
+        )
+
     def __repr__(self):
         return f"<Course {self.title} (Institution ID {self.institution_id})>"
 
@@ -28,5 +46,6 @@ class Course(db.Model):
             "institution_id": self.institution_id,
             "degree_id": self.degree_id,
             "thumbnail_url": self.thumbnail_url,
+            "entry_lesson_id": self.entry_lesson_id,
             "created_at": self.created_at
         }
@@ -12,6 +12,10 @@ class Enrolment(db.Model):
 
     student = db.relationship("User", backref="enrolments")
     degree = db.relationship("Degree", backref="enrolments")
+
+    __table_args__ = (
+        db.Index("ix_enrolments_student_degree", "student_id", "degree_id"),
+    )
     
     def __repr__(self):
         return f"<Enrolment Student {self.student_id} Course {self.degree_id}>"
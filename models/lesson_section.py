@@ -22,24 +22,32 @@ class LessonSection(db.Model):
         last_section = LessonSection.query.filter_by(lesson_id=lesson_id).order_by(LessonSection.order.desc()).first()
         return (last_section.order + 1) if last_section else 1
 
+    @staticmethod
+    def _week_is_active(calendar_week, today):
+        if not calendar_week:
+            return True
+        return calendar_week.start_date <= today
+
+    @staticmethod
+    def _week_is_current(calendar_week, today):
+        if not calendar_week:
+            return False
+        return calendar_week.start_date <= today <= calendar_week.end_date
+
     @property
     def is_active(self):
-        if not self.calendar_week:
-            return True
-        return self.calendar_week.start_date <= date.today()
+        return self._week_is_active(self.calendar_week, date.today())
 
     @property
     def is_current_week(self):
-        if not self.calendar_week:
-            return False
-        today = date.today()
-        return self.calendar_week.start_date <= today <= self.calendar_week.end_date
+        return self._week_is_current(self.calendar_week, date.today())
 
     __table_args__ = (
         CheckConstraint(
             "(quiz_id IS NULL OR assignment_id IS NULL)", 
             name="check_only_one_content_type"
         ),
+        db.Index("ix_lesson_section_lesson_quiz", "lesson_id", "quiz_id"),
     )
 
     lesson = relationship("Lesson", back_populates="contents")
@@ -58,6 +66,27 @@ class LessonSection(db.Model):
             progress = SectionProgress.query.filter_by(student_id=student_id, section_id=self.id).first()
             is_completed = bool(progress)
 
+        return self._serialize(self.calendar_week, is_completed, date.today())
+
+    @staticmethod
+    def bulk_to_dict(sections, completed_section_ids=(), calendar_weeks=None):
+        """Serialize many sections in the to_dict() shape without issuing queries.
+
+        `completed_section_ids` is the set of section ids the student has completed and
+        `calendar_weeks` maps calendar_week_id -> CalendarWeek. When `calendar_weeks` is
+        None the relationship is used, which only stays query-free if it was eager loaded.
+        """
+        today = date.today()
+        serialized = []
+        for section in sections:
+            if calendar_weeks is None:
+                calendar_week = section.calendar_week
+            else:
+                calendar_week = calendar_weeks.get(section.calendar_week_id)
+            serialized.append(section._serialize(calendar_week, section.id in completed_section_ids, today))
+        return serialized
+
+    def _serialize(self, calendar_week, is_completed, today):
         return {
             "id": self.id,
             "lesson_id": self.lesson_id,
@@ -69,15 +98,15 @@ class LessonSection(db.Model):
             "file_url": self.file_url if self.file_url else None,
             "order": self.order,
             "calendar_week_id": self.calendar_week_id,
-            "calendar_week_label": self.calendar_week.label if self.calendar_week else None,
-            "is_active": self.is_active,
-            "is_current_week": self.is_current_week,
+            "calendar_week_label": calendar_week.label if calendar_week else None,
+            "is_active": self._week_is_active(calendar_week, today),
+            "is_current_week": self._week_is_current(calendar_week, today),
             "is_completed": is_completed,
             "calendar_week": {
-                "id": self.calendar_week.id,
-                "label": self.calendar_week.label,
-                "start_date": str(self.calendar_week.start_date),
-                "end_date": str(self.calendar_week.end_date),
-                "is_break": self.calendar_week.is_break
-            } if self.calendar_week else None
+                "id": calendar_week.id,
+                "label": calendar_week.label,
+                "start_date": str(calendar_week.start_date),
+                "end_date": str(calendar_week.end_date),
+                "is_break": calendar_week.is_break
+            } if calendar_week else None
         }
@@ -0,0 +1,22 @@
+from models import db
+from datetime import datetime
+
+class QuizAttemptCounter(db.Model):
+    __tablename__ = "quiz_attempt_counters"
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey("quizzes.id"), nullable=False)
+    attempts_used = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("student_id", "quiz_id", name="unique_student_quiz_counter"),
+    )
+
+    def to_dict(self):
+        return {
+            "student_id": self.student_id,
+            "quiz_id": self.quiz_id,
+            "attempts_used": self.attempts_used,
+        }
@@ -20,6 +20,11 @@ class QuizAttempt(db.Model):
 
     result = db.relationship("QuizResult", uselist=False, back_populates="attempt")
 
+    __table_args__ = (
+        db.Index("ix_quiz_attempts_student_quiz", "student_id", "quiz_id"),
+        db.UniqueConstraint("student_id", "quiz_id", "attempts_used", name="unique_student_quiz_attempt"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
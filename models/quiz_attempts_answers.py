@@ -11,6 +11,10 @@ class QuizAttemptAnswer(db.Model):
 
     attempt = db.relationship("QuizAttempt", back_populates="answers")
 
+    __table_args__ = (
+        db.Index("ix_quiz_attempt_answers_question_correct", "question_id", "is_correct"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -0,0 +1,32 @@
+from models import db
+from datetime import datetime
+
+class QuizRegradeJob(db.Model):
+    """A regrade requested from the lecturer API, run by the background regrader (utils/quiz_regrade.py)."""
+    __tablename__ = "quiz_regrade_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey("quizzes.id"), nullable=False)
+    requested_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, running, done, failed
+    summary = db.Column(db.JSON, nullable=True)  # regrade_quiz() result
+    error = db.Column(db.String(255), nullable=True)
+    requested_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_quiz_regrade_jobs_status_id", "status", "id"),
+        db.Index("ix_quiz_regrade_jobs_quiz_status", "quiz_id", "status"),
+    )
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "quiz_id": self.quiz_id,
+            "status": self.status,
+            "summary": self.summary,
+            "requested_at": self.requested_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,40 @@
+from models import db
+from datetime import datetime, timedelta
+
+class QuizSession(db.Model):
+    __tablename__ = "quiz_sessions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey("quizzes.id"), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    deadline = db.Column(db.DateTime, nullable=True)  # None when the quiz is untimed
+    answers = db.Column(db.JSON, nullable=True)
+    saved_at = db.Column(db.DateTime, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default="active")  # active, submitted, expired
+    attempt_id = db.Column(db.Integer, db.ForeignKey("quiz_attempts.id"), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_quiz_sessions_student_quiz_status", "student_id", "quiz_id", "status"),
+        db.Index("ix_quiz_sessions_status_deadline", "status", "deadline"),
+    )
+
+    @staticmethod
+    def compute_deadline(quiz, started_at):
+        """time_limit is in minutes; a quiz-wide deadline caps the session."""
+        deadline = started_at + timedelta(minutes=quiz.time_limit) if quiz.time_limit else None
+        if quiz.deadline and (deadline is None or quiz.deadline < deadline):
+            deadline = quiz.deadline
+        return deadline
+
+    def to_dict(self):
+        return {
+            "session_id": self.id,
+            "quiz_id": self.quiz_id,
+            "started_at": self.started_at.isoformat(),
+            "deadline": self.deadline.isoformat() if self.deadline else None,
+            "answers": self.answers or {},
+            "saved_at": self.saved_at.isoformat() if self.saved_at else None,
+            "status": self.status,
+            "attempt_id": self.attempt_id,
+        }
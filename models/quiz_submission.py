@@ -0,0 +1,32 @@
+from models import db
+from datetime import datetime
+
+class QuizSubmission(db.Model):
+    """A graded submission waiting for the write-behind writer (utils/submission_queue.py)."""
+    __tablename__ = "quiz_submissions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey("quizzes.id"), nullable=False)
+    attempts_used = db.Column(db.Integer, nullable=False)
+    submitted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    result = db.Column(db.JSON, nullable=False)  # GradeResult.to_dict()
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, written, failed
+    attempt_id = db.Column(db.Integer, db.ForeignKey("quiz_attempts.id"), nullable=True)
+    error = db.Column(db.String(255), nullable=True)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_quiz_submissions_status_id", "status", "id"),
+    )
+
+    def to_dict(self):
+        return {
+            "submission_id": self.id,
+            "quiz_id": self.quiz_id,
+            "attempts_used": self.attempts_used,
+            "submitted_at": self.submitted_at.isoformat(),
+            "status": self.status,
+            "attempt_id": self.attempt_id,
+            "processed_at": self.processed_at.isoformat() if self.processed_at else None,
+        }
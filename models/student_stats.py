@@ -0,0 +1,36 @@
+from models import db
+from datetime import datetime
+
+class StudentStats(db.Model):
+    """Running per-student activity counters, maintained by the write paths (utils/student_stats.py)."""
+    __tablename__ = "student_stats"
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    sections_completed = db.Column(db.Integer, nullable=False, default=0)
+    quizzes_attempted = db.Column(db.Integer, nullable=False, default=0)
+    quizzes_passed = db.Column(db.Integer, nullable=False, default=0)
+    perfect_scores = db.Column(db.Integer, nullable=False, default=0)
+    assignments_submitted = db.Column(db.Integer, nullable=False, default=0)
+    due_submissions = db.Column(db.Integer, nullable=False, default=0)  # submissions to assignments with a due date
+    on_time_submissions = db.Column(db.Integer, nullable=False, default=0)
+    early_submissions = db.Column(db.Integer, nullable=False, default=0)
+    badges_earned = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("student_id", name="unique_student_stats_student"),
+    )
+
+    def to_dict(self):
+        return {
+            "sections_completed": self.sections_completed,
+            "quizzes_attempted": self.quizzes_attempted,
+            "quizzes_passed": self.quizzes_passed,
+            "perfect_scores": self.perfect_scores,
+            "assignments_submitted": self.assignments_submitted,
+            "due_submissions": self.due_submissions,
+            "on_time_submissions": self.on_time_submissions,
+            "early_submissions": self.early_submissions,
+            "badges_earned": self.badges_earned,
+        }
@@ -1,11 +1,25 @@
+import codecs
 import os
 import bleach
 from werkzeug.utils import secure_filename, safe_join
-from flask import Blueprint, jsonify, g, request, current_app, send_from_directory, abort, send_file
-from sqlalchemy.orm import joinedload
+from flask import Blueprint, jsonify, g, request, current_app, send_from_directory, abort, send_file, Response, stream_with_context
+from sqlalchemy.orm import joinedload, selectinload
 from utils.tokens import get_jwt_token, decode_jwt
 from utils.utils import login_required
 from utils.dropbox_service import delete_file_from_dropbox, get_file_link, upload_file, get_temporary_download_link
+from utils.progress_service import record_section_added, remove_section_progress
+from utils.student_stats import move_submission_stats, remove_submission_stats
+from utils.lesson_cache import bump_lesson_version, bump_lessons_for_quiz, bump_lessons_for_assignment
+from utils.quiz_catalogue import invalidate_course_quizzes, invalidate_degree_quizzes
+from utils.quiz_grading import invalidate_answer_key
+from utils.quiz_payload import invalidate_quiz_payload
+from utils.quiz_regrade import request_regrade, delete_regrade_jobs
+from utils.attempt_counter import delete_attempt_counters
+from utils.submission_queue import delete_quiz_submissions
+from utils.quiz_sessions import delete_quiz_sessions
+from utils.quiz_analytics import get_quiz_analytics, invalidate_quiz_analytics
+from utils.quiz_summary import get_lecturer_quiz_summaries
+from utils.question_bank import FORMATS as QUESTION_FORMATS, detect_format, import_questions, export_questions
 import dropbox
 
 from models.users import User, db
@@ -22,6 +36,7 @@ from models.quiz_questions import QuizQuestion
 from models.enrolments import Enrolment
 from models.assignment_submission import AssignmentSubmission
 from models.quiz_attempts import QuizAttempt
+from models.quiz_regrade_job import QuizRegradeJob
 from models.degrees import Degree
 
 # Lecturers' blueprint
@@ -121,6 +136,8 @@ def add_lesson(course_id):
 
     new_lesson = Lesson(course_id=course_id, title=title, description=description)
     db.session.add(new_lesson)
+    db.session.flush()
+    Course.refresh_entry_lesson(course_id)
     db.session.commit()
 
     return jsonify({"message": "Lesson created successfully", "lesson": new_lesson.to_dict()}), 201
@@ -149,7 +166,9 @@ def edit_lesson(course_id, lesson_id):
     data = request.get_json()
     lesson.title = data.get("title", lesson.title)
     lesson.description = data.get("description") if data.get("description") is not None else lesson.description
+    bump_lesson_version(lesson.id)
 
+    invalidate_course_quizzes(course_id)
     db.session.commit()
 
     return jsonify({"message": "Lesson updated successfully", "lesson": lesson.to_dict()})
@@ -174,8 +193,15 @@ def delete_lesson(course_id, lesson_id):
     if not lesson:
         return jsonify({"error": "You do not have permission to delete this lesson"}), 403
 
+    # Drop progress on the lesson's sections before they are cascaded away
+    section_ids = [s.id for s in db.session.query(LessonSection.id).filter_by(lesson_id=lesson.id).all()]
+    remove_section_progress(lesson.id, section_ids)
+
     # Delete lesson and commit
     db.session.delete(lesson)
+    db.session.flush()
+    Course.refresh_entry_lesson(course_id)
+    invalidate_course_quizzes(course_id)
     db.session.commit()
 
     return jsonify({"message": "Lesson deleted successfully"})
@@ -189,6 +215,8 @@ def delete_section(course_id, lesson_id, section_id):
     if not section:
         return jsonify({"error": "Section not found"}), 404
 
+    had_quiz = section.quiz_id is not None
+
     if section.file_url:
         try:
             delete_file_from_dropbox(section.file_url)
@@ -196,18 +224,19 @@ def delete_section(course_id, lesson_id, section_id):
         except Exception as e:
             print(f" Error deleting file from Dropbox: {e}")
 
-    # Delete progress records
+    # Delete progress records and the section in one transaction
     try:
-        from models import SectionProgress
-        SectionProgress.query.filter_by(section_id=section_id).delete()
+        remove_section_progress(lesson_id, [section_id])
+        db.session.delete(section)
+        bump_lesson_version(lesson_id)
+        if had_quiz:
+            invalidate_course_quizzes(course_id)
         db.session.commit()
     except Exception as e:
+        db.session.rollback()
         print(f" Error deleting section progress: {e}")
         return jsonify({"error": "Failed to delete related progress records"}), 500
 
-    db.session.delete(section)
-    db.session.commit()
-
     return jsonify({"message": "Section, file, and related progress deleted successfully"})
 
 
@@ -265,10 +294,12 @@ def add_section(course_id, lesson_id):
     assignment_id = request.form.get("assignment_id")
     quiz_id = request.form.get("quiz_id")
     calendar_week_id = request.form.get("calendar_week_id")
+    calendar_week = None
     if calendar_week_id:
         try:
             calendar_week_id = int(calendar_week_id)
-            if not CalendarWeek.query.get(calendar_week_id):
+            calendar_week = CalendarWeek.query.get(calendar_week_id)
+            if not calendar_week:
                 return jsonify({"error": "Invalid calendar_week_id"}), 400
         except ValueError:
             return jsonify({"error": "calendar_week_id must be an integer"}), 400
@@ -305,11 +336,21 @@ def add_section(course_id, lesson_id):
 )
 
     db.session.add(new_section)
+    db.session.flush()
+    record_section_added(new_section)
+    bump_lesson_version(lesson_id)
+
+    # Serialize before commit so the response needs no reloads
+    section_data = LessonSection.bulk_to_dict(
+        [new_section], calendar_weeks={calendar_week.id: calendar_week} if calendar_week else {}
+    )[0]
+    if quiz_id:
+        invalidate_course_quizzes(course_id)
     db.session.commit()
 
     return jsonify({
         "message": "Section added successfully",
-        "section": new_section.to_dict()
+        "section": section_data
     }), 201
 
 
@@ -328,16 +369,19 @@ def edit_section(course_id, lesson_id, section_id):
     if not data:
         return jsonify({"error": "Invalid request data"}), 400
 
+    had_quiz = section.quiz_id is not None
     title = data.get("title", section.title)
     content_type = data.get("content_type", section.content_type)
     text_content = data.get("text_content", section.text_content)
     quiz_id = data.get("quiz_id", section.quiz_id)
     assignment_id = data.get("assignment_id", section.assignment_id)
     calendar_week_id = data.get("calendar_week_id", section.calendar_week_id)
+    calendar_week = None
     if calendar_week_id:
         try:
             calendar_week_id = int(calendar_week_id)
-            if not CalendarWeek.query.get(calendar_week_id):
+            calendar_week = CalendarWeek.query.get(calendar_week_id)
+            if not calendar_week:
                 return jsonify({"error": "Invalid calendar_week_id"}), 400
         except ValueError:
             return jsonify({"error": "calendar_week_id must be an integer"}), 400
@@ -399,8 +443,16 @@ def edit_section(course_id, lesson_id, section_id):
         section.assignment_id = None
         section.file_url = None
 
+    bump_lesson_version(lesson_id)
+    db.session.flush()
+    section_data = LessonSection.bulk_to_dict(
+        [section], calendar_weeks={calendar_week.id: calendar_week} if calendar_week else {}
+    )[0]
+    if had_quiz or section_data["quiz_id"]:
+        invalidate_course_quizzes(course_id)
     db.session.commit()
-    return jsonify({"message": "Section updated successfully", "section": section.to_dict()}), 200
+
+    return jsonify({"message": "Section updated successfully", "section": section_data}), 200
 
 
 
@@ -425,8 +477,13 @@ def download_file(course_id, lesson_id, filename):
 @login_required
 def get_all_quizzes():
     user_id = g.user.get("user_id")
-    quizzes = Quiz.query.filter_by(lecturer_id=user_id).all()
-    return jsonify([quiz.to_dict() for quiz in quizzes]), 200
+
+    # Summary rows by default; ?view=full keeps the old payload with every question
+    if request.args.get("view", "summary") == "full":
+        quizzes = Quiz.query.options(selectinload(Quiz.questions)).filter_by(lecturer_id=user_id).all()
+        return jsonify([quiz.to_dict() for quiz in quizzes]), 200
+
+    return jsonify(get_lecturer_quiz_summaries(user_id)), 200
 
 #Fetch one single quiz
 @lecturer_bp.route("/quizzes/<int:quiz_id>", methods=["GET"])
@@ -527,7 +584,12 @@ def edit_quiz(quiz_id):
     quiz.immediate_feedback = data.get("immediate_feedback", quiz.immediate_feedback)
     quiz.passing_score = data.get("passing_score", quiz.passing_score)
     quiz.deadline = data.get("deadline", quiz.deadline)
+    bump_lessons_for_quiz(quiz.id)
 
+    invalidate_answer_key(quiz.id)
+    invalidate_degree_quizzes()
+    invalidate_quiz_payload(quiz.id)
+    invalidate_quiz_analytics(quiz.id)
     db.session.commit()
 
     return jsonify({"message": "Quiz updated successfully", "quiz": quiz.to_dict()}), 200
@@ -546,7 +608,16 @@ def delete_quiz(quiz_id):
     if quiz.lecturer_id != user_id:
         return jsonify({"error": "Unauthorized"}), 403
 
+    bump_lessons_for_quiz(quiz.id)
+    delete_quiz_sessions(quiz.id)
+    delete_regrade_jobs(quiz.id)
+    delete_attempt_counters(quiz.id)
+    delete_quiz_submissions(quiz.id)
     db.session.delete(quiz)
+    invalidate_answer_key(quiz_id)
+    invalidate_degree_quizzes()
+    invalidate_quiz_payload(quiz_id)
+    invalidate_quiz_analytics(quiz_id)
     db.session.commit()
 
     return jsonify({"message": "Quiz deleted successfully"}), 200
@@ -588,6 +659,10 @@ def add_short_answer_question(quiz_id):
     )
 
     db.session.add(question)
+    bump_lessons_for_quiz(quiz_id)
+    invalidate_answer_key(quiz_id)
+    invalidate_quiz_payload(quiz_id)
+    invalidate_quiz_analytics(quiz_id)
     db.session.commit()
 
     return jsonify({
@@ -621,6 +696,10 @@ def add_multiple_choice_question(quiz_id):
     )
 
     db.session.add(question)
+    bump_lessons_for_quiz(quiz_id)
+    invalidate_answer_key(quiz_id)
+    invalidate_quiz_payload(quiz_id)
+    invalidate_quiz_analytics(quiz_id)
     db.session.commit()
 
     return jsonify({
@@ -659,6 +738,10 @@ def edit_quiz_question(quiz_id, question_id):
     else:
         question.options = None
 
+    bump_lessons_for_quiz(quiz_id)
+    invalidate_answer_key(quiz_id)
+    invalidate_quiz_payload(quiz_id)
+    invalidate_quiz_analytics(quiz_id)
     db.session.commit()
 
     return jsonify({
@@ -674,11 +757,112 @@ def delete_quiz_question(question_id):
     if not question:
         return jsonify({"error": "Question not found"}), 404
 
+    quiz_id = question.quiz_id
+    bump_lessons_for_quiz(quiz_id)
     db.session.delete(question)
+    invalidate_answer_key(quiz_id)
+    invalidate_quiz_payload(quiz_id)
+    invalidate_quiz_analytics(quiz_id)
     db.session.commit()
 
     return jsonify({"message": "Question deleted"}), 200
 
+# REGRADE stored attempts after an answer key fix
+@lecturer_bp.route("/quizzes/<int:quiz_id>/regrade", methods=["POST"])
+@login_required
+def regrade_quiz_attempts(quiz_id):
+    user_id = g.user.get("user_id")
+
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+    if quiz.lecturer_id != user_id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    # Runs in the background regrader; poll the job for its summary
+    job = request_regrade(quiz_id, requested_by=user_id)
+    db.session.commit()
+
+    return jsonify({"message": "Quiz regrade queued", "job": job.to_dict()}), 202
+
+# Status of a queued regrade
+@lecturer_bp.route("/quizzes/<int:quiz_id>/regrade/<int:job_id>", methods=["GET"])
+@login_required
+def get_regrade_job(quiz_id, job_id):
+    user_id = g.user.get("user_id")
+
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+    if quiz.lecturer_id != user_id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    job = QuizRegradeJob.query.get(job_id)
+    if not job or job.quiz_id != quiz_id:
+        return jsonify({"error": "Regrade job not found"}), 404
+
+    return jsonify(job.to_dict()), 200
+
+# Item analysis: difficulty, discrimination, distractors and score histogram
+@lecturer_bp.route("/quizzes/<int:quiz_id>/analytics", methods=["GET"])
+@login_required
+def get_quiz_item_analytics(quiz_id):
+    user_id = g.user.get("user_id")
+
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+    if quiz.lecturer_id != user_id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return jsonify(get_quiz_analytics(quiz_id)), 200
+
+# Bulk import questions from a CSV / JSON Lines upload ("file" field) or raw request body
+@lecturer_bp.route("/quizzes/<int:quiz_id>/questions/import", methods=["POST"])
+@login_required
+def import_quiz_questions(quiz_id):
+    user_id = g.user.get("user_id")
+
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+    if quiz.lecturer_id != user_id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    upload = request.files.get("file")
+    fmt = request.args.get("format") or detect_format(upload.filename if upload else None)
+    if fmt not in QUESTION_FORMATS:
+        return jsonify({"error": "format must be csv or jsonl"}), 400
+
+    # Decoded line by line, so large banks are never held in memory
+    raw = upload.stream if upload else request.stream
+    summary = import_questions(quiz_id, codecs.iterdecode(raw, "utf-8-sig"), fmt)
+
+    return jsonify({"message": "Questions imported", **summary}), 200
+
+# Stream a quiz's questions as CSV / JSON Lines
+@lecturer_bp.route("/quizzes/<int:quiz_id>/questions/export", methods=["GET"])
+@login_required
+def export_quiz_questions(quiz_id):
+    user_id = g.user.get("user_id")
+
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+    if quiz.lecturer_id != user_id:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    fmt = request.args.get("format", "csv")
+    if fmt not in QUESTION_FORMATS:
+        return jsonify({"error": "format must be csv or jsonl"}), 400
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(export_questions(quiz_id, fmt)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=quiz_{quiz_id}_questions.{fmt}"}
+    )
+
 
 
 
@@ -775,6 +959,7 @@ def edit_assignment(assignment_id):
         return jsonify({"error": "No data received!"}), 400
 
     updated = False
+    old_due_date = assignment.due_date
 
     title = data.get("title", assignment.title).strip()
     description = data.get("description", assignment.description).strip() if data.get("description") else None
@@ -818,6 +1003,13 @@ def edit_assignment(assignment_id):
     if not updated:
         return jsonify({"message": "No changes made."}), 200
 
+    if assignment.due_date is not old_due_date:
+        # Load the date as the database parsed it, then move the counters in this transaction
+        db.session.flush()
+        db.session.refresh(assignment, ["due_date"])
+        move_submission_stats(assignment.submissions, old_due_date, assignment.due_date)
+
+    bump_lessons_for_assignment(assignment.id)
     db.session.commit()
     return jsonify({
         "message": "Assignment updated successfully",
@@ -836,6 +1028,7 @@ def delete_assignment(assignment_id):
     if assignment.lecturer_id != user_id:
         return jsonify({"error": "Unauthorized"}), 403
 
+    bump_lessons_for_assignment(assignment.id)
     linked_sections = LessonSection.query.filter_by(assignment_id=assignment.id).all()
     for section in linked_sections:
         section.assignment_id = None
@@ -849,6 +1042,7 @@ def delete_assignment(assignment_id):
             print(f"Error deleting file from Dropbox: {e}")
             return jsonify({"error": "Failed to delete file from Dropbox"}), 500
 
+    remove_submission_stats(assignment.submissions, assignment.due_date)
     db.session.delete(assignment)
     db.session.commit()
 
@@ -4,7 +4,21 @@ from utils.dropbox_service import get_temporary_download_link, delete_file_from_
 from werkzeug.utils import secure_filename, safe_join
 from flask import Blueprint, jsonify, g, request, current_app, send_from_directory, abort, send_file, redirect
 from sqlalchemy.orm import aliased, joinedload
-from utils.badge_service import evaluate_all_badges
+from utils.badge_jobs import evaluate_or_defer, pending_badge_cursor, get_badges_awarded_since
+from utils.progress_service import record_section_completion, get_course_progress_map
+from utils.lesson_cache import build_student_lesson
+from utils.quiz_catalogue import get_student_quiz_catalogue
+from utils.quiz_payload import get_quiz_payload, get_attempt_summary, attempts_left, questions_for_student
+from utils.assignment_overview import get_assignment_overview
+from utils.timeliness import punctuality
+from utils.student_stats import record_submission, get_student_stats
+from utils.activity_service import record_activity, record_section_activity, get_recent_activity
+from utils.access_scope import get_student_course_ids, student_can_access_course
+from utils.submission_queue import accept_submission
+from utils.quiz_sessions import (
+    QuizSessionError, start_session, get_active_session, is_expired,
+    session_answers, claim_session, close_session, expire_session, autosave_answers
+)
 from urllib.parse import unquote
 from utils.tokens import get_jwt_token, decode_jwt
 from utils.utils import login_required
@@ -25,6 +39,7 @@ from models.assignment import Assignment
 from models.quizzes import Quiz
 from models.quiz_attempts import QuizAttempt
 from models.quiz_attempts_answers import QuizAttemptAnswer
+from models.quiz_submission import QuizSubmission
 from models.quiz_results import QuizResult
 from models.enrolments import Enrolment
 from models.assignment_submission import AssignmentSubmission
@@ -59,14 +74,10 @@ def get_enrolled_courses():
     if not student_id:
         return jsonify({"error": "Invalid token"}), 401
 
-    enrolled_degrees = db.session.query(Enrolment.degree_id).filter(
-        Enrolment.student_id == student_id
-    ).subquery()
-
-    #Get courses linked to those degrees
+    #Get courses linked to the enrolled degrees
     courses = db.session.query(
         Course.id, Course.title, Course.description
-    ).filter(Course.degree_id.in_(enrolled_degrees)).all()
+    ).filter(Course.id.in_(get_student_course_ids(student_id))).all()
 
     courses_list = [{"id": c.id, "title": c.title, "description": c.description} for c in courses]
 
@@ -81,13 +92,10 @@ def get_course_details(course_id):
     if not student_id:
         return jsonify({"error": "Invalid token"}), 401
 
-    course = db.session.query(Course).join(
-        Enrolment, Course.degree_id == Enrolment.degree_id
-    ).filter(
-        Enrolment.student_id == student_id,
-        Course.id == course_id
-    ).first()
+    if not student_can_access_course(student_id, course_id):
+        return jsonify({"error": "Unauthorized or course not found"}), 403
 
+    course = Course.query.get(course_id)
     if not course:
         return jsonify({"error": "Unauthorized or course not found"}), 403
 
@@ -102,14 +110,7 @@ def get_student_lessons(course_id):
     if not student_id:
         return jsonify({"error": "Invalid token"}), 401
 
-    enrolled = db.session.query(Enrolment).join(
-        Course, Enrolment.degree_id == Course.degree_id
-    ).filter(
-        Enrolment.student_id == student_id,
-        Course.id == course_id
-    ).first()
-
-    if not enrolled:
+    if not student_can_access_course(student_id, course_id):
         return jsonify({"error": "Unauthorized or course not found"}), 403
 
     #  Get lessons for the course
@@ -128,15 +129,8 @@ def get_student_lesson_details(course_id, lesson_id):
     if not student_id:
         return jsonify({"error": "Invalid token"}), 401
 
-    # Check if student is directly enrolled in the course
-    enrolled = db.session.query(Enrolment).join(
-        Course, Enrolment.degree_id == Course.degree_id
-    ).filter(
-        Enrolment.student_id == student_id,
-        Course.id == course_id
-    ).first()
-
-    if not enrolled:
+    # Check if student is enrolled in the course's degree
+    if not student_can_access_course(student_id, course_id):
         return jsonify({"error": "Unauthorized or course not found"}), 403
 
     # Fetch the lesson
@@ -144,45 +138,7 @@ def get_student_lesson_details(course_id, lesson_id):
     if not lesson:
         return jsonify({"error": "Lesson not found in this course"}), 404
 
-    sections = (
-        LessonSection.query
-        .options(joinedload(LessonSection.calendar_week), joinedload(LessonSection.assignment), joinedload(LessonSection.quiz))
-        .filter_by(lesson_id=lesson_id)
-        .all()
-    )
-
-    lesson_data = {
-        "id": lesson.id,
-        "title": lesson.title if lesson.title else "Untitled Lesson",
-        "description": lesson.description if lesson.description is not None else "",
-        "sections": [
-        {
-        "id": section.id,
-        "title": section.title,
-        "content_type": section.content_type,
-        "text_content": section.text_content if section.content_type == "text" else "",
-        "file_url": section.file_url if section.content_type == "file" else None,
-        "assignment": (
-            {
-                **section.assignment.to_dict(),
-                "submissions": [
-                    s.to_dict() for s in AssignmentSubmission.query.filter_by(
-                        assignment_id=section.assignment.id,
-                        student_id=student_id
-                    ).all()
-                ]
-            }
-            if section.assignment else None
-        ),
-        "quiz": section.quiz.to_dict() if section.quiz else None,
-        "calendar_week_id": section.calendar_week_id,
-        "calendar_week_label": section.calendar_week.label if section.calendar_week else None,
-        "is_current_week": section.is_current_week,
-    }
-    for section in sections
-    ],
-    }
-
+    lesson_data = build_student_lesson(lesson, student_id)
     return jsonify(lesson_data), 200
 
 
@@ -198,15 +154,8 @@ def download_student_file(course_id, lesson_id, filename):
     student_id = g.user.get("user_id")
     print(f"Student ID: {student_id}")
 
-    # Check if student is enrolled in the course
-    enrolled = db.session.query(Enrolment).join(
-        Course, Enrolment.degree_id == Course.degree_id
-    ).filter(
-        Enrolment.student_id == student_id,
-        Course.id == course_id
-    ).first()
-
-    if not enrolled:
+    # Check if student is enrolled in the course's degree
+    if not student_can_access_course(student_id, course_id):
         return jsonify({"error": "Unauthorized or course not found"}), 403
 
     dropbox_folder = f"course_{course_id}/lesson_{lesson_id}"
@@ -235,73 +184,82 @@ def download_student_file(course_id, lesson_id, filename):
 def get_quiz_details(quiz_id):
     student_id = g.user.get("user_id")
 
-    quiz = Quiz.query.get(quiz_id)
+    quiz = get_quiz_payload(quiz_id)
     if not quiz:
         return jsonify({"error": "Quiz not found"}), 404
 
-    total_questions = len(quiz.questions)
-
     # Fetch attempt info
-    existing_attempts = QuizAttempt.query.filter_by(student_id=student_id, quiz_id=quiz_id).count()
-    attempts_left = max(0, quiz.max_attempts - existing_attempts)
-
-    latest_attempt = (
-        QuizAttempt.query
-        .filter_by(student_id=student_id, quiz_id=quiz_id)
-        .order_by(QuizAttempt.completed_at.desc())
-        .first()
-    )
-    attempt_id = latest_attempt.id if latest_attempt else None
+    attempts_used, attempt_id = get_attempt_summary(student_id, quiz_id)
 
     return jsonify({
         "quiz_id": quiz.id,
         "title": quiz.title,
         "description": quiz.description,
         "max_attempts": quiz.max_attempts,
-        "attempts_left": attempts_left,
+        "attempts_left": attempts_left(quiz, attempts_used),
         "time_limit": quiz.time_limit,
         "passing_score": quiz.passing_score,
-        "total_questions": total_questions,
+        "total_questions": quiz.total_questions,
         "deadline": quiz.deadline.isoformat() if quiz.deadline else None,
         "attempt_id": attempt_id,
-        "questions": [
-            {
-                "id": q.id,
-                "question_text": q.question_text,
-                "question_type": q.question_type,
-                "options": q.options if q.question_type == "mcq" else None
-            }
-            for q in quiz.questions
-        ],
+        "questions": questions_for_student(quiz, student_id, attempts_used + 1),
     }), 200
 
-# Start a Quiz Attempt
-@student_bp.route("/quiz/<int:quiz_id>/start", methods=["GET"])
+# Start a Quiz Attempt: opens (or resumes) the server-side session
+@student_bp.route("/quiz/<int:quiz_id>/start", methods=["GET", "POST"])
 @login_required
 def start_quiz(quiz_id):
     student_id = g.user.get("user_id")
 
-    quiz = Quiz.query.get(quiz_id)
+    quiz = get_quiz_payload(quiz_id)
     if not quiz:
         return jsonify({"error": "Quiz not found"}), 404
 
-    total_questions = len(quiz.questions)
+    error = None
+    try:
+        session = start_session(quiz, student_id)
+    except QuizSessionError as e:
+        session, error = None, e
+    # Also keeps the grade of an expired session that was finalized on the way
+    db.session.commit()
+    # GET still describes the quiz when no attempts are left
+    if error and request.method == "POST":
+        return jsonify({"error": error.message}), error.status_code
 
-    existing_attempts = QuizAttempt.query.filter_by(student_id=student_id, quiz_id=quiz_id).count()
-    attempts_left = max(0, quiz.max_attempts - existing_attempts)
+    attempts_used, _ = get_attempt_summary(student_id, quiz_id)
+    remaining = attempts_left(quiz, attempts_used)
 
     return jsonify({
         "quiz_id": quiz.id,
         "title": quiz.title,
         "description": quiz.description,
         "max_attempts": quiz.max_attempts,
-        "attempts_left": attempts_left,
+        "attempts_left": remaining,
         "time_limit": quiz.time_limit,
         "passing_score": quiz.passing_score,
-        "total_questions": total_questions,
+        "total_questions": quiz.total_questions,
         "deadline": quiz.deadline.isoformat() if quiz.deadline else None,
+        "session": session.to_dict() if session else None,
     }), 200
 
+#Autosave partial answers of a running quiz session
+@student_bp.route("/quiz/sessions/<int:session_id>/autosave", methods=["POST"])
+@login_required
+def autosave_quiz_session(session_id):
+    student_id = g.user.get("user_id")
+    answers = (request.get_json() or {}).get("answers", {})
+
+    if not isinstance(answers, dict):
+        return jsonify({"error": "answers must be an object"}), 400
+
+    try:
+        saved = autosave_answers(session_id, student_id, answers)
+    except QuizSessionError as e:
+        return jsonify({"error": e.message}), e.status_code
+
+    db.session.commit()
+    return jsonify(saved), 200
+
 #submit quiz
 @student_bp.route("/quiz/<int:quiz_id>/submit", methods=["POST"])
 @login_required
@@ -314,78 +272,62 @@ def submit_quiz(quiz_id):
     if not quiz:
         return jsonify({"error": "Quiz not found"}), 404
 
-    existing_attempts = QuizAttempt.query.filter_by(student_id=student_id, quiz_id=quiz_id).count()
-    if existing_attempts >= quiz.max_attempts:
+    # Only a running session can be submitted; past its deadline the saved
+    # answers are graded instead and the submit is refused
+    session = get_active_session(student_id, quiz_id)
+    if session is None:
+        return jsonify({"error": "No running quiz session"}), 409
+    if is_expired(session.deadline):
+        outcome = expire_session(session)
+        db.session.commit()
+        return jsonify({
+            "error": "Quiz time is over",
+            "expired": True,
+            "attempt_id": outcome["attempt"].id if outcome else None
+        }), 409
+    if not claim_session(session, "submitted"):
+        db.session.rollback()
+        return jsonify({"error": "Quiz session is closed"}), 409
+
+    outcome = accept_submission(quiz, student_id, answers)
+    if outcome is None:
+        db.session.rollback()
         return jsonify({"error": "No attempts left"}), 403
 
-    attempt = QuizAttempt(
-        student_id=student_id,
-        quiz_id=quiz_id,
-        attempts_used=existing_attempts + 1,
-        completed_at=datetime.utcnow(),
-    )
-    db.session.add(attempt)
-    db.session.flush()
-
-    score = 0
-    feedback = []
-    needs_review = False
-
-    for question in quiz.questions:
-        key = f"{question.question_type}-{question.id}"
-        user_answer = answers.get(key, "").strip().lower()
-        correct_answer = (question.correct_answer or "").strip().lower()
-        is_correct = user_answer == correct_answer
-
-        feedback.append({
-            "question_id": key,
-            "question_text": question.question_text,
-            "submitted_answer": user_answer or "No Answer",
-            "correct_answer": correct_answer,
-            "is_correct": is_correct,
-        })
-
-        if is_correct:
-            score += 1
-        else:
-            needs_review = True
-
-    percentage = (score / len(quiz.questions)) * 100 if quiz.questions else 0
-    passed = percentage >= quiz.passing_score
-
-    # Save attempt results
-    attempt.score = percentage
-    attempt.pass_status = passed
-    attempt.needs_review = needs_review
-    attempt.answers_temp = feedback
-
-    section = LessonSection.query.filter_by(quiz_id=quiz_id).first()
-    if section and section.is_active:
-        existing_progress = SectionProgress.query.filter_by(
-            student_id=student_id,
-            section_id=section.id
-        ).first()
-        if not existing_progress:
-            db.session.add(SectionProgress(student_id=student_id, section_id=section.id))
-            new_badges = evaluate_all_badges(student_id, perfect_quiz_score=(percentage == 100))
-        else:
-            new_badges = []
-    else:
-        new_badges = []
+    attempt = outcome["attempt"]
+    submission = outcome.get("submission")
+    result = outcome["result"]
+    close_session(session, attempt.id if attempt else None)
+    badge_cursor = pending_badge_cursor(student_id, queued=submission is not None)
 
     db.session.commit()
 
     return jsonify({
-        "score": percentage,
-        "passed": passed,
-        "needs_review": needs_review,
-        "total_questions": len(quiz.questions),
-        "attempts_used": attempt.attempts_used,
-        "attempts_left": max(0, quiz.max_attempts - attempt.attempts_used),
-        "feedback": feedback,
-        "new_badges": new_badges
+        "score": result.percentage,
+        "passed": result.passed,
+        "needs_review": result.needs_review,
+        "total_questions": result.total,
+        "attempts_used": outcome["attempts_used"],
+        "attempts_left": max(0, quiz.max_attempts - outcome["attempts_used"]) if quiz.max_attempts is not None else None,
+        "feedback": list(result.feedback),
+        "new_badges": outcome["new_badges"],
+        "badge_cursor": badge_cursor,
+        "expired": False,
+        "submission_id": submission.id if submission else None
     }), 200
 
+#Status of a queued (write-behind) quiz submission
+@student_bp.route("/quiz/submissions/<int:submission_id>", methods=["GET"])
+@login_required
+def get_quiz_submission(submission_id):
+    student_id = g.user.get("user_id")
+
+    submission = QuizSubmission.query.get(submission_id)
+    if not submission or submission.student_id != student_id:
+        return jsonify({"error": "Submission not found"}), 404
+
+    return jsonify(submission.to_dict()), 200
+
 
 #Get Quiz Results
 @student_bp.route("/quiz/<int:quiz_id>/results", methods=["GET"])
@@ -404,7 +346,7 @@ def get_quiz_results(quiz_id):
         "pass_status": attempt.pass_status,
         "needs_review": attempt.needs_review,
         "attempts_used": attempt.attempts_used,
-        "attempts_left": max(0, attempt.quiz.max_attempts - attempt.attempts_used),
+        "attempts_left": attempts_left(attempt.quiz, attempt.attempts_used),
         "feedback": attempt.answers_temp or []
     }), 200
 
@@ -420,129 +362,42 @@ def auto_submit_quiz(quiz_id):
     if not quiz:
         return jsonify({"error": "Quiz not found"}), 404
 
-    existing_attempts = QuizAttempt.query.filter_by(student_id=student_id, quiz_id=quiz_id).count()
-    if existing_attempts >= quiz.max_attempts:
-        return jsonify({"error": "No attempts left"}), 403
-
-    attempt = QuizAttempt(
-        student_id=student_id,
-        quiz_id=quiz_id,
-        attempts_used=existing_attempts + 1,
-        completed_at=datetime.utcnow()
-    )
-    db.session.add(attempt)
-    db.session.flush()
-
-    score = 0
-    total_questions = len(quiz.multiple_choice_questions) + len(quiz.short_answer_questions)
-    feedback = []
-    needs_review = False
-
-    # Grade Multiple Choice
-    for question in quiz.multiple_choice_questions:
-        key = f"mcq-{question.id}"
-        user_answer = answers.get(key, "").strip().lower()
-        correct_answer = question.correct_answer.strip().lower()
-        is_correct = user_answer == correct_answer
-
-        feedback.append({
-            "question_id": key,
-            "question_text": question.question_text,
-            "submitted_answer": user_answer or "No Answer",
-            "correct_answer": correct_answer,
-            "is_correct": is_correct
-        })
-
-        if is_correct:
-            score += 1
-
-
-    # Grade Short Answer
-    for question in quiz.short_answer_questions:
-        key = f"short-{question.id}"
-        user_answer = answers.get(key, "").strip().lower()
-        correct_answer = question.correct_answer.strip().lower()
-        is_correct = user_answer == correct_answer
-
-        feedback.append({
-            "question_id": key,
-            "question_text": question.question_text,
-            "submitted_answer": user_answer or "No Answer",
-            "correct_answer": correct_answer,
-            "is_correct": is_correct
-        })
-
-        if is_correct:
-            score += 1
-        else:
-            needs_review = True
-
-
-    percentage_score = (score / total_questions) * 100 if total_questions > 0 else 0
-    passed = percentage_score >= quiz.passing_score
+    # Timed sessions are also graded by the server-side sweeper. Within the
+    # grace period the client's last answers are merged over the saved ones;
+    # after it only the saved answers count.
+    session = get_active_session(student_id, quiz_id)
+    if session is None:
+        return jsonify({"error": "No running quiz session"}), 409
+    if is_expired(session.deadline):
+        outcome = expire_session(session)
+    elif claim_session(session, "expired"):
+        answers = {**session_answers(session), **answers}
+        outcome = accept_submission(quiz, student_id, answers)
+        close_session(session, outcome["attempt"].id if outcome and outcome["attempt"] else None, status="expired")
+    else:
+        outcome = None
+    db.session.commit()
 
-    attempt.score = percentage_score
-    attempt.pass_status = passed
-    attempt.needs_review = needs_review
-    attempt.answers_temp = feedback
+    if outcome is None:
+        return jsonify({"error": "Quiz session is closed or no attempts are left"}), 409
 
-    db.session.commit()
+    result = outcome["result"]
 
     return jsonify({
         "message": "Quiz auto-submitted due to timeout.",
-        "score": percentage_score,
-        "passed": passed,
-        "needs_review": needs_review
+        "score": result.percentage,
+        "passed": result.passed,
+        "needs_review": result.needs_review
     }), 200
 
 
 @student_bp.route("/quizzes/all", methods=["GET"])
 @login_required
 def get_available_quizzes():
-    """Fetch all quizzes grouped by course, lesson, and section."""
+    """Fetch the student's quizzes grouped by course, lesson, and section."""
     student_id = g.user.get("user_id")
 
-    # Fetch quizzes based on lesson sections
-    quizzes = (
-        db.session.query(Quiz, Course, Lesson, LessonSection)
-        .join(LessonSection, Quiz.id == LessonSection.quiz_id)
-        .join(Lesson, LessonSection.lesson_id == Lesson.id)
-        .join(Course, Lesson.course_id == Course.id)
-        .all()
-    )
-
-    quiz_data = {}
-    for quiz, course, lesson, section in quizzes:
-        if course.id not in quiz_data:
-            quiz_data[course.id] = {
-                "course_id": course.id,
-                "course_name": course.title,
-                "lessons": {}
-            }
-
-        if lesson.id not in quiz_data[course.id]["lessons"]:
-            quiz_data[course.id]["lessons"][lesson.id] = {
-                "lesson_id": lesson.id,
-                "lesson_title": lesson.title,
-                "sections": {}
-            }
-
-        if section.id not in quiz_data[course.id]["lessons"][lesson.id]["sections"]:
-            quiz_data[course.id]["lessons"][lesson.id]["sections"][section.id] = {
-                "section_id": section.id,
-                "section_title": section.title,
-                "quizzes": []
-            }
-
-        quiz_data[course.id]["lessons"][lesson.id]["sections"][section.id]["quizzes"].append({
-            "quiz_id": quiz.id,
-            "title": quiz.title,
-            "deadline": quiz.deadline,
-            "max_attempts": quiz.max_attempts,
-            "passing_score": quiz.passing_score
-        })
-
-    return jsonify(list(quiz_data.values())), 200
+    return jsonify(get_student_quiz_catalogue(student_id)), 200
 
 #Fetch All Assignments With Details
 @student_bp.route("/assignments", methods=["GET"])
@@ -550,50 +405,12 @@ def get_available_quizzes():
 def get_all_assignments():
     user_id = g.user.get("user_id")
 
-    assignments = (
-        db.session.query(Assignment)
-        .join(LessonSection, LessonSection.assignment_id == Assignment.id)
-        .filter(LessonSection.id.isnot(None))
-        .options(
-            joinedload(Assignment.sections)
-            .joinedload(LessonSection.lesson)
-            .joinedload(Lesson.course)
-        )
-        .distinct()
-        .all()
+    assignment_list = get_assignment_overview(
+        user_id,
+        course_id=request.args.get("course_id", type=int),
+        lesson_id=request.args.get("lesson_id", type=int)
     )
 
-    assignment_list = []
-    for assignment in assignments:
-        for section in assignment.sections:
-            if not section.lesson or not section.lesson.course:
-                continue
-
-            course = section.lesson.course
-            lesson = section.lesson
-            submissions = AssignmentSubmission.query.filter_by(
-                assignment_id=assignment.id,
-                student_id=user_id
-            ).all()
-
-            assignment_list.append({
-                "id": assignment.id,
-                "title": assignment.title,
-                "description": assignment.description,
-                "due_date": assignment.due_date.isoformat() if assignment.due_date else None,
-                "course_name": course.title,
-                "lesson_title": lesson.title,
-                "section_title": section.title,
-                "submissions": [
-                    {
-                        "id": s.id,
-                        "file_name": s.original_file_name or os.path.basename(s.file_url),
-                        "file_url": s.file_url,
-                        "submitted_at": s.submitted_at.isoformat()
-                    } for s in submissions
-                ]
-            })
-
     return jsonify({"assignments": assignment_list}), 200
 
 #submit assignment
@@ -646,6 +463,7 @@ def submit_assignment():
             return jsonify({"error": "File upload to Dropbox failed"}), 500
 
         if old_submission:
+            record_submission(user_id, old_submission.submitted_at, assignment.due_date, removed=True)
             db.session.delete(old_submission)
             db.session.commit()
 
@@ -658,21 +476,30 @@ def submit_assignment():
         )
             
         db.session.add(submission)
+        db.session.flush()
+        record_activity(user_id, "assignment", "Submitted an assignment", source_id=submission.id)
+        record_submission(user_id, submission.submitted_at, assignment.due_date)
         db.session.commit()
       
         # Auto mark section complete 
         already_completed = SectionProgress.query.filter_by(student_id=user_id, section_id=lesson_section.id).first()
         if not already_completed and lesson_section.is_active:
-            db.session.add(SectionProgress(student_id=user_id, section_id=lesson_section.id))
+            progress = SectionProgress(student_id=user_id, section_id=lesson_section.id)
+            db.session.add(progress)
+            record_section_completion(user_id, lesson_section)
+            record_section_activity(progress, lesson_section)
             db.session.commit()
         
         # Evaluate badges based on the submission
-        new_badges = evaluate_all_badges(user_id)
+        new_badges = evaluate_or_defer([user_id]).get(user_id, [])
+        badge_cursor = pending_badge_cursor(user_id)
+        db.session.commit()
         
         return jsonify({
             "message": "Assignment submitted successfully!",
             "file_url": public_url,
-            "new_badges": new_badges
+            "new_badges": new_badges,
+            "badge_cursor": badge_cursor
         }), 200
 
     except Exception as e:
@@ -728,6 +555,7 @@ def delete_assignment_submission(submission_id):
             print(f" Error deleting file from Dropbox: {e}")
             return jsonify({"error": "Failed to delete file from Dropbox"}), 500
 
+    record_submission(user_id, submission.submitted_at, submission.assignment.due_date, removed=True)
     db.session.delete(submission)
     db.session.commit()
 
@@ -753,29 +581,7 @@ def download_assignment_file(course_id, lesson_id, assignment_id, file_name):
 def get_lesson_assignments(course_id, lesson_id):
     user_id = g.user.get("user_id")
 
-    sections = LessonSection.query.filter_by(lesson_id=lesson_id).filter(LessonSection.assignment_id.isnot(None)).options(
-        joinedload(LessonSection.assignment)
-    ).all()
-
-    assignment_list = []
-    for section in sections:
-        assignment = section.assignment
-        if assignment:
-            submissions = AssignmentSubmission.query.filter_by(assignment_id=assignment.id, student_id=user_id).all()
-            assignment_list.append({
-                "id": assignment.id,
-                "title": assignment.title,
-                "description": assignment.description,
-                "due_date": assignment.due_date.isoformat() if assignment.due_date else None,
-                "section_title": section.title,
-                "submissions": [
-                    {
-                        "id": s.id,
-                        "file_name": os.path.basename(s.file_url),
-                        "submitted_at": s.submitted_at.isoformat()
-                    } for s in submissions
-                ]
-            })
+    assignment_list = get_assignment_overview(user_id, course_id=course_id, lesson_id=lesson_id)
 
     return jsonify({"assignments": assignment_list}), 200
 
@@ -784,6 +590,8 @@ def get_lesson_assignments(course_id, lesson_id):
 @login_required
 def get_lesson_quizzes(course_id, lesson_id):
     user_id = g.user.get("user_id")
+    if not student_can_access_course(user_id, course_id):
+        return jsonify({"error": "Unauthorized or course not found"}), 403
 
     sections = LessonSection.query.filter_by(lesson_id=lesson_id).filter(LessonSection.quiz_id.isnot(None)).options(
         joinedload(LessonSection.quiz)
@@ -820,12 +628,16 @@ def mark_section_complete(section_id):
         completed_at=datetime.utcnow()
     )
     db.session.add(progress)
+    record_section_completion(user_id, section)
+    record_section_activity(progress, section)
+    new_badges = evaluate_or_defer([user_id]).get(user_id, [])
+    badge_cursor = pending_badge_cursor(user_id)
     db.session.commit()
-    new_badges = evaluate_all_badges(user_id)
 
     return jsonify({
         "message": "Section marked as completed.",
-        "new_badges": new_badges
+        "new_badges": new_badges,
+        "badge_cursor": badge_cursor
     }), 201
 
 #Fetch compleded sections
@@ -847,9 +659,12 @@ def get_student_dashboard():
 
     from models import (
         Enrolment, Course, Lesson, LessonSection, SectionProgress, Degree,
-        QuizAttempt, AssignmentSubmission, CourseLecturer, User
+        CourseLecturer, User
     )
 
+    # Totals and punctuality come from the student's stats row
+    stats = get_student_stats(student_id)
+
     # Get enrolled degrees
     enrolled_degrees = (
         db.session.query(Degree)
@@ -866,54 +681,41 @@ def get_student_dashboard():
         .distinct()
         .all()
     )
-    total_badges_earned = UserBadge.query.filter_by(student_id=student_id).count()
     total_courses = len(enrolled_courses)
-    total_quizzes_attempted = db.session.query(QuizAttempt).filter_by(student_id=student_id).count()
-    total_assignments_submitted = db.session.query(AssignmentSubmission).filter_by(student_id=student_id).count()
 
-    course_stats = []
-    for course in enrolled_courses:
-        lecturer = (
-            db.session.query(User.full_name)
-            .join(CourseLecturer, CourseLecturer.lecturer_id == User.id)
-            .filter(CourseLecturer.course_id == course.id)
-            .first()
-        )
-        lecturer_name = lecturer[0] if lecturer else "To be confirmed."
-
-        section_ids = (
-            db.session.query(LessonSection.id)
-            .join(Lesson, Lesson.id == LessonSection.lesson_id)
-            .filter(Lesson.course_id == course.id)
+    course_ids = [course.id for course in enrolled_courses]
+    progress_by_course = get_course_progress_map(student_id, course_ids)
+    degree_names = {degree.id: degree.name for degree in enrolled_degrees}
+
+    lecturer_names = {}
+    if course_ids:
+        lecturers = (
+            db.session.query(CourseLecturer.course_id, User.full_name)
+            .join(User, CourseLecturer.lecturer_id == User.id)
+            .filter(CourseLecturer.course_id.in_(course_ids))
+            .order_by(CourseLecturer.id)
             .all()
         )
-        section_ids = [s.id for s in section_ids]
-        total_sections = len(section_ids)
-
-        completed = (
-            db.session.query(SectionProgress)
-            .filter(
-                SectionProgress.student_id == student_id,
-                SectionProgress.section_id.in_(section_ids)
-            ).count()
-        )
-
-        progress = (completed / total_sections * 100) if total_sections else 0
+        for course_id, full_name in lecturers:
+            lecturer_names.setdefault(course_id, full_name)
 
+    course_stats = []
+    for course in enrolled_courses:
         course_stats.append({
             "course_id": course.id,
             "course_title": course.title,
-            "degree_name": course.degree.name if course.degree else "N/A",
-            "lecturer_name": lecturer_name,
-            "progress": round(progress, 2)
+            "degree_name": degree_names.get(course.degree_id, "N/A"),
+            "lecturer_name": lecturer_names.get(course.id, "To be confirmed."),
+            "progress": progress_by_course.get(course.id, 0)
         })
 
     return jsonify({
         "total_courses": total_courses,
-        "total_quizzes_attempted": total_quizzes_attempted,
-        "total_assignments_submitted": total_assignments_submitted,
+        "total_quizzes_attempted": stats["quizzes_attempted"],
+        "total_assignments_submitted": stats["assignments_submitted"],
         "course_stats": course_stats,
-        "total_badges_earned": total_badges_earned
+        "total_badges_earned": stats["badges_earned"],
+        "punctuality": punctuality(stats)
     }), 200
 
 #Fetch user badges
@@ -941,18 +743,34 @@ def get_user_badges():
 
     return jsonify(badge_data), 200
 
+#Badges awarded since the client last looked (?after=<cursor> or ?since=<ISO timestamp>)
+@student_bp.route("/badges/new", methods=["GET"])
+@login_required
+def get_new_badges():
+    student_id = g.user.get("user_id")
+
+    try:
+        after_id = request.args.get("after", type=int)
+        since = request.args.get("since")
+        since = datetime.fromisoformat(since) if since else None
+    except ValueError:
+        return jsonify({"error": "Invalid since timestamp"}), 400
+
+    badges = get_badges_awarded_since(student_id, since=since, after_id=after_id)
+
+    return jsonify({
+        "badges": badges,
+        "cursor": badges[-1]["award_id"] if badges else after_id
+    }), 200
+
 #student calendar
 @student_bp.route("/calendar", methods=["GET"])
 @login_required
 def get_student_calendar():
     student_id = g.user["user_id"]
 
-    # Get student's degree and courses
-    degree_ids = db.session.query(Enrolment.degree_id).filter_by(student_id=student_id).subquery()
-    course_ids = db.session.query(Course.id).filter(Course.degree_id.in_(degree_ids)).subquery()
-
-    # Get lessons and sections
-    lesson_ids = db.session.query(Lesson.id).filter(Lesson.course_id.in_(course_ids)).subquery()
+    # Get lessons and sections of the student's courses
+    lesson_ids = db.session.query(Lesson.id).filter(Lesson.course_id.in_(get_student_course_ids(student_id)))
     sections = (
         db.session.query(LessonSection)
         .filter(LessonSection.lesson_id.in_(lesson_ids))
@@ -983,6 +801,9 @@ def get_student_calendar():
 def get_student_profile():
     student_id = g.user["user_id"]
 
+    # Activity totals come from the student's stats row
+    stats = get_student_stats(student_id)
+
     user = User.query.get(student_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -993,26 +814,14 @@ def get_student_profile():
 
     # Course progress summary
     courses = Course.query.filter_by(degree_id=degree.id).all() if degree else []
-    course_stats = []
-    for course in courses:
-        section_ids = (
-            db.session.query(LessonSection.id)
-            .join(Lesson, Lesson.id == LessonSection.lesson_id)
-            .filter(Lesson.course_id == course.id)
-            .all()
-        )
-        section_ids = [s.id for s in section_ids]
-        total_sections = len(section_ids)
-        completed = db.session.query(SectionProgress).filter(
-            SectionProgress.student_id == student_id,
-            SectionProgress.section_id.in_(section_ids)
-        ).count()
-        progress = (completed / total_sections * 100) if total_sections else 0
-        course_stats.append({
+    progress_by_course = get_course_progress_map(student_id, [course.id for course in courses])
+    course_stats = [
+        {
             "course_id": course.id,
             "course_title": course.title,
-            "progress": round(progress, 2)
-        })
+            "progress": progress_by_course.get(course.id, 0)
+        } for course in courses
+    ]
 
     # Badges earned
     badges = (
@@ -1048,7 +857,8 @@ def get_student_profile():
             "end_date": calendar.end_date.isoformat() if calendar else None,
         },
         "badges": badge_list,
-        "courses": course_stats
+        "courses": course_stats,
+        "stats": stats
     }), 200
 
 @student_bp.route("/activities-today", methods=["GET"])
@@ -1056,12 +866,8 @@ def get_student_profile():
 def get_student_activities_today():
     student_id = g.user["user_id"]
 
-    # Get course IDs from enrolled degrees
-    degree_ids = db.session.query(Enrolment.degree_id).filter_by(student_id=student_id).subquery()
-    course_ids = db.session.query(Course.id).filter(Course.degree_id.in_(degree_ids)).subquery()
-
-    # Get sections scheduled present day
-    lesson_ids = db.session.query(Lesson.id).filter(Lesson.course_id.in_(course_ids)).subquery()
+    # Get sections of the student's courses scheduled present day
+    lesson_ids = db.session.query(Lesson.id).filter(Lesson.course_id.in_(get_student_course_ids(student_id)))
 
     today = date.today()
     sections = (
@@ -1087,72 +893,14 @@ def get_student_activities_today():
 @login_required
 def get_student_recent_activity():
     student_id = g.user["user_id"]
-    recent = []
-
-    # Badges earned
-    badge_entries = (
-        db.session.query(UserBadge, Badge)
-        .join(Badge, UserBadge.badge_id == Badge.id)
-        .filter(UserBadge.student_id == student_id)
-        .order_by(UserBadge.awarded_at.desc())
-        .limit(3)
-        .all()
-    )
-    for entry, badge in badge_entries:
-        recent.append({
-            "type": "badge",
-            "message": f"Earned badge: {badge.name}",
-            "timestamp": entry.awarded_at.isoformat()
-        })
-
-    # Quiz attempts
-    quiz_attempts = (
-        db.session.query(QuizAttempt)
-        .filter_by(student_id=student_id)
-        .order_by(QuizAttempt.completed_at.desc())
-        .limit(3)
-        .all()
-    )
-    for attempt in quiz_attempts:
-        recent.append({
-            "type": "quiz",
-            "message": f"Completed a quiz with score {attempt.score:.0f}%",
-            "timestamp": attempt.completed_at.isoformat() if attempt.completed_at else datetime.utcnow().isoformat()
-        })
+    limit = min(max(request.args.get("limit", 6, type=int), 1), 50)
 
-    # Assignment submissions
-    submissions = (
-        db.session.query(AssignmentSubmission)
-        .filter_by(student_id=student_id)
-        .order_by(AssignmentSubmission.submitted_at.desc())
-        .limit(3)
-        .all()
-    )
-    for sub in submissions:
-        recent.append({
-            "type": "assignment",
-            "message": "Submitted an assignment",
-            "timestamp": sub.submitted_at.isoformat()
-        })
-
-    # Section completions
-    progress = (
-        db.session.query(SectionProgress, LessonSection)
-        .join(LessonSection, SectionProgress.section_id == LessonSection.id)
-        .filter(SectionProgress.student_id == student_id)
-        .order_by(SectionProgress.completed_at.desc())
-        .limit(3)
-        .all()
-    )
-    for p, section in progress:
-        recent.append({
-            "type": "section",
-            "message": f"Completed: {section.title}",
-            "timestamp": p.completed_at.isoformat()
-        })
+    try:
+        events = get_recent_activity(student_id, limit=limit, before=request.args.get("before"))
+    except ValueError:
+        return jsonify({"error": "Invalid 'before' cursor"}), 400
 
-    recent.sort(key=lambda x: x["timestamp"], reverse=True)
-    return jsonify(recent[:6]), 200
+    return jsonify([event.to_dict() for event in events]), 200
 
 #student all announcements
 @student_bp.route("/announcements", methods=["GET"])
@@ -1160,38 +908,35 @@ def get_student_recent_activity():
 def get_student_announcements():
     user_id = g.user.get("user_id")
 
-    course_ids = (
-        db.session.query(Course.id)
-        .join(Enrolment, Enrolment.degree_id == Course.degree_id)
-        .filter(Enrolment.student_id == user_id)
-        .subquery()
-    )
-
-    announcements = (
-        Announcement.query
-        .filter(Announcement.course_id.in_(course_ids))
-        .order_by(Announcement.created_at.desc())
-        .all()
+    since = request.args.get("since")
+    if since:
+        try:
+            since = datetime.fromisoformat(since.replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            return jsonify({"error": "Invalid 'since' timestamp, expected ISO 8601"}), 400
+
+    # Single joined query; (course_id, created_at) index serves the per-course range
+    query = (
+        db.session.query(Announcement, Course.title, Course.entry_lesson_id)
+        .join(Course, Course.id == Announcement.course_id)
+        .filter(Announcement.course_id.in_(get_student_course_ids(user_id)))
     )
+    if since:
+        query = query.filter(Announcement.created_at > since)
 
-    data = []
-    for a in announcements:
-        first_lesson = (
-            db.session.query(Lesson)
-            .filter_by(course_id=a.course_id)
-            .order_by(Lesson.id.asc())
-            .first()
-        )
+    announcements = query.order_by(Announcement.created_at.desc(), Announcement.id.desc()).all()
 
-        data.append({
+    data = [
+        {
             "id": a.id,
             "title": a.title,
             "message": a.message,
             "course_id": a.course_id,
-            "course_title": a.course.title if a.course else "Unknown Course",
-            "lesson_id": first_lesson.id if first_lesson else None,
+            "course_title": course_title,
+            "lesson_id": entry_lesson_id,
             "created_at": a.created_at.isoformat()
-        })
+        } for a, course_title, entry_lesson_id in announcements
+    ]
 
     return jsonify({"announcements": data}), 200
 
@@ -1201,17 +946,9 @@ def get_student_announcements():
 @login_required
 def get_course_announcements(course_id):
     user_id = g.user.get("user_id")
-    course = Course.query.get(course_id)
-    if not course:
-        return jsonify({"error": "Course not found"}), 404
-
-    is_enrolled = (
-        db.session.query(Enrolment)
-        .filter_by(student_id=user_id, degree_id=course.degree_id)
-        .first()
-    )
-
-    if not is_enrolled:
+    if not student_can_access_course(user_id, course_id):
+        if not Course.query.get(course_id):
+            return jsonify({"error": "Course not found"}), 404
         return jsonify({"error": "You are not enrolled in this course"}), 403
 
     # Fetch course announcements
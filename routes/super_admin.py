@@ -11,6 +11,8 @@ from models.academic_calendar import AcademicCalendar
 from models.calendar_week import CalendarWeek
  
 from utils.utils import login_required
+from utils.access_scope import invalidate_student_scope
+from utils.lesson_cache import bump_lessons_for_degree
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -155,6 +157,7 @@ def add_course():
     )
 
     db.session.add(new_course)
+    invalidate_student_scope()
     db.session.commit()
 
     return jsonify({"message": "Course added successfully!", "course_id": new_course.id}), 201
@@ -216,6 +219,7 @@ def enrol_student():
 
     enrolment = Enrolment(student_id=student_id, degree_id=degree_id)  
     db.session.add(enrolment)
+    invalidate_student_scope(student.id)
     db.session.commit()
 
     return jsonify({"message": "Student successfully enrolled in degree"}), 200
@@ -318,6 +322,8 @@ def upload_calendar():
             if not degree:
                 return jsonify({"error": "Degree not found"}), 404
             degree.calendar_id = calendar.id
+            # Cached lesson skeletons carry week labels and dates
+            bump_lessons_for_degree(degree.id)
 
         db.session.commit()
         return jsonify({"message": "Calendar uploaded successfully", "calendar_id": calendar.id})
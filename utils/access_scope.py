@@ -0,0 +1,59 @@
+from flask import g, current_app, has_request_context
+
+from models import db
+from models.courses import Course
+from models.enrolments import Enrolment
+from utils.cache import TTLCache
+from utils.cache_versions import bump_cache_version, get_cache_versions
+
+# A student may see every course of every degree they are enrolled in. The
+# resolved course ids are memoised on flask.g for the request and in a TTL
+# cache across requests, keyed on the "access_scope" and per-student versions
+# (utils/cache_versions.py) that enrol_student and add_course bump. The versions
+# themselves are re-read at most every ACCESS_SCOPE_VERSION_TTL seconds per
+# worker, so a warm access check runs no query; the worker that made a change
+# drops its copy at once, the others see it within that window.
+
+_student_course_ids = TTLCache(maxsize=4096, ttl=300)
+_scope_versions = TTLCache(maxsize=4096, ttl=5)
+
+def _load_student_course_ids(student_id):
+    rows = (
+        db.session.query(Course.id)
+        .join(Enrolment, Enrolment.degree_id == Course.degree_id)
+        .filter(Enrolment.student_id == student_id)
+    )
+    return frozenset(row.id for row in rows)
+
+def _get_scope_versions(student_id):
+    ttl = current_app.config.get("ACCESS_SCOPE_VERSION_TTL")
+    return _scope_versions.get_or_set(
+        student_id, lambda: get_cache_versions("access_scope", f"access_scope:{student_id}"), ttl=ttl
+    )
+
+def get_student_course_ids(student_id):
+    """frozenset of course ids the student can access."""
+    request_scope = g.setdefault("student_course_ids", {}) if has_request_context() else {}
+    if student_id not in request_scope:
+        ttl = current_app.config.get("ACCESS_SCOPE_CACHE_TTL")
+        key = (student_id, *_get_scope_versions(student_id))
+        request_scope[student_id] = _student_course_ids.get_or_set(
+            key, lambda: _load_student_course_ids(student_id), ttl=ttl
+        )
+    return request_scope[student_id]
+
+def student_can_access_course(student_id, course_id):
+    return course_id in get_student_course_ids(student_id)
+
+def invalidate_student_scope(student_id=None):
+    """Invalidate one student's scope, or everyone's when student_id is None.
+
+    Call before committing the change, in the same transaction.
+    """
+    bump_cache_version("access_scope" if student_id is None else f"access_scope:{student_id}")
+    if student_id is None:
+        _scope_versions.clear()
+    else:
+        _scope_versions.delete(student_id)
+    if has_request_context():
+        g.pop("student_course_ids", None)
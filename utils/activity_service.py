@@ -0,0 +1,149 @@
+from datetime import datetime
+from sqlalchemy import select, insert, func, exists, and_, or_, literal, cast, tuple_, Integer, String
+
+from models import db
+from models.activity_event import ActivityEvent
+from models.badges import Badge, UserBadge
+from models.quiz_attempts import QuizAttempt
+from models.assignment_submission import AssignmentSubmission
+from models.section_progress import SectionProgress
+from models.lesson_section import LessonSection
+
+# activity_events is an append-only log written next to the row that caused
+# the event (badge award, quiz attempt, submission, section completion), so the
+# recent-activity feed is a single range scan on (student_id, occurred_at).
+# As with progress_service, nothing here commits.
+
+def record_activity(student_id, event_type, message, source_id=None, occurred_at=None):
+    event = ActivityEvent(
+        student_id=student_id,
+        event_type=event_type,
+        message=message,
+        source_id=source_id,
+        occurred_at=occurred_at or datetime.utcnow()
+    )
+    db.session.add(event)
+    return event
+
+def record_section_activity(progress, section):
+    """Log a SectionProgress row that was just added to the session."""
+    db.session.flush()
+    return record_activity(
+        progress.student_id, "section", f"Completed: {section.title}",
+        source_id=progress.id, occurred_at=progress.completed_at
+    )
+
+def parse_cursor(cursor):
+    """Split an "<iso timestamp>_<id>" feed cursor; raises ValueError when malformed."""
+    timestamp, _, event_id = cursor.rpartition("_")
+    return datetime.fromisoformat(timestamp), int(event_id)
+
+def get_recent_activity(student_id, limit=6, before=None):
+    query = ActivityEvent.query.filter(ActivityEvent.student_id == student_id)
+    if before:
+        occurred_at, event_id = parse_cursor(before)
+        query = query.filter(or_(
+            ActivityEvent.occurred_at < occurred_at,
+            and_(ActivityEvent.occurred_at == occurred_at, ActivityEvent.id < event_id)
+        ))
+
+    return (
+        query
+        .order_by(ActivityEvent.occurred_at.desc(), ActivityEvent.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+# Backfill: one INSERT ... SELECT per source table and id range. Rows already
+# logged are skipped through the (event_type, source_id) key, so the command
+# can be re-run safely.
+
+def _badge_events():
+    return UserBadge.id, (
+        select(
+            UserBadge.student_id,
+            literal("badge"),
+            literal("Earned badge: ") + Badge.name,
+            func.coalesce(UserBadge.awarded_at, func.now()),
+            UserBadge.id
+        )
+        .join(Badge, Badge.id == UserBadge.badge_id)
+    )
+
+def _quiz_events():
+    score = cast(cast(func.round(func.coalesce(QuizAttempt.score, 0)), Integer), String)
+    return QuizAttempt.id, select(
+        QuizAttempt.student_id,
+        literal("quiz"),
+        literal("Completed a quiz with score ") + score + literal("%"),
+        func.coalesce(QuizAttempt.completed_at, func.now()),
+        QuizAttempt.id
+    )
+
+def _assignment_events():
+    return AssignmentSubmission.id, select(
+        AssignmentSubmission.student_id,
+        literal("assignment"),
+        literal("Submitted an assignment"),
+        func.coalesce(AssignmentSubmission.submitted_at, func.now()),
+        AssignmentSubmission.id
+    )
+
+def _section_events():
+    return SectionProgress.id, (
+        select(
+            SectionProgress.student_id,
+            literal("section"),
+            literal("Completed: ") + LessonSection.title,
+            func.coalesce(SectionProgress.completed_at, func.now()),
+            SectionProgress.id
+        )
+        .join(LessonSection, LessonSection.id == SectionProgress.section_id)
+    )
+
+_BACKFILL_SOURCES = {
+    "badge": _badge_events,
+    "quiz": _quiz_events,
+    "assignment": _assignment_events,
+    "section": _section_events,
+}
+
+def record_badge_activity(awards):
+    """Log badge awards just inserted, given as (student_id, badge_id) pairs, with one INSERT ... SELECT."""
+    id_column, source = _badge_events()
+    already_logged = exists().where(
+        ActivityEvent.event_type == "badge",
+        ActivityEvent.source_id == id_column
+    )
+    db.session.execute(insert(ActivityEvent).from_select(
+        ["student_id", "event_type", "message", "occurred_at", "source_id"],
+        source.where(
+            tuple_(UserBadge.student_id, UserBadge.badge_id).in_(list(awards)),
+            ~already_logged
+        )
+    ))
+
+def backfill_activity_events(chunk_size=5000):
+    """Populate activity_events from the existing tables, committing per chunk.
+
+    Returns {event_type: rows inserted}.
+    """
+    columns = ["student_id", "event_type", "message", "occurred_at", "source_id"]
+    inserted = {}
+
+    for event_type, build in _BACKFILL_SOURCES.items():
+        id_column, source = build()
+        max_id = db.session.query(func.max(id_column)).scalar() or 0
+        already_logged = exists().where(
+            ActivityEvent.event_type == event_type,
+            ActivityEvent.source_id == id_column
+        )
+
+        inserted[event_type] = 0
+        for start in range(0, max_id, chunk_size):
+            chunk = source.where(id_column > start, id_column <= start + chunk_size, ~already_logged)
+            result = db.session.execute(insert(ActivityEvent).from_select(columns, chunk))
+            db.session.commit()
+            inserted[event_type] += max(result.rowcount, 0)
+
+    return inserted
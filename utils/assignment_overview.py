@@ -0,0 +1,79 @@
+import os
+from datetime import datetime
+
+from models import db
+from models.assignment import Assignment
+from models.assignment_submission import AssignmentSubmission
+from models.courses import Course
+from models.course_lessons import Lesson
+from models.lesson_section import LessonSection
+from utils.access_scope import get_student_course_ids
+
+def _submission_to_dict(submission):
+    return {
+        "id": submission.id,
+        "file_name": submission.original_file_name or os.path.basename(submission.file_url),
+        "file_url": submission.file_url,
+        "submitted_at": submission.submitted_at.isoformat()
+    }
+
+def get_assignment_overview(student_id, course_id=None, lesson_id=None):
+    """Assignments linked to sections of the student's enrolled courses, with the student's
+    submissions, sorted by due date (undated last). Two queries once the access scope is cached.
+    """
+    query = (
+        db.session.query(
+            Assignment,
+            LessonSection.id.label("section_id"),
+            LessonSection.title.label("section_title"),
+            Lesson.id.label("lesson_id"),
+            Lesson.title.label("lesson_title"),
+            Course.id.label("course_id"),
+            Course.title.label("course_title"),
+        )
+        .join(LessonSection, LessonSection.assignment_id == Assignment.id)
+        .join(Lesson, Lesson.id == LessonSection.lesson_id)
+        .join(Course, Course.id == Lesson.course_id)
+        .filter(Course.id.in_(get_student_course_ids(student_id)))
+    )
+    if course_id is not None:
+        query = query.filter(Course.id == course_id)
+    if lesson_id is not None:
+        query = query.filter(Lesson.id == lesson_id)
+
+    rows = query.all()
+    if not rows:
+        return []
+
+    assignment_ids = {row.Assignment.id for row in rows}
+    submissions_by_assignment = {}
+    submissions = (
+        AssignmentSubmission.query
+        .filter(
+            AssignmentSubmission.student_id == student_id,
+            AssignmentSubmission.assignment_id.in_(assignment_ids)
+        )
+        .order_by(AssignmentSubmission.submitted_at)
+        .all()
+    )
+    for submission in submissions:
+        submissions_by_assignment.setdefault(submission.assignment_id, []).append(_submission_to_dict(submission))
+
+    overview = []
+    for row in sorted(rows, key=lambda r: (r.Assignment.due_date is None, r.Assignment.due_date or datetime.max, r.section_id)):
+        assignment = row.Assignment
+        overview.append({
+            "id": assignment.id,
+            "title": assignment.title,
+            "description": assignment.description,
+            "due_date": assignment.due_date.isoformat() if assignment.due_date else None,
+            "course_id": row.course_id,
+            "course_name": row.course_title,
+            "lesson_id": row.lesson_id,
+            "lesson_title": row.lesson_title,
+            "section_id": row.section_id,
+            "section_title": row.section_title,
+            "submissions": submissions_by_assignment.get(assignment.id, [])
+        })
+
+    return overview
@@ -0,0 +1,39 @@
+from sqlalchemy import insert, delete
+
+from models import db
+from models.quiz_attempts_answers import QuizAttemptAnswer
+
+# One quiz_attempt_answers row per graded question, written with a single
+# multi-row INSERT per attempt (or per regrade chunk). answers_temp stays as the
+# feedback payload; these rows are what per-question queries aggregate over.
+
+def attempt_answer_rows(attempt_id, result):
+    return [
+        {
+            "attempt_id": attempt_id,
+            "question_id": question_id,
+            "answer_text": submitted,
+            "is_correct": is_correct,
+        }
+        for question_id, submitted, is_correct in result.answers
+    ]
+
+def insert_attempt_answers(attempt_id, result):
+    rows = attempt_answer_rows(attempt_id, result)
+    if rows:
+        db.session.execute(insert(QuizAttemptAnswer), rows)
+
+def replace_attempt_answers(results_by_attempt):
+    """Swap the stored rows of several attempts for freshly graded ones: one DELETE, one INSERT."""
+    if not results_by_attempt:
+        return
+
+    db.session.execute(
+        delete(QuizAttemptAnswer).where(QuizAttemptAnswer.attempt_id.in_(list(results_by_attempt))),
+        execution_options={"synchronize_session": False}
+    )
+    rows = []
+    for attempt_id, result in results_by_attempt.items():
+        rows.extend(attempt_answer_rows(attempt_id, result))
+    if rows:
+        db.session.execute(insert(QuizAttemptAnswer), rows)
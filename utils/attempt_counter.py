@@ -0,0 +1,72 @@
+from sqlalchemy import select, update, insert, delete, func
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.quiz_attempt_counter import QuizAttemptCounter
+
+# Attempt numbers come from one quiz_attempt_counters row per (student, quiz),
+# bumped with a conditional UPDATE so two concurrent submits can never take the
+# same number or exceed max_attempts. The returned value is read back in the
+# same round trip: UPDATE ... RETURNING where the dialect has it, and
+# LAST_INSERT_ID(expr) on MySQL. unique_student_quiz_attempt on quiz_attempts
+# is the backstop.
+
+counters = QuizAttemptCounter.__table__
+
+def _increment(student_id, quiz_id, max_attempts):
+    stmt = update(counters).where(
+        counters.c.student_id == student_id,
+        counters.c.quiz_id == quiz_id
+    )
+    if max_attempts is not None:
+        stmt = stmt.where(counters.c.attempts_used < max_attempts)
+
+    next_value = counters.c.attempts_used + 1
+    dialect = db.session.get_bind().dialect
+
+    if dialect.update_returning:
+        return db.session.execute(
+            stmt.values(attempts_used=next_value, updated_at=func.now()).returning(counters.c.attempts_used)
+        ).scalar()
+
+    if dialect.name == "mysql":
+        result = db.session.execute(
+            stmt.values(attempts_used=func.last_insert_id(next_value), updated_at=func.now())
+        )
+        return result.lastrowid if result.rowcount else None
+
+    result = db.session.execute(stmt.values(attempts_used=next_value, updated_at=func.now()))
+    if not result.rowcount:
+        return None
+    return db.session.execute(
+        select(counters.c.attempts_used).where(
+            counters.c.student_id == student_id,
+            counters.c.quiz_id == quiz_id
+        )
+    ).scalar()
+
+def allocate_attempt(student_id, quiz_id, max_attempts=None):
+    """Reserve the next attempt number for (student, quiz); None when no attempts are left.
+
+    Runs inside the caller's transaction, so a rollback releases the number.
+    """
+    attempt_number = _increment(student_id, quiz_id, max_attempts)
+    if attempt_number is not None:
+        return attempt_number
+    if max_attempts is not None and max_attempts < 1:
+        return None
+
+    # No counter row yet (first attempt), or the limit is reached
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(counters).values(
+                student_id=student_id, quiz_id=quiz_id, attempts_used=1, updated_at=func.now()
+            ))
+        return 1
+    except IntegrityError:
+        # The row exists: either it was at the limit or a concurrent first attempt created it
+        return _increment(student_id, quiz_id, max_attempts)
+
+def delete_attempt_counters(quiz_id):
+    """Remove a quiz's attempt counters before the quiz itself is deleted. Does not commit."""
+    db.session.execute(delete(counters).where(counters.c.quiz_id == quiz_id))
@@ -0,0 +1,52 @@
+import threading
+
+from models import db
+
+class PeriodicWorker:
+    """Runs task() every `interval` seconds on a daemon thread inside an app context.
+
+    Exceptions are logged and the session is rolled back and removed after every
+    run, so one bad run never poisons the next.
+    """
+
+    def __init__(self, app, name, interval, task):
+        self.app = app
+        self.name = name
+        self.interval = interval
+        self.task = task
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    self.task()
+                except Exception:
+                    self.app.logger.exception("Background worker %s failed", self.name)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+def start_on_first_request(app, worker):
+    """Start a worker lazily so CLI commands (flask db upgrade, ...) never spawn it."""
+    started = threading.Lock()
+
+    @app.before_request
+    def _start_background_worker():
+        if worker._thread is None and started.acquire(blocking=False):
+            worker.start()
+
+    return worker
@@ -0,0 +1,133 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from flask import Flask, current_app
+from sqlalchemy import select, func, exists
+
+from models import db
+from models.users import User
+from models.enrolments import Enrolment
+from utils.badge_service import evaluate_badges
+
+# Re-evaluates badges for every student in scope (all, one institution or one
+# degree), e.g. after a badge is added or a threshold changes. Student ids are
+# read up front in keyset chunks; each chunk is one evaluate_badges() call
+# (stats rows, awarded badges and one bulk INSERT for the whole chunk) in its
+# own transaction. With workers > 1 the chunks run on a process pool where each
+# process builds its own app and engine.
+#
+# The checkpoint file records the highest student id below which every chunk
+# has committed, so an interrupted run resumes from there. Re-running a chunk
+# is harmless: badges already awarded, including ones a request awards while
+# the backfill runs, are skipped (unique_student_badge).
+
+def _student_conditions(institution_id=None, degree_id=None):
+    conditions = [User.role == "student"]
+    if institution_id is not None:
+        conditions.append(User.institution_id == institution_id)
+    if degree_id is not None:
+        conditions.append(exists().where(Enrolment.student_id == User.id, Enrolment.degree_id == degree_id))
+    return conditions
+
+def count_students(scope, after_id=0):
+    return db.session.execute(
+        select(func.count(User.id)).where(*_student_conditions(**scope), User.id > after_id)
+    ).scalar()
+
+def student_chunks(scope, chunk_size, after_id=0):
+    """Yield lists of student ids in id order, `chunk_size` at a time."""
+    conditions = _student_conditions(**scope)
+    while True:
+        student_ids = db.session.execute(
+            select(User.id).where(*conditions, User.id > after_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not student_ids:
+            return
+        yield student_ids
+        after_id = student_ids[-1]
+
+def backfill_chunk(student_ids):
+    """Award missing badges to one chunk of students and commit. Returns the number awarded."""
+    new_badges = evaluate_badges(student_ids)
+    db.session.commit()
+    return sum(len(badges) for badges in new_badges.values())
+
+def _init_worker(config):
+    app = Flask(__name__)
+    app.config.update(config)
+    db.init_app(app)
+    app.app_context().push()
+
+def _run_chunk(student_ids):
+    try:
+        return backfill_chunk(student_ids)
+    finally:
+        db.session.remove()
+
+def load_checkpoint(path, scope):
+    state = {"scope": scope, "last_student_id": 0, "students": 0, "badges_awarded": 0}
+    if not path or not os.path.exists(path):
+        return state
+    with open(path) as f:
+        saved = json.load(f)
+    if saved.get("scope") != scope:
+        raise ValueError(f"Checkpoint {path} belongs to a different scope: {saved.get('scope')}")
+    return {**state, **saved}
+
+def _save_checkpoint(path, state):
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def backfill_badges(institution_id=None, degree_id=None, chunk_size=500, workers=1, checkpoint=None, progress=None):
+    """Award every badge students in scope have earned but not received.
+
+    `progress(state, total)` is called after each committed chunk. Returns the
+    final state: {"scope", "last_student_id", "students", "badges_awarded"}.
+    SQLite runs on a single process regardless of `workers`.
+    """
+    scope = {"institution_id": institution_id, "degree_id": degree_id}
+    state = load_checkpoint(checkpoint, scope)
+    total = state["students"] + count_students(scope, state["last_student_id"])
+    chunks = list(student_chunks(scope, chunk_size, state["last_student_id"]))
+
+    pending = []  # (last student id, size) of chunks not yet checkpointed, in id order
+    done = {}  # last student id -> badges awarded, for finished chunks
+
+    def advance():
+        while pending and pending[0][0] in done:
+            last_id, size = pending.pop(0)
+            state["last_student_id"] = last_id
+            state["students"] += size
+            state["badges_awarded"] += done.pop(last_id)
+        _save_checkpoint(checkpoint, state)
+        if progress:
+            progress(state, total)
+
+    if workers <= 1 or db.engine.dialect.name == "sqlite":
+        for student_ids in chunks:
+            pending.append((student_ids[-1], len(student_ids)))
+            done[student_ids[-1]] = backfill_chunk(student_ids)
+            advance()
+        return state
+
+    config = {key: value for key, value in current_app.config.items() if key.startswith(("SQLALCHEMY_", "BADGE_"))}
+    # Forked workers must not share the parent's pooled connections
+    db.session.remove()
+    db.engine.dispose()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,)) as pool:
+        running = {}
+        for student_ids in chunks:
+            pending.append((student_ids[-1], len(student_ids)))
+            running[pool.submit(_run_chunk, student_ids)] = student_ids[-1]
+            while len(running) >= workers * 2 or (student_ids is chunks[-1] and running):
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done[running.pop(future)] = future.result()
+                advance()
+
+    return state
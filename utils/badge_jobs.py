@@ -0,0 +1,168 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, delete, select, update, func
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.badges import Badge, UserBadge
+from models.badge_evaluation_job import BadgeEvaluationJob
+from utils.background import PeriodicWorker, start_on_first_request
+from utils.badge_service import evaluate_badges
+
+# Deferred badge evaluation (BADGE_EVALUATION_MODE = "deferred"). Write paths
+# queue the student instead of evaluating inline; badge_evaluation_jobs holds at
+# most one row per student, so a burst of completions costs one evaluation. A
+# background worker claims jobs by deleting them in the same transaction that
+# awards the badges, so a failed batch leaves its jobs queued. A failed batch
+# is retried one student at a time; a student that still fails is marked
+# "failed" and skipped from then on, so it cannot block the queue. Clients pick
+# up the awards from GET /api/student/badges/new, starting at the badge_cursor
+# the write route returned.
+
+def request_badge_evaluation(student_ids):
+    """Queue students for evaluation; students already queued are skipped. Does not commit."""
+    for student_id in set(student_ids):
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(BadgeEvaluationJob).values(
+                    student_id=student_id, requested_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            pass  # already queued
+
+def badge_evaluation_deferred():
+    return current_app.config.get("BADGE_EVALUATION_MODE") == "deferred"
+
+def evaluate_or_defer(student_ids):
+    """Evaluate now, or queue when deferred. Returns {student_id: [new badge dicts]} ({} when deferred)."""
+    if badge_evaluation_deferred():
+        request_badge_evaluation(student_ids)
+        return {}
+    return evaluate_badges(student_ids)
+
+def pending_badge_cursor(student_id, queued=False):
+    """The student's latest user_badges id when awards are not returned inline
+    (deferred evaluation, or `queued` for a queued quiz submission), else None.
+
+    Awards made later are listed by GET /api/student/badges/new?after=<cursor>.
+    Read it before committing, so the background worker cannot award in between.
+    """
+    if not queued and not badge_evaluation_deferred():
+        return None
+    return db.session.query(func.max(UserBadge.id)).filter(UserBadge.student_id == student_id).scalar() or 0
+
+def _claim(student_ids):
+    """Delete the students' pending jobs; False if another worker took any of them."""
+    claimed = db.session.execute(
+        delete(BadgeEvaluationJob).where(
+            BadgeEvaluationJob.student_id.in_(student_ids), BadgeEvaluationJob.status == "pending"
+        ),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    return claimed == len(student_ids)
+
+def _evaluate_one(student_id):
+    """Evaluate one queued student in its own transaction. Returns badges awarded, or None if already taken."""
+    if not _claim([student_id]):
+        db.session.rollback()
+        return None
+    new_badges = evaluate_badges([student_id])
+    db.session.commit()
+    return len(new_badges.get(student_id, []))
+
+def _mark_failed(student_id, error):
+    db.session.execute(
+        update(BadgeEvaluationJob)
+        .where(BadgeEvaluationJob.student_id == student_id, BadgeEvaluationJob.status == "pending")
+        .values(status="failed", error=str(error)[:255]),
+        execution_options={"synchronize_session": False}
+    )
+    db.session.commit()
+
+def process_badge_jobs(batch_size=500):
+    """Evaluate queued students, one transaction per batch. Returns {"students", "badges_awarded", "failed"}."""
+    students = 0
+    badges_awarded = 0
+    failed = 0
+
+    while True:
+        student_ids = db.session.execute(
+            select(BadgeEvaluationJob.student_id)
+            .where(BadgeEvaluationJob.status == "pending")
+            .order_by(BadgeEvaluationJob.requested_at, BadgeEvaluationJob.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not student_ids:
+            break
+
+        try:
+            if not _claim(student_ids):
+                # Another worker took part of this batch
+                db.session.rollback()
+                continue
+            new_badges = evaluate_badges(student_ids)
+            db.session.commit()
+            students += len(student_ids)
+            badges_awarded += sum(len(badges) for badges in new_badges.values())
+        except Exception:
+            current_app.logger.exception("Badge evaluation failed for %s students", len(student_ids))
+            db.session.rollback()
+            for student_id in student_ids:
+                try:
+                    awarded = _evaluate_one(student_id)
+                except Exception as e:
+                    current_app.logger.exception("Badge evaluation failed for student %s", student_id)
+                    db.session.rollback()
+                    _mark_failed(student_id, e)
+                    failed += 1
+                    continue
+                if awarded is not None:
+                    students += 1
+                    badges_awarded += awarded
+
+        if len(student_ids) < batch_size:
+            break
+
+    return {"students": students, "badges_awarded": badges_awarded, "failed": failed}
+
+def retry_failed_badge_jobs():
+    """Put failed jobs back in the queue. Returns how many. Does not commit."""
+    return db.session.execute(
+        update(BadgeEvaluationJob)
+        .where(BadgeEvaluationJob.status == "failed")
+        .values(status="pending", error=None, requested_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+
+def get_badges_awarded_since(student_id, since=None, after_id=None):
+    """Badges awarded after a user_badges id cursor (or an awarded_at timestamp), oldest first."""
+    query = (
+        db.session.query(UserBadge, Badge)
+        .join(Badge, Badge.id == UserBadge.badge_id)
+        .filter(UserBadge.student_id == student_id)
+    )
+    if after_id is not None:
+        query = query.filter(UserBadge.id > after_id)
+    if since is not None:
+        query = query.filter(UserBadge.awarded_at >= since)
+
+    return [
+        {
+            "award_id": user_badge.id,
+            "id": badge.id,
+            "name": badge.name,
+            "description": badge.description,
+            "icon_url": badge.icon_url,
+            "awarded_at": user_badge.awarded_at.isoformat() if user_badge.awarded_at else None
+        }
+        for user_badge, badge in query.order_by(UserBadge.id).all()
+    ]
+
+def _background_tick():
+    process_badge_jobs(current_app.config.get("BADGE_JOB_BATCH", 500))
+
+def init_badge_worker(app):
+    if app.config.get("BADGE_EVALUATION_MODE") != "deferred":
+        return None
+    worker = PeriodicWorker(app, "badge-evaluator", app.config.get("BADGE_JOB_INTERVAL", 5), _background_tick)
+    return start_on_first_request(app, worker)
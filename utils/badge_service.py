@@ -1,231 +1,215 @@
-from models import db, Badge, UserBadge, SectionProgress, QuizAttempt
-from sqlalchemy import func
-from models.assignment import Assignment
-from models.assignment_submission import AssignmentSubmission
-from models.courses import Course
-from models.course_lessons import Lesson
-from models.lesson_section import LessonSection
-from models.section_progress import SectionProgress
+import json
+from dataclasses import dataclass
 from datetime import datetime
-
-def award_badge(student_id, badge_name):
-    badge = Badge.query.filter_by(name=badge_name).first()
-    if not badge:
-        return None 
-
-    already_awarded = UserBadge.query.filter_by(student_id=student_id, badge_id=badge.id).first()
-    if not already_awarded:
-        new_badge = UserBadge(student_id=student_id, badge_id=badge.id, awarded_at=datetime.utcnow())
-        db.session.add(new_badge)
-        db.session.flush()
+from flask import current_app
+from sqlalchemy import select, insert, func, exists
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db
+from models.users import User
+from models.badges import Badge, UserBadge
+from models.student_stats import StudentStats
+from models.course_progress import CourseProgress
+from utils.cache import TTLCache
+from utils.activity_service import record_badge_activity
+from utils.student_stats import COUNTERS, bump_stats, count_stats
+
+# Badge rules come from Badge.criteria, either "<metric>:<threshold>" or
+# {"metric": ..., "threshold": ...}; a badge is earned once the student's metric
+# reaches the threshold. The rule catalogue is cached per process. Metrics are
+# read from the students' student_stats rows (utils/student_stats.py), plus a
+# correlated count of completed courses when a rule uses courses_completed.
+# Evaluating any number of students costs one query for their metrics and the
+# rule badges they already hold, then, only when something is awarded, one
+# bulk INSERT of the awards (in a savepoint), one INSERT ... SELECT of their activity entries and
+# one badges_earned update. Students without a stats row yet are counted from
+# the source tables (one more query) and get their row from the update.
+# unique_student_badge keeps a badge from being awarded twice when requests,
+# badge jobs and backfills evaluate the same student at once: the INSERT skips
+# pairs that already exist, and only the pairs it inserted are reported,
+# logged and counted.
+# Nothing here commits; the caller owns the transaction.
+
+_rules = TTLCache(maxsize=1, ttl=300)
+
+@dataclass(frozen=True)
+class BadgeRule:
+    badge_id: int
+    name: str
+    description: str
+    icon_url: str
+    metric: str
+    threshold: int
+
+    def to_dict(self):
         return {
-            "id": badge.id,
-            "name": badge.name,
-            "description": badge.description,
-            "icon_url": badge.icon_url
+            "id": self.badge_id,
+            "name": self.name,
+            "description": self.description,
+            "icon_url": self.icon_url
         }
-    return None 
-
-def evaluate_section_badges(student_id):
-    badges = []
-    completed_sections = SectionProgress.query.filter_by(student_id=student_id).count()
-
-    if completed_sections >= 1:
-        b = award_badge(student_id, "Section Starter")
-        if b: badges.append(b)
-    if completed_sections >= 5:
-        b = award_badge(student_id, "Section Explorer")
-        if b: badges.append(b)
-    if completed_sections >= 10:
-        b = award_badge(student_id, "Section Pro")
-        if b: badges.append(b)
-    return badges
-
-def evaluate_quiz_badges(student_id, perfect_score=False):
-    badges = []
-    passed_quizzes = QuizAttempt.query.filter_by(student_id=student_id, pass_status=True).count()
-
-    if passed_quizzes >= 1:
-        b = award_badge(student_id, "First Quiz Win")
-        if b: badges.append(b)
-    if passed_quizzes >= 3:
-        b = award_badge(student_id, "Quiz Warrior")
-        if b: badges.append(b)
-    if passed_quizzes >= 5:
-        b = award_badge(student_id, "Quiz Master")
-        if b: badges.append(b)
-
-    if perfect_score:
-        b = award_badge(student_id, "Perfect Quiz Score")
-        if b: badges.append(b)
-
-    return badges
-
-def evaluate_assignment_badges(student_id):
-    badges = []
-    total_submissions = AssignmentSubmission.query.filter_by(student_id=student_id).count()
-
-    if total_submissions >= 1:
-        b = award_badge(student_id, "First Submission")
-        if b: badges.append(b)
-    if total_submissions >= 5:
-        b = award_badge(student_id, "On a Roll")
-        if b: badges.append(b)
-    if total_submissions >= 10:
-        b = award_badge(student_id, "Assignment Hero")
-        if b: badges.append(b)
-    return badges
-
-def evaluate_course_completion_badges(student_id, course_id):
-    badges = []
-    total_sections = LessonSection.query.join(Lesson).filter(Lesson.course_id == course_id).count()
-    completed_sections = SectionProgress.query.join(LessonSection).join(Lesson).filter(
-        Lesson.course_id == course_id,
-        SectionProgress.student_id == student_id
-    ).count()
-
-    if total_sections > 0 and completed_sections == total_sections:
-        b = award_badge(student_id, "Course Finisher")
-        if b: badges.append(b)
-    return badges
-
-def evaluate_timeliness_badges(student_id):
-    badges = []
-    submissions = AssignmentSubmission.query.filter_by(student_id=student_id).all()
-    on_time_submissions = 0
-    early_submissions = 0
-
-    for s in submissions:
-        assignment = Assignment.query.get(s.assignment_id)
-        if assignment and assignment.due_date and s.submitted_at:
-            if s.submitted_at <= assignment.due_date:
-                on_time_submissions += 1
-                if (assignment.due_date - s.submitted_at).total_seconds() >= 3600 * 24:
-                    early_submissions += 1
-
-    if early_submissions >= 1:
-        b = award_badge(student_id, "Early Bird")
-        if b: badges.append(b)
-    if on_time_submissions >= 5:
-        b = award_badge(student_id, "Always On Time")
-        if b: badges.append(b)
-    return badges
-
-def award_badge(student_id, badge_name):
-    badge = Badge.query.filter_by(name=badge_name).first()
-    if not badge:
-        return None 
-
-    already_awarded = UserBadge.query.filter_by(student_id=student_id, badge_id=badge.id).first()
-    if not already_awarded:
-        new_badge = UserBadge(student_id=student_id, badge_id=badge.id, awarded_at=datetime.utcnow())
-        db.session.add(new_badge)
-        db.session.flush()
-        return {
-            "id": badge.id,
-            "name": badge.name,
-            "description": badge.description,
-            "icon_url": badge.icon_url
+
+# Counters a badge rule may use; badges_earned is left out so awards cannot chain
+STAT_METRICS = tuple(name for name in COUNTERS if name != "badges_earned")
+METRICS = (*STAT_METRICS, "courses_completed")
+
+def _courses_completed(student_id):
+    return select(func.count(CourseProgress.id)).where(
+        CourseProgress.student_id == student_id,
+        CourseProgress.total_sections > 0,
+        CourseProgress.completed_sections >= CourseProgress.total_sections
+    ).scalar_subquery()
+
+def parse_criteria(criteria):
+    """Return (metric, threshold) for a Badge.criteria value, or None if it is not a rule."""
+    if not criteria:
+        return None
+    try:
+        if criteria.lstrip().startswith("{"):
+            data = json.loads(criteria)
+            metric, threshold = data["metric"], data.get("threshold", 1)
+        else:
+            metric, _, threshold = criteria.partition(":")
+            threshold = threshold or 1
+        metric, threshold = metric.strip(), int(threshold)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return (metric, threshold) if metric in METRICS else None
+
+def _load_rules():
+    rules = []
+    for badge in Badge.query.order_by(Badge.id).all():
+        parsed = parse_criteria(badge.criteria)
+        if parsed:
+            rules.append(BadgeRule(badge.id, badge.name, badge.description, badge.icon_url, *parsed))
+    return tuple(rules)
+
+def get_badge_rules():
+    ttl = current_app.config.get("BADGE_RULES_CACHE_TTL")
+    return _rules.get_or_set("rules", _load_rules, ttl=ttl)
+
+def invalidate_badge_rules():
+    _rules.clear()
+
+def _read_students(student_ids, metrics, badge_ids=()):
+    """{student_id: ({metric: value}, {badge ids held})}, reading the metrics and
+    which of `badge_ids` each student holds in one query.
+    """
+    stats = StudentStats.__table__
+    columns = [stats.c[name] for name in metrics if name != "courses_completed"]
+    if "courses_completed" in metrics:
+        columns.append(_courses_completed(User.id).label("courses_completed"))
+    held = {badge_id: f"held_{badge_id}" for badge_id in badge_ids}
+    columns += [
+        exists().where(UserBadge.student_id == User.id, UserBadge.badge_id == badge_id).label(label)
+        for badge_id, label in held.items()
+    ]
+
+    rows = db.session.execute(
+        select(User.id, stats.c.id.label("stats_id"), *columns)
+        .outerjoin(stats, stats.c.student_id == User.id)
+        .where(User.id.in_(student_ids))
+    ).all()
+
+    # Not seeded yet: count from the source tables without writing a row
+    missing = [row.id for row in rows if row.stats_id is None]
+    counted = count_stats(missing) if missing else {}
+
+    students = {}
+    for row in rows:
+        values = {
+            name: (
+                getattr(row, name) if name == "courses_completed" or row.stats_id is not None
+                else counted.get(row.id, {}).get(name, 0)
+            )
+            for name in metrics
         }
-    return None 
-
-def evaluate_section_badges(student_id):
-    badges = []
-    completed_sections = SectionProgress.query.filter_by(student_id=student_id).count()
-
-    if completed_sections >= 1:
-        b = award_badge(student_id, "Section Starter")
-        if b: badges.append(b)
-    if completed_sections >= 5:
-        b = award_badge(student_id, "Section Explorer")
-        if b: badges.append(b)
-    if completed_sections >= 10:
-        b = award_badge(student_id, "Section Pro")
-        if b: badges.append(b)
-    return badges
-
-def evaluate_quiz_badges(student_id, perfect_score=False):
-    badges = []
-    passed_quizzes = QuizAttempt.query.filter_by(student_id=student_id, pass_status=True).count()
-
-    if passed_quizzes >= 1:
-        b = award_badge(student_id, "First Quiz Win")
-        if b: badges.append(b)
-    if passed_quizzes >= 3:
-        b = award_badge(student_id, "Quiz Warrior")
-        if b: badges.append(b)
-    if passed_quizzes >= 5:
-        b = award_badge(student_id, "Quiz Master")
-        if b: badges.append(b)
-
-    if perfect_score:
-        b = award_badge(student_id, "Perfect Quiz Score")
-        if b: badges.append(b)
-
-    return badges
-
-def evaluate_assignment_badges(student_id):
-    badges = []
-    total_submissions = AssignmentSubmission.query.filter_by(student_id=student_id).count()
-
-    if total_submissions >= 1:
-        b = award_badge(student_id, "First Submission")
-        if b: badges.append(b)
-    if total_submissions >= 5:
-        b = award_badge(student_id, "On a Roll")
-        if b: badges.append(b)
-    if total_submissions >= 10:
-        b = award_badge(student_id, "Assignment Hero")
-        if b: badges.append(b)
-    return badges
-
-def evaluate_course_completion_badges(student_id, course_id):
-    badges = []
-    total_sections = LessonSection.query.join(Lesson).filter(Lesson.course_id == course_id).count()
-    completed_sections = SectionProgress.query.join(LessonSection).join(Lesson).filter(
-        Lesson.course_id == course_id,
-        SectionProgress.student_id == student_id
-    ).count()
-
-    if total_sections > 0 and completed_sections == total_sections:
-        b = award_badge(student_id, "Course Finisher")
-        if b: badges.append(b)
-    return badges
-
-def evaluate_timeliness_badges(student_id):
-    badges = []
-    submissions = AssignmentSubmission.query.filter_by(student_id=student_id).all()
-    on_time_submissions = 0
-    early_submissions = 0
-
-    for s in submissions:
-        assignment = Assignment.query.get(s.assignment_id)
-        if assignment and assignment.due_date and s.submitted_at:
-            if s.submitted_at <= assignment.due_date:
-                on_time_submissions += 1
-                if (assignment.due_date - s.submitted_at).total_seconds() >= 3600 * 24:
-                    early_submissions += 1
-
-    if early_submissions >= 1:
-        b = award_badge(student_id, "Early Bird")
-        if b: badges.append(b)
-    if on_time_submissions >= 5:
-        b = award_badge(student_id, "Always On Time")
-        if b: badges.append(b)
-    return badges
-
-def evaluate_all_badges(student_id, course_id=None, perfect_quiz_score=False):
-    new_badges = []
-
-    new_badges += evaluate_section_badges(student_id)
-    new_badges += evaluate_quiz_badges(student_id, perfect_score=perfect_quiz_score)
-    new_badges += evaluate_assignment_badges(student_id)
-    new_badges += evaluate_timeliness_badges(student_id)
-
-    if course_id:
-        new_badges += evaluate_course_completion_badges(student_id, course_id)
+        students[row.id] = (values, {badge_id for badge_id, label in held.items() if row._mapping[label]})
+    return students
+
+def compute_metrics(student_ids, metrics=None):
+    """{student_id: {metric: value}} for the given students, from their student_stats rows."""
+    student_ids = list(student_ids)
+    metrics = sorted(metrics if metrics is not None else METRICS)
+    if not student_ids or not metrics:
+        return {student_id: {} for student_id in student_ids}
+    return {student_id: values for student_id, (values, _) in _read_students(student_ids, metrics).items()}
+
+def _award_insert():
+    """INSERT into user_badges that skips (student_id, badge_id) pairs already awarded."""
+    # On the Core table, so the result carries the rowcount
+    table = UserBadge.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=["student_id", "badge_id"])
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=["student_id", "badge_id"])
+    return insert(table).prefix_with("IGNORE", dialect="mysql")
+
+def _insert_awards(awards, awarded_at):
+    """Insert (student_id, badge_id) awards; returns the pairs actually inserted."""
+    stmt = _award_insert()
+    rows = [{"student_id": student_id, "badge_id": badge_id, "awarded_at": awarded_at} for student_id, badge_id in awards]
+
+    savepoint = db.session.begin_nested()
+    inserted = db.session.execute(stmt, rows).rowcount
+    if inserted == len(rows) and db.session.get_bind().dialect.supports_sane_multi_rowcount:
+        savepoint.commit()
+        return awards
+    savepoint.rollback()
+
+    # Another transaction awarded some of them first; find out which, one row at a time
+    return [award for award, row in zip(awards, rows) if db.session.execute(stmt, row).rowcount]
+
+def evaluate_badges(student_ids, perfect_students=()):
+    """Award every badge whose rule the students now meet.
+
+    `perfect_students` may hold students who just scored 100, for callers that
+    have not flushed the attempt yet. Returns {student_id: [new badge dicts]}.
+    """
+    student_ids = set(student_ids)
+    rules = get_badge_rules()
+    if not student_ids or not rules:
+        return {}
+
+    students = _read_students(
+        list(student_ids), sorted({rule.metric for rule in rules}), [rule.badge_id for rule in rules]
+    )
+    for student_id in perfect_students:
+        values = students.get(student_id, ({}, set()))[0]
+        if "perfect_scores" in values:
+            values["perfect_scores"] = max(values["perfect_scores"], 1)
+
+    new_badges = {}
+    for student_id, (values, held) in students.items():
+        for rule in rules:
+            if values.get(rule.metric, 0) >= rule.threshold and rule.badge_id not in held:
+                new_badges.setdefault(student_id, []).append(rule)
 
     if new_badges:
-        db.session.commit()
-
-    return new_badges
+        awards = [
+            (student_id, rule.badge_id)
+            for student_id, student_rules in new_badges.items()
+            for rule in student_rules
+        ]
+        inserted = _insert_awards(awards, datetime.utcnow())
+        if len(inserted) < len(awards):
+            awarded = set(inserted)
+            new_badges = {
+                student_id: [rule for rule in student_rules if (student_id, rule.badge_id) in awarded]
+                for student_id, student_rules in new_badges.items()
+            }
+            new_badges = {student_id: student_rules for student_id, student_rules in new_badges.items() if student_rules}
+        if inserted:
+            record_badge_activity(inserted)
+            bump_stats({student_id: {"badges_earned": len(student_rules)} for student_id, student_rules in new_badges.items()})
+
+    return {
+        student_id: [rule.to_dict() for rule in student_rules]
+        for student_id, student_rules in new_badges.items()
+    }
+
+def evaluate_all_badges(student_id, perfect_quiz_score=False):
+    """New badge dicts for one student."""
+    perfect_students = [student_id] if perfect_quiz_score else []
+    return evaluate_badges([student_id], perfect_students).get(student_id, [])
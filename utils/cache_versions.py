@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.cache_version import CacheVersion
+
+# Invalidation for the per-process TTL caches that several gunicorn workers
+# hold side by side. A cache key carries the current version of the names it
+# depends on; writers bump those names in the same transaction as their change,
+# so after commit every worker reads a new version and builds a new key, and
+# the stale entries simply age out. Names that were never bumped read as 0.
+
+versions = CacheVersion.__table__
+
+def bump_cache_version(*names):
+    """Increment the given versions. Does not commit."""
+    for name in sorted(set(names)):
+        stmt = (
+            update(versions)
+            .where(versions.c.name == name)
+            .values(version=versions.c.version + 1, updated_at=datetime.utcnow())
+        )
+        if db.session.execute(stmt).rowcount:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(versions).values(name=name, version=1, updated_at=datetime.utcnow()))
+        except IntegrityError:
+            # Created concurrently
+            db.session.execute(stmt)
+
+def get_cache_versions(*names):
+    """Tuple of the versions of `names`, in order, from one query."""
+    found = dict(db.session.execute(
+        select(versions.c.name, versions.c.version).where(versions.c.name.in_(names))
+    ).all())
+    return tuple(found.get(name, 0) for name in names)
@@ -0,0 +1,150 @@
+from datetime import date
+from flask import current_app
+from sqlalchemy import update, select
+from sqlalchemy.orm import joinedload
+
+from models import db
+from models.course_lessons import Lesson
+from models.courses import Course
+from models.lesson_section import LessonSection
+from models.quizzes import Quiz
+from models.section_progress import SectionProgress
+from models.assignment_submission import AssignmentSubmission
+from utils.cache import TTLCache
+
+# The student lesson payload is split in two: a student-independent skeleton
+# (titles, text, quiz/assignment metadata, week labels) cached per
+# (lesson id, content_version), and a per-student overlay (submissions,
+# completion, is_current_week) merged on top at request time.
+#
+# Writers bump Lesson.content_version in the same transaction as the change,
+# so every worker process sees a new cache key after commit.
+
+_lesson_structures = TTLCache(maxsize=512, ttl=600)
+
+def bump_lesson_version(lesson_id):
+    db.session.execute(
+        update(Lesson)
+        .where(Lesson.id == lesson_id)
+        .values(content_version=Lesson.content_version + 1),
+        execution_options={"synchronize_session": False}
+    )
+
+def _bump_lessons_using(column, value):
+    lesson_ids = select(LessonSection.lesson_id).where(column == value)
+    db.session.execute(
+        update(Lesson)
+        .where(Lesson.id.in_(lesson_ids))
+        .values(content_version=Lesson.content_version + 1),
+        execution_options={"synchronize_session": False}
+    )
+
+def bump_lessons_for_quiz(quiz_id):
+    _bump_lessons_using(LessonSection.quiz_id, quiz_id)
+
+def bump_lessons_for_assignment(assignment_id):
+    _bump_lessons_using(LessonSection.assignment_id, assignment_id)
+
+def bump_lessons_for_degree(degree_id):
+    """Bump every lesson of the degree's courses, e.g. when the degree gets a new calendar."""
+    db.session.execute(
+        update(Lesson)
+        .where(Lesson.course_id.in_(select(Course.id).where(Course.degree_id == degree_id)))
+        .values(content_version=Lesson.content_version + 1),
+        execution_options={"synchronize_session": False}
+    )
+
+def _build_lesson_structure(lesson):
+    sections = (
+        LessonSection.query
+        .options(
+            joinedload(LessonSection.calendar_week),
+            joinedload(LessonSection.assignment),
+            joinedload(LessonSection.quiz).selectinload(Quiz.questions)
+        )
+        .filter_by(lesson_id=lesson.id)
+        .all()
+    )
+
+    structure_sections = []
+    for section in sections:
+        week = section.calendar_week
+        structure_sections.append({
+            "id": section.id,
+            "title": section.title,
+            "content_type": section.content_type,
+            "text_content": section.text_content if section.content_type == "text" else "",
+            "file_url": section.file_url if section.content_type == "file" else None,
+            "assignment": section.assignment.to_dict() if section.assignment else None,
+            "quiz": section.quiz.to_dict() if section.quiz else None,
+            "calendar_week_id": section.calendar_week_id,
+            "calendar_week_label": week.label if week else None,
+            "week_start": week.start_date if week else None,
+            "week_end": week.end_date if week else None,
+        })
+
+    return {
+        "id": lesson.id,
+        "title": lesson.title if lesson.title else "Untitled Lesson",
+        "description": lesson.description if lesson.description is not None else "",
+        "sections": structure_sections,
+    }
+
+def get_lesson_structure(lesson):
+    key = (lesson.id, lesson.content_version)
+    ttl = current_app.config.get("LESSON_CACHE_TTL")
+    return _lesson_structures.get_or_set(key, lambda: _build_lesson_structure(lesson), ttl=ttl)
+
+def build_student_lesson(lesson, student_id):
+    """Cached lesson skeleton plus the student's submissions and completions (two queries)."""
+    structure = get_lesson_structure(lesson)
+    sections = structure["sections"]
+
+    section_ids = [section["id"] for section in sections]
+    assignment_ids = [section["assignment"]["id"] for section in sections if section["assignment"]]
+
+    submissions_by_assignment = {}
+    if assignment_ids:
+        submissions = AssignmentSubmission.query.filter(
+            AssignmentSubmission.student_id == student_id,
+            AssignmentSubmission.assignment_id.in_(assignment_ids)
+        ).all()
+        for submission in submissions:
+            submissions_by_assignment.setdefault(submission.assignment_id, []).append(submission.to_dict())
+
+    completed_section_ids = set()
+    if section_ids:
+        completed_section_ids = {
+            row.section_id for row in db.session.query(SectionProgress.section_id).filter(
+                SectionProgress.student_id == student_id,
+                SectionProgress.section_id.in_(section_ids)
+            )
+        }
+
+    today = date.today()
+    student_sections = []
+    for section in sections:
+        assignment = section["assignment"]
+        student_sections.append({
+            "id": section["id"],
+            "title": section["title"],
+            "content_type": section["content_type"],
+            "text_content": section["text_content"],
+            "file_url": section["file_url"],
+            "assignment": (
+                {**assignment, "submissions": submissions_by_assignment.get(assignment["id"], [])}
+                if assignment else None
+            ),
+            "quiz": section["quiz"],
+            "calendar_week_id": section["calendar_week_id"],
+            "calendar_week_label": section["calendar_week_label"],
+            "is_current_week": bool(section["week_start"] and section["week_start"] <= today <= section["week_end"]),
+            "is_completed": section["id"] in completed_section_ids,
+        })
+
+    return {
+        "id": structure["id"],
+        "title": structure["title"],
+        "description": structure["description"],
+        "sections": student_sections,
+    }
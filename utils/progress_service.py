@@ -0,0 +1,166 @@
+from datetime import datetime
+from sqlalchemy import func, select, update, case
+from models import db
+from models.course_progress import CourseProgress
+from models.section_progress import SectionProgress
+from models.lesson_section import LessonSection
+from models.course_lessons import Lesson
+from models.courses import Course
+from models.enrolments import Enrolment
+from utils.student_stats import bump_stats, remove_section_stats
+
+# Per-(student, course) progress is kept in course_progress and updated in the
+# same transaction as the SectionProgress / LessonSection change that affects it.
+# None of these functions commit; the calling route owns the transaction.
+
+def _course_for_lesson(lesson_id):
+    return (
+        db.session.query(Course.id, Course.degree_id)
+        .join(Lesson, Lesson.course_id == Course.id)
+        .filter(Lesson.id == lesson_id)
+        .first()
+    )
+
+def _course_section_count(course_id):
+    return (
+        select(func.count(LessonSection.id))
+        .join(Lesson, Lesson.id == LessonSection.lesson_id)
+        .where(Lesson.course_id == course_id)
+        .scalar_subquery()
+    )
+
+def _build_course_progress(student_id, course_id):
+    """Create the aggregate row from the source tables (first completion in a course)."""
+    completed = (
+        db.session.query(func.count(SectionProgress.id))
+        .join(LessonSection, LessonSection.id == SectionProgress.section_id)
+        .join(Lesson, Lesson.id == LessonSection.lesson_id)
+        .filter(SectionProgress.student_id == student_id, Lesson.course_id == course_id)
+        .scalar()
+    )
+    total = db.session.query(_course_section_count(course_id)).scalar()
+
+    return CourseProgress(
+        student_id=student_id,
+        course_id=course_id,
+        completed_sections=completed,
+        total_sections=total,
+    )
+
+def refresh_enrolment_progress(degree_id, student_id=None, exclude_section_ids=None):
+    """Roll course_progress up into Enrolment.progress (percentage of all degree sections).
+
+    `exclude_section_ids` leaves out sections that are being deleted in the current transaction.
+    """
+    total = (
+        select(func.count(LessonSection.id))
+        .join(Lesson, Lesson.id == LessonSection.lesson_id)
+        .join(Course, Course.id == Lesson.course_id)
+        .where(Course.degree_id == Enrolment.degree_id)
+    )
+    if exclude_section_ids:
+        total = total.where(LessonSection.id.notin_(exclude_section_ids))
+    total = total.scalar_subquery()
+    completed = (
+        select(func.coalesce(func.sum(CourseProgress.completed_sections), 0))
+        .join(Course, Course.id == CourseProgress.course_id)
+        .where(
+            Course.degree_id == Enrolment.degree_id,
+            CourseProgress.student_id == Enrolment.student_id
+        )
+        .scalar_subquery()
+    )
+
+    stmt = update(Enrolment).where(Enrolment.degree_id == degree_id).values(
+        progress=case((total > 0, func.round(completed * 100.0 / total, 2)), else_=0.0)
+    )
+    if student_id is not None:
+        stmt = stmt.where(Enrolment.student_id == student_id)
+
+    db.session.execute(stmt, execution_options={"synchronize_session": False})
+
+def record_section_completion(student_id, section):
+    """Call right after adding a new SectionProgress row for `section`."""
+    bump_stats({student_id: {"sections_completed": 1}})
+
+    course = _course_for_lesson(section.lesson_id)
+    if not course:
+        return
+
+    result = db.session.execute(
+        update(CourseProgress)
+        .where(CourseProgress.student_id == student_id, CourseProgress.course_id == course.id)
+        .values(completed_sections=CourseProgress.completed_sections + 1, updated_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    if result.rowcount == 0:
+        db.session.flush()
+        db.session.add(_build_course_progress(student_id, course.id))
+        db.session.flush()
+
+    if course.degree_id:
+        refresh_enrolment_progress(course.degree_id, student_id=student_id)
+
+def record_section_added(section):
+    """Call after a new LessonSection has been added (and flushed) to a lesson."""
+    course = _course_for_lesson(section.lesson_id)
+    if not course:
+        return
+
+    db.session.execute(
+        update(CourseProgress)
+        .where(CourseProgress.course_id == course.id)
+        .values(total_sections=CourseProgress.total_sections + 1, updated_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    if course.degree_id:
+        refresh_enrolment_progress(course.degree_id)
+
+def remove_section_progress(lesson_id, section_ids):
+    """Delete SectionProgress rows of sections about to be removed and adjust the aggregates.
+
+    Must run before the sections themselves are deleted.
+    """
+    section_ids = list(section_ids)
+    if not section_ids:
+        return
+
+    course = _course_for_lesson(lesson_id)
+    if course:
+        removed_for_student = (
+            select(func.count(SectionProgress.id))
+            .where(
+                SectionProgress.student_id == CourseProgress.student_id,
+                SectionProgress.section_id.in_(section_ids)
+            )
+            .scalar_subquery()
+        )
+        db.session.execute(
+            update(CourseProgress)
+            .where(CourseProgress.course_id == course.id)
+            .values(
+                completed_sections=CourseProgress.completed_sections - removed_for_student,
+                total_sections=CourseProgress.total_sections - len(section_ids),
+                updated_at=datetime.utcnow()
+            ),
+            execution_options={"synchronize_session": False}
+        )
+
+    remove_section_stats(section_ids)
+    SectionProgress.query.filter(SectionProgress.section_id.in_(section_ids)).delete(synchronize_session=False)
+
+    if course and course.degree_id:
+        refresh_enrolment_progress(course.degree_id, exclude_section_ids=section_ids)
+
+def get_course_progress_map(student_id, course_ids):
+    """Return {course_id: percentage} for the given courses in a single query."""
+    course_ids = list(course_ids)
+    if not course_ids:
+        return {}
+
+    rows = CourseProgress.query.filter(
+        CourseProgress.student_id == student_id,
+        CourseProgress.course_id.in_(course_ids)
+    ).all()
+
+    return {row.course_id: row.percentage for row in rows}
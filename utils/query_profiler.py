@@ -0,0 +1,157 @@
+import re
+import threading
+import time
+from collections import Counter
+from flask import g, request, jsonify, has_request_context
+from sqlalchemy import event
+
+from models import db
+
+# Counts SQL statements and DB time per Flask request, attributes them to the
+# endpoint and flags statement shapes that repeat within one request (N+1).
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAM = r"(?:\?|%s|%\(\w+\)s|:\w+|-?\d+(?:\.\d+)?|'[^']*')"
+_VALUE_LIST = re.compile(r"\(\s*" + _PARAM + r"(?:\s*,\s*" + _PARAM + r")*\s*\)")
+
+_lock = threading.Lock()
+_endpoint_stats = {}
+
+def statement_shape(statement):
+    """Normalise a statement so that calls differing only in parameters compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _VALUE_LIST.sub("(?)", shape)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_profiler_start", []).append(time.perf_counter())
+    if context is not None:
+        context._query_profiler_pending = True
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_profiler_start")
+    elapsed = time.perf_counter() - started.pop() if started else 0.0
+    if context is not None:
+        context._query_profiler_pending = False
+
+    if not has_request_context():
+        return
+    profile = g.get("query_profile")
+    if profile is None:
+        return
+
+    profile["count"] += 1
+    profile["db_time"] += elapsed
+    profile["shapes"][statement_shape(statement)] += 1
+
+def _handle_error(exception_context):
+    # after_cursor_execute never runs for a failed statement; drop its start time
+    conn = exception_context.connection
+    context = exception_context.execution_context
+    if conn is None or not getattr(context, "_query_profiler_pending", False):
+        return
+    context._query_profiler_pending = False
+    started = conn.info.get("query_profiler_start")
+    if started:
+        started.pop()
+
+def get_request_profile():
+    """Current request's profile: {"count", "db_time", "shapes"} or None."""
+    return g.get("query_profile") if has_request_context() else None
+
+def _suspected_n_plus_one(profile, threshold):
+    return {shape: hits for shape, hits in profile["shapes"].items() if hits >= threshold}
+
+def _record(endpoint, profile, suspects):
+    with _lock:
+        stats = _endpoint_stats.setdefault(endpoint, {
+            "requests": 0,
+            "queries": 0,
+            "max_queries": 0,
+            "db_time": 0.0,
+            "n_plus_one_requests": 0,
+            "suspects": Counter(),
+        })
+        stats["requests"] += 1
+        stats["queries"] += profile["count"]
+        stats["max_queries"] = max(stats["max_queries"], profile["count"])
+        stats["db_time"] += profile["db_time"]
+        if suspects:
+            stats["n_plus_one_requests"] += 1
+            stats["suspects"].update(suspects)
+
+def get_endpoint_summary():
+    with _lock:
+        summary = {}
+        for endpoint, stats in _endpoint_stats.items():
+            requests_seen = stats["requests"] or 1
+            summary[endpoint] = {
+                "requests": stats["requests"],
+                "total_queries": stats["queries"],
+                "avg_queries": round(stats["queries"] / requests_seen, 2),
+                "max_queries": stats["max_queries"],
+                "total_db_ms": round(stats["db_time"] * 1000, 2),
+                "avg_db_ms": round(stats["db_time"] * 1000 / requests_seen, 2),
+                "n_plus_one_requests": stats["n_plus_one_requests"],
+                "top_repeated_statements": [
+                    {"statement": shape[:300], "hits": hits}
+                    for shape, hits in stats["suspects"].most_common(5)
+                ],
+            }
+        return summary
+
+def reset_endpoint_summary():
+    with _lock:
+        _endpoint_stats.clear()
+
+def init_query_profiler(app):
+    if not app.config.get("QUERY_PROFILER_ENABLED", False):
+        return
+
+    threshold = app.config.get("N_PLUS_ONE_THRESHOLD", 5)
+    add_headers = app.config.get("QUERY_PROFILER_HEADERS", False)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db.engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(db.engine, "handle_error", _handle_error)
+
+    @app.before_request
+    def start_query_profile():
+        g.query_profile = {"count": 0, "db_time": 0.0, "shapes": Counter()}
+
+    @app.after_request
+    def finish_query_profile(response):
+        profile = g.pop("query_profile", None)
+        if profile is None:
+            return response
+
+        suspects = _suspected_n_plus_one(profile, threshold)
+        endpoint = request.endpoint or "<unmatched>"
+        _record(endpoint, profile, suspects)
+
+        if suspects:
+            app.logger.warning(
+                "Possible N+1 in %s: %d queries, repeated statements: %s",
+                endpoint, profile["count"], list(suspects.values())
+            )
+
+        if add_headers:
+            response.headers["X-DB-Query-Count"] = str(profile["count"])
+            response.headers["X-DB-Time-Ms"] = f"{profile['db_time'] * 1000:.2f}"
+            response.headers["X-DB-N-Plus-One"] = str(len(suspects))
+        return response
+
+    def query_metrics():
+        token = app.config.get("QUERY_METRICS_TOKEN")
+        if token:
+            if request.headers.get("Authorization") != f"Bearer {token}":
+                return jsonify({"error": "Unauthorized"}), 401
+        elif not (app.debug or app.testing):
+            return jsonify({"error": "Unauthorized"}), 403
+
+        summary = get_endpoint_summary()
+        if request.args.get("reset") == "1":
+            reset_endpoint_summary()
+        return jsonify(summary), 200
+
+    app.add_url_rule("/api/metrics/queries", "query_metrics", query_metrics, methods=["GET"])
@@ -0,0 +1,188 @@
+import csv
+import io
+import json
+from sqlalchemy import insert, select
+
+from models import db
+from models.quiz_questions import QuizQuestion
+from utils.lesson_cache import bump_lessons_for_quiz
+from utils.quiz_grading import invalidate_answer_key
+from utils.quiz_payload import invalidate_quiz_payload
+from utils.quiz_analytics import invalidate_quiz_analytics
+
+# Question banks in and out of a quiz as CSV or JSON Lines. Both directions
+# stream: import parses and validates row by row and inserts in multi-row
+# INSERTs, committing once per chunk along with the quiz's cache invalidations;
+# export pages through the quiz's questions by id. Columns: question_text,
+# question_type, options, correct_answer (CSV options are a JSON array or
+# "|"-separated).
+
+FORMATS = ("csv", "jsonl")
+FIELDS = ("question_text", "question_type", "options", "correct_answer")
+MAX_REPORTED_ERRORS = 1000
+
+_TYPES = {
+    "short_answer": "short_answer",
+    "short": "short_answer",
+    "multiple_choice": "multiple_choice",
+    "mcq": "multiple_choice",
+}
+
+class QuestionRowError(ValueError):
+    pass
+
+def detect_format(filename, default="csv"):
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    return default
+
+def _parse_options(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("["):
+            try:
+                options = json.loads(value)
+            except ValueError:
+                raise QuestionRowError("options is not a valid JSON array")
+            if not isinstance(options, list):
+                raise QuestionRowError("options must be a list")
+            return options
+        return [option.strip() for option in value.split("|") if option.strip()]
+    raise QuestionRowError("options must be a list")
+
+def validate_question(row):
+    """Return QuizQuestion column values for one input row; raises QuestionRowError."""
+    question_text = (row.get("question_text") or "").strip()
+    correct_answer = row.get("correct_answer")
+    question_type = _TYPES.get(str(row.get("question_type") or "").strip().lower())
+
+    if not question_text:
+        raise QuestionRowError("question_text is required")
+    if correct_answer is None or str(correct_answer).strip() == "":
+        raise QuestionRowError("correct_answer is required")
+    if question_type is None:
+        raise QuestionRowError("question_type must be short_answer or multiple_choice")
+
+    options = _parse_options(row.get("options"))
+    if question_type == "multiple_choice":
+        if not options or len(options) < 2:
+            raise QuestionRowError("Multiple-choice questions need at least two options")
+    else:
+        options = None
+
+    return {
+        "question_text": question_text,
+        "question_type": question_type,
+        "options": options,
+        "correct_answer": str(correct_answer),
+    }
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict) from a text stream; malformed JSON lines yield an error string."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, "Invalid JSON"
+            continue
+        yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+def import_questions(quiz_id, stream, fmt="csv", chunk_size=500):
+    """Append the questions in `stream` to a quiz, committing once per chunk.
+
+    Invalid rows are skipped and reported; chunks already committed stay in
+    place if a later one fails, and the failing chunk is rolled back before
+    the error propagates. `imported` counts committed rows only.
+    """
+    imported = 0
+    error_count = 0
+    errors = []
+    batch = []
+
+    def flush():
+        nonlocal imported
+        db.session.execute(insert(QuizQuestion), batch)
+        bump_lessons_for_quiz(quiz_id)
+        invalidate_answer_key(quiz_id)
+        invalidate_quiz_payload(quiz_id)
+        invalidate_quiz_analytics(quiz_id)
+        db.session.commit()
+        imported += len(batch)
+        batch.clear()
+
+    try:
+        for line_number, row in read_rows(stream, fmt):
+            try:
+                if isinstance(row, str):
+                    raise QuestionRowError(row)
+                values = validate_question(row)
+            except QuestionRowError as e:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"line": line_number, "error": str(e)})
+                continue
+
+            batch.append({"quiz_id": quiz_id, **values})
+            if len(batch) >= chunk_size:
+                flush()
+
+        if batch:
+            flush()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"imported": imported, "error_count": error_count, "errors": errors}
+
+def _question_pages(quiz_id, chunk_size):
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(QuizQuestion.id, *(getattr(QuizQuestion, field) for field in FIELDS))
+            .where(QuizQuestion.quiz_id == quiz_id, QuizQuestion.id > last_id)
+            .order_by(QuizQuestion.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+def export_questions(quiz_id, fmt="csv", chunk_size=500):
+    """Yield the quiz's questions as CSV or JSON Lines text, a page at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(FIELDS)
+
+    for rows in _question_pages(quiz_id, chunk_size):
+        for row in rows:
+            if writer:
+                writer.writerow([
+                    row.question_text,
+                    row.question_type,
+                    json.dumps(row.options) if row.options else "",
+                    row.correct_answer,
+                ])
+            else:
+                buffer.write(json.dumps({field: getattr(row, field) for field in FIELDS}) + "\n")
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
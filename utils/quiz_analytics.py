@@ -0,0 +1,175 @@
+import numpy as np
+from flask import current_app
+from sqlalchemy import func
+
+from models import db
+from models.quiz_attempts import QuizAttempt
+from models.quiz_attempts_answers import QuizAttemptAnswer
+from models.quiz_questions import QuizQuestion
+from utils.cache import TTLCache
+from utils.cache_versions import bump_cache_version, get_cache_versions
+from utils.quiz_grading import normalize_answer
+
+# Classical item analysis for one quiz, computed with NumPy from a single bulk
+# fetch of quiz_attempt_answers. Results are cached under
+# (quiz_id, latest attempt id, cache version), so a new attempt produces a new
+# key; regrades and question edits bump the quiz's cache_versions entry.
+
+_analytics = TTLCache(maxsize=256, ttl=3600)
+
+HISTOGRAM_BINS = 10
+
+def invalidate_quiz_analytics(quiz_id):
+    """Call before committing the change, in the same transaction."""
+    bump_cache_version(f"quiz_analytics:{quiz_id}")
+
+def _rounded(value, places=4):
+    value = float(value)
+    return None if np.isnan(value) else round(value, places)
+
+def _score_summary(scores):
+    if not scores.size:
+        return {"mean": None, "median": None, "std": None, "min": None, "max": None}
+    return {
+        "mean": _rounded(scores.mean(), 2),
+        "median": _rounded(np.median(scores), 2),
+        "std": _rounded(scores.std(), 2),
+        "min": _rounded(scores.min(), 2),
+        "max": _rounded(scores.max(), 2),
+    }
+
+def _histogram(scores):
+    counts, edges = np.histogram(scores, bins=HISTOGRAM_BINS, range=(0, 100))
+    return [
+        {"from": float(edges[i]), "to": float(edges[i + 1]), "count": int(counts[i])}
+        for i in range(len(counts))
+    ]
+
+def _item_statistics(correct, answered):
+    """p-value and point-biserial (item vs rest score) per question column.
+
+    correct / answered are (attempts x questions) 0/1 matrices; questions an
+    attempt has no stored answer for are left out of that column's statistics.
+    """
+    responses = answered.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p_values = correct.sum(axis=0) / responses
+
+        rest = correct.sum(axis=1, keepdims=True) - correct
+        item_mean = (answered * correct).sum(axis=0) / responses
+        rest_mean = (answered * rest).sum(axis=0) / responses
+        item_dev = (correct - item_mean) * answered
+        rest_dev = (rest - rest_mean) * answered
+        covariance = (item_dev * rest_dev).sum(axis=0)
+        spread = np.sqrt((item_dev ** 2).sum(axis=0) * (rest_dev ** 2).sum(axis=0))
+        point_biserial = np.where(spread > 0, covariance / spread, np.nan)
+
+    return responses, p_values, point_biserial
+
+def _distractors(question, answers_column, answered_column):
+    options = question.options or []
+    normalized_options = np.array([normalize_answer(option) for option in options], dtype=object)
+    given = answers_column[answered_column.astype(bool)]
+    values, counts = np.unique(given.astype(str), return_counts=True) if given.size else ([], [])
+    tally = dict(zip(values, counts))
+    correct_answer = normalize_answer(question.correct_answer)
+    total = given.size
+
+    distractors = []
+    for option, normalized in zip(options, normalized_options):
+        count = int(tally.pop(normalized, 0))
+        distractors.append({
+            "option": option,
+            "count": count,
+            "share": round(count / total, 4) if total else None,
+            "is_correct": normalized == correct_answer,
+        })
+
+    unanswered = int(tally.pop("", 0))
+    other = int(sum(tally.values()))
+    return {"options": distractors, "no_answer": unanswered, "other": other}
+
+def _build_analytics(quiz_id, latest_attempt_id):
+    questions = (
+        QuizQuestion.query
+        .filter_by(quiz_id=quiz_id)
+        .order_by(QuizQuestion.id)
+        .all()
+    )
+    rows = (
+        db.session.query(
+            QuizAttempt.id,
+            QuizAttempt.score,
+            QuizAttemptAnswer.question_id,
+            QuizAttemptAnswer.answer_text,
+            QuizAttemptAnswer.is_correct,
+        )
+        .outerjoin(QuizAttemptAnswer, QuizAttemptAnswer.attempt_id == QuizAttempt.id)
+        .filter(QuizAttempt.quiz_id == quiz_id)
+        .all()
+    )
+
+    question_ids = np.array([question.id for question in questions], dtype=np.int64)
+    if rows:
+        attempt_ids, raw_scores, answer_question_ids, answer_texts, answer_correct = (
+            np.array(column, dtype=object) for column in zip(*rows)
+        )
+    else:
+        attempt_ids = raw_scores = answer_question_ids = answer_texts = answer_correct = np.array([], dtype=object)
+
+    # One matrix row per attempt, one column per current question
+    _, first_seen, attempt_rows = np.unique(attempt_ids.astype(np.int64), return_index=True, return_inverse=True)
+    scores = np.array([score or 0 for score in raw_scores[first_seen]], dtype=float)
+
+    has_answer = np.array([qid is not None for qid in answer_question_ids], dtype=bool)
+    answer_qids = np.where(has_answer, answer_question_ids, -1).astype(np.int64)
+    columns = np.searchsorted(question_ids, answer_qids)
+    known = has_answer & (columns < question_ids.size)
+    known[known] = question_ids[columns[known]] == answer_qids[known]
+
+    shape = (first_seen.size, question_ids.size)
+    correct = np.zeros(shape)
+    answered = np.zeros(shape)
+    answers = np.full(shape, "", dtype=object)
+    answered[attempt_rows[known], columns[known]] = 1
+    correct[attempt_rows[known], columns[known]] = answer_correct[known].astype(bool)
+    answers[attempt_rows[known], columns[known]] = [text or "" for text in answer_texts[known]]
+
+    responses, p_values, point_biserial = _item_statistics(correct, answered)
+
+    question_stats = []
+    for position, question in enumerate(questions):
+        question_stats.append({
+            "question_id": question.id,
+            "question_text": question.question_text,
+            "question_type": question.question_type,
+            "responses": int(responses[position]),
+            "p_value": _rounded(p_values[position]),
+            "point_biserial": _rounded(point_biserial[position]),
+            "distractors": (
+                _distractors(question, answers[:, position], answered[:, position])
+                if question.question_type == "multiple_choice" else None
+            ),
+        })
+
+    return {
+        "quiz_id": quiz_id,
+        "latest_attempt_id": latest_attempt_id,
+        "attempt_count": len(scores),
+        "score_summary": _score_summary(scores),
+        "histogram": _histogram(scores),
+        "questions": question_stats,
+    }
+
+def get_quiz_analytics(quiz_id):
+    latest_attempt_id = (
+        db.session.query(func.max(QuizAttempt.id))
+        .filter(QuizAttempt.quiz_id == quiz_id)
+        .scalar()
+    )
+    ttl = current_app.config.get("QUIZ_ANALYTICS_CACHE_TTL")
+    return _analytics.get_or_set(
+        (quiz_id, latest_attempt_id, *get_cache_versions(f"quiz_analytics:{quiz_id}")),
+        lambda: _build_analytics(quiz_id, latest_attempt_id),
+        ttl=ttl
+    )
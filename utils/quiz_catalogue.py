@@ -0,0 +1,149 @@
+from flask import current_app
+from sqlalchemy import select, func
+
+from models import db
+from models.courses import Course
+from models.course_lessons import Lesson
+from models.lesson_section import LessonSection
+from models.quizzes import Quiz
+from models.quiz_attempts import QuizAttempt
+from models.quiz_attempt_counter import QuizAttemptCounter
+from models.enrolments import Enrolment
+from utils.cache import TTLCache
+from utils.cache_versions import bump_cache_version, get_cache_versions
+
+# course -> lesson -> section -> quiz tree per degree, shared by every student
+# of that degree. Trees are cached under the global "quiz_catalogue" and
+# per-degree versions (utils/cache_versions.py); the invalidate_* helpers bump
+# them in the transaction that changes sections referencing quizzes (or the
+# quizzes themselves).
+
+_degree_quiz_trees = TTLCache(maxsize=256, ttl=600)
+
+def _build_degree_quiz_tree(degree_id):
+    rows = (
+        db.session.query(
+            Course.id.label("course_id"),
+            Course.title.label("course_title"),
+            Lesson.id.label("lesson_id"),
+            Lesson.title.label("lesson_title"),
+            LessonSection.id.label("section_id"),
+            LessonSection.title.label("section_title"),
+            Quiz.id.label("quiz_id"),
+            Quiz.title.label("quiz_title"),
+            Quiz.deadline,
+            Quiz.max_attempts,
+            Quiz.passing_score,
+        )
+        .select_from(Course)
+        .join(Lesson, Lesson.course_id == Course.id)
+        .join(LessonSection, LessonSection.lesson_id == Lesson.id)
+        .join(Quiz, Quiz.id == LessonSection.quiz_id)
+        .filter(Course.degree_id == degree_id)
+        .order_by(Course.id, Lesson.id, LessonSection.order, LessonSection.id)
+        .all()
+    )
+
+    tree = {}
+    for row in rows:
+        course = tree.setdefault(row.course_id, {
+            "course_id": row.course_id,
+            "course_name": row.course_title,
+            "lessons": {}
+        })
+        lesson = course["lessons"].setdefault(row.lesson_id, {
+            "lesson_id": row.lesson_id,
+            "lesson_title": row.lesson_title,
+            "sections": {}
+        })
+        section = lesson["sections"].setdefault(row.section_id, {
+            "section_id": row.section_id,
+            "section_title": row.section_title,
+            "quizzes": []
+        })
+        section["quizzes"].append({
+            "quiz_id": row.quiz_id,
+            "title": row.quiz_title,
+            "deadline": row.deadline,
+            "max_attempts": row.max_attempts,
+            "passing_score": row.passing_score
+        })
+
+    return tree
+
+def get_degree_quiz_tree(degree_id):
+    ttl = current_app.config.get("QUIZ_CATALOGUE_CACHE_TTL")
+    key = (degree_id, *get_cache_versions("quiz_catalogue", f"quiz_catalogue:{degree_id}"))
+    return _degree_quiz_trees.get_or_set(key, lambda: _build_degree_quiz_tree(degree_id), ttl=ttl)
+
+def invalidate_degree_quizzes(degree_id=None):
+    """Invalidate one degree's tree, or every degree's when degree_id is None.
+
+    Call before committing the change, in the same transaction.
+    """
+    bump_cache_version("quiz_catalogue" if degree_id is None else f"quiz_catalogue:{degree_id}")
+
+def invalidate_course_quizzes(course_id):
+    degree_id = db.session.query(Course.degree_id).filter(Course.id == course_id).scalar()
+    if degree_id is not None:
+        invalidate_degree_quizzes(degree_id)
+
+def _student_quiz_stats(student_id, quiz_ids):
+    if not quiz_ids:
+        return {}
+
+    # Attempts used come from the attempt counter, so queued submissions not
+    # written yet count too
+    best_score = select(func.max(QuizAttempt.score)).where(
+        QuizAttempt.student_id == student_id,
+        QuizAttempt.quiz_id == QuizAttemptCounter.quiz_id
+    ).scalar_subquery()
+    rows = (
+        db.session.query(QuizAttemptCounter.quiz_id, QuizAttemptCounter.attempts_used, best_score)
+        .filter(QuizAttemptCounter.student_id == student_id, QuizAttemptCounter.quiz_id.in_(quiz_ids))
+        .all()
+    )
+    return {quiz_id: (attempts, best_score) for quiz_id, attempts, best_score in rows}
+
+def get_student_quiz_catalogue(student_id):
+    """Quizzes of the student's enrolled degrees, annotated with attempts left and best score."""
+    degree_ids = [
+        row.degree_id for row in
+        db.session.query(Enrolment.degree_id).filter(Enrolment.student_id == student_id).distinct()
+    ]
+
+    courses = []
+    for degree_id in degree_ids:
+        courses.extend(get_degree_quiz_tree(degree_id).values())
+
+    quiz_ids = {
+        quiz["quiz_id"]
+        for course in courses
+        for lesson in course["lessons"].values()
+        for section in lesson["sections"].values()
+        for quiz in section["quizzes"]
+    }
+    stats = _student_quiz_stats(student_id, quiz_ids)
+
+    # Cached trees are shared, so copy while annotating
+    catalogue = []
+    for course in courses:
+        lessons = {}
+        for lesson_id, lesson in course["lessons"].items():
+            sections = {}
+            for section_id, section in lesson["sections"].items():
+                quizzes = []
+                for quiz in section["quizzes"]:
+                    attempts_used, best_score = stats.get(quiz["quiz_id"], (0, None))
+                    max_attempts = quiz["max_attempts"]
+                    quizzes.append({
+                        **quiz,
+                        "attempts_used": attempts_used,
+                        "attempts_left": None if max_attempts is None else max(0, max_attempts - attempts_used),
+                        "best_score": best_score
+                    })
+                sections[section_id] = {**section, "quizzes": quizzes}
+            lessons[lesson_id] = {**lesson, "sections": sections}
+        catalogue.append({**course, "lessons": lessons})
+
+    return catalogue
@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from flask import current_app
+
+from utils.cache import TTLCache
+from utils.cache_versions import bump_cache_version, get_cache_versions
+
+# Each quiz is compiled once into an immutable AnswerKey (normalised correct
+# answers, submission keys, passing threshold) and cached per process under the
+# quiz's "answer_key:<id>" version (utils/cache_versions.py). Grading a
+# submission then costs one version lookup and pure Python. Lecturer edits to a
+# quiz or its questions call invalidate_answer_key before committing.
+
+_answer_keys = TTLCache(maxsize=1024, ttl=600)
+
+# Older clients submit answers as "mcq-<id>" / "short-<id>"
+_KEY_ALIASES = {
+    "multiple_choice": "mcq",
+    "short_answer": "short",
+}
+
+def normalize_answer(value):
+    if value is None:
+        return ""
+    return str(value).strip().lower()
+
+@dataclass(frozen=True)
+class QuestionKey:
+    question_id: int
+    question_type: str
+    question_text: str
+    correct_answer: str
+    keys: tuple  # canonical "<question_type>-<id>" first, then aliases
+
+    @property
+    def key(self):
+        return self.keys[0]
+
+@dataclass(frozen=True)
+class AnswerKey:
+    quiz_id: int
+    passing_score: float
+    questions: tuple
+
+    @property
+    def total_questions(self):
+        return len(self.questions)
+
+@dataclass(frozen=True)
+class GradeResult:
+    correct: int
+    total: int
+    percentage: float
+    passed: bool
+    needs_review: bool
+    feedback: tuple
+    answers: tuple  # (question_id, submitted answer, is_correct) per question
+
+    def to_dict(self):
+        """JSON-safe form, for results that are stored before they are written out."""
+        return {
+            "correct": self.correct,
+            "total": self.total,
+            "percentage": self.percentage,
+            "passed": self.passed,
+            "needs_review": self.needs_review,
+            "feedback": list(self.feedback),
+            "answers": [list(answer) for answer in self.answers],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            correct=data["correct"],
+            total=data["total"],
+            percentage=data["percentage"],
+            passed=data["passed"],
+            needs_review=data["needs_review"],
+            feedback=tuple(data["feedback"]),
+            answers=tuple(tuple(answer) for answer in data["answers"])
+        )
+
+def compile_answer_key(quiz):
+    questions = []
+    for question in sorted(quiz.questions, key=lambda q: q.id):
+        keys = [f"{question.question_type}-{question.id}"]
+        alias = _KEY_ALIASES.get(question.question_type)
+        if alias:
+            keys.append(f"{alias}-{question.id}")
+        questions.append(QuestionKey(
+            question_id=question.id,
+            question_type=question.question_type,
+            question_text=question.question_text,
+            correct_answer=normalize_answer(question.correct_answer),
+            keys=tuple(keys)
+        ))
+
+    return AnswerKey(
+        quiz_id=quiz.id,
+        passing_score=quiz.passing_score if quiz.passing_score is not None else 0,
+        questions=tuple(questions)
+    )
+
+def get_answer_key(quiz):
+    ttl = current_app.config.get("QUIZ_ANSWER_KEY_CACHE_TTL")
+    key = (quiz.id, *get_cache_versions(f"answer_key:{quiz.id}"))
+    return _answer_keys.get_or_set(key, lambda: compile_answer_key(quiz), ttl=ttl)
+
+def invalidate_answer_key(quiz_id):
+    """Call in the transaction that changes the quiz or its questions."""
+    bump_cache_version(f"answer_key:{quiz_id}")
+
+def _submitted_answer(answers, question):
+    for key in question.keys:
+        if key in answers:
+            return normalize_answer(answers[key])
+    return ""
+
+def grade(answer_key, answers):
+    """Grade a {question key: answer} mapping against a compiled AnswerKey."""
+    correct = 0
+    feedback = []
+    graded = []
+
+    for question in answer_key.questions:
+        submitted = _submitted_answer(answers, question)
+        is_correct = submitted == question.correct_answer
+        if is_correct:
+            correct += 1
+
+        feedback.append({
+            "question_id": question.key,
+            "question_text": question.question_text,
+            "submitted_answer": submitted or "No Answer",
+            "correct_answer": question.correct_answer,
+            "is_correct": is_correct,
+        })
+        graded.append((question.question_id, submitted, is_correct))
+
+    total = answer_key.total_questions
+    percentage = (correct / total) * 100 if total else 0
+
+    return GradeResult(
+        correct=correct,
+        total=total,
+        percentage=percentage,
+        passed=percentage >= answer_key.passing_score,
+        needs_review=correct < total,
+        feedback=tuple(feedback),
+        answers=tuple(graded)
+    )
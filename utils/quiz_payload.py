@@ -0,0 +1,109 @@
+import random
+from dataclasses import dataclass
+from flask import current_app
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
+
+from models import db
+from models.quizzes import Quiz
+from models.quiz_attempts import QuizAttempt
+from models.quiz_attempt_counter import QuizAttemptCounter
+from utils.cache import TTLCache
+from utils.cache_versions import bump_cache_version, get_cache_versions
+
+# What a student sees of a quiz, built once per quiz and cached per process:
+# quiz settings plus the question list without correct answers. Keys carry the
+# quiz's cache_versions entry; lecturer edits to a quiz or its questions call
+# invalidate_quiz_payload before committing, which bumps it for every worker.
+#
+# When the quiz has randomize_questions set, each student gets a deterministic
+# permutation seeded from (student, quiz, attempt number), so reloading the page
+# during an attempt keeps the order and the next attempt gets a new one.
+
+_payloads = TTLCache(maxsize=1024, ttl=600)
+
+# Question types that carry answer options
+_OPTION_TYPES = {"multiple_choice", "mcq"}
+
+@dataclass(frozen=True)
+class QuizPayload:
+    id: int
+    title: str
+    description: str
+    max_attempts: int
+    time_limit: int
+    randomize_questions: bool
+    passing_score: float
+    deadline: object
+    questions: tuple  # student-safe question dicts, ordered by id
+
+    @property
+    def total_questions(self):
+        return len(self.questions)
+
+def build_quiz_payload(quiz):
+    questions = tuple(
+        {
+            "id": q.id,
+            "question_text": q.question_text,
+            "question_type": q.question_type,
+            "options": q.options if q.question_type in _OPTION_TYPES else None
+        }
+        for q in sorted(quiz.questions, key=lambda q: q.id)
+    )
+    return QuizPayload(
+        id=quiz.id,
+        title=quiz.title,
+        description=quiz.description,
+        max_attempts=quiz.max_attempts,
+        time_limit=quiz.time_limit,
+        randomize_questions=bool(quiz.randomize_questions),
+        passing_score=quiz.passing_score,
+        deadline=quiz.deadline,
+        questions=questions
+    )
+
+def _load_quiz_payload(quiz_id):
+    quiz = Quiz.query.options(selectinload(Quiz.questions)).filter_by(id=quiz_id).first()
+    return build_quiz_payload(quiz) if quiz else None
+
+def get_quiz_payload(quiz_id):
+    """Cached QuizPayload for a quiz, or None if it does not exist (misses are not cached)."""
+    key = (quiz_id, *get_cache_versions(f"quiz_payload:{quiz_id}"))
+    payload = _payloads.get(key)
+    if payload is None:
+        payload = _load_quiz_payload(quiz_id)
+        if payload is not None:
+            _payloads.set(key, payload, ttl=current_app.config.get("QUIZ_PAYLOAD_CACHE_TTL"))
+    return payload
+
+def invalidate_quiz_payload(quiz_id):
+    """Call before committing the change, in the same transaction."""
+    bump_cache_version(f"quiz_payload:{quiz_id}")
+
+def get_attempt_summary(student_id, quiz_id):
+    """(attempts used, latest written attempt id) in one query. Attempts used
+    comes from the attempt counter, so queued submissions not written yet count too.
+    """
+    used = select(QuizAttemptCounter.attempts_used).where(
+        QuizAttemptCounter.student_id == student_id,
+        QuizAttemptCounter.quiz_id == quiz_id
+    ).scalar_subquery()
+    latest_id = select(func.max(QuizAttempt.id)).where(
+        QuizAttempt.student_id == student_id,
+        QuizAttempt.quiz_id == quiz_id
+    ).scalar_subquery()
+    used, latest_id = db.session.execute(select(used, latest_id)).one()
+    return used or 0, latest_id
+
+def attempts_left(payload, attempts_used):
+    if payload.max_attempts is None:
+        return None
+    return max(0, payload.max_attempts - attempts_used)
+
+def questions_for_student(payload, student_id, attempt_number):
+    """The cached questions in this student's order for the given attempt."""
+    questions = list(payload.questions)
+    if payload.randomize_questions:
+        random.Random(f"{student_id}:{payload.id}:{attempt_number}").shuffle(questions)
+    return questions
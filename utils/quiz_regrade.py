@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update, delete, and_, or_
+
+from models import db
+from models.quizzes import Quiz
+from models.quiz_attempts import QuizAttempt
+from models.quiz_regrade_job import QuizRegradeJob
+from utils.background import PeriodicWorker, start_on_first_request
+from utils.quiz_grading import compile_answer_key, grade
+from utils.attempt_answers import replace_attempt_answers
+from utils.quiz_analytics import invalidate_quiz_analytics
+from utils.badge_service import evaluate_badges
+from utils.student_stats import bump_stats
+
+# Re-scores every stored attempt of a quiz against its current answer key.
+# Attempts are read in keyset pages on the session's own connection (a cursor
+# held open across the per-chunk commits would not survive them). Each chunk
+# is written back with one executemany UPDATE by primary key plus one
+# DELETE/INSERT pair for its quiz_attempt_answers rows, then committed, so
+# memory use is bounded by chunk_size regardless of how many attempts the quiz
+# has.
+#
+# Regrades requested over HTTP are queued in quiz_regrade_jobs and run by a
+# background worker; a job is claimed with a conditional UPDATE, and a job left
+# "running" by a crashed worker is picked up again after
+# QUIZ_REGRADE_STALE_AFTER seconds (regrading is idempotent).
+
+def _attempt_chunks(quiz_id, chunk_size):
+    stmt = (
+        select(QuizAttempt.id, QuizAttempt.student_id, QuizAttempt.score,
+               QuizAttempt.pass_status, QuizAttempt.needs_review, QuizAttempt.answers_temp)
+        .where(QuizAttempt.quiz_id == quiz_id)
+        .order_by(QuizAttempt.id)
+    )
+
+    last_id = 0
+    while True:
+        rows = db.session.execute(stmt.where(QuizAttempt.id > last_id).limit(chunk_size)).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+def submitted_answers(feedback):
+    """Rebuild the {question key: answer} mapping from a stored answers_temp blob."""
+    answers = {}
+    for entry in feedback or []:
+        submitted = entry.get("submitted_answer")
+        answers[entry.get("question_id")] = "" if submitted == "No Answer" else submitted
+    return answers
+
+def regrade_quiz(quiz_id, chunk_size=500):
+    """Regrade all attempts of a quiz. Returns a summary dict, or None if the quiz does not exist."""
+    quiz = Quiz.query.get(quiz_id)
+    if not quiz:
+        return None
+
+    answer_key = compile_answer_key(quiz)
+
+    scanned = 0
+    updated = 0
+    flipped = set()  # students with an attempt whose pass status changed
+
+    for rows in _attempt_chunks(quiz_id, chunk_size):
+        changes = []
+        regraded = {}
+        deltas = {}
+        for row in rows:
+            scanned += 1
+            result = grade(answer_key, submitted_answers(row.answers_temp))
+            feedback = list(result.feedback)
+
+            if (row.score == result.percentage and row.pass_status == result.passed
+                    and row.needs_review == result.needs_review and row.answers_temp == feedback):
+                continue
+
+            changes.append({
+                "id": row.id,
+                "score": result.percentage,
+                "pass_status": result.passed,
+                "needs_review": result.needs_review,
+                "answers_temp": feedback,
+            })
+            regraded[row.id] = result
+            counters = deltas.setdefault(row.student_id, {"quizzes_passed": 0, "perfect_scores": 0})
+            counters["quizzes_passed"] += int(result.passed) - int(bool(row.pass_status))
+            counters["perfect_scores"] += int(result.percentage >= 100) - int((row.score or 0) >= 100)
+            if bool(row.pass_status) != result.passed:
+                flipped.add(row.student_id)
+
+        if changes:
+            db.session.execute(update(QuizAttempt), changes)
+            replace_attempt_answers(regraded)
+            bump_stats(deltas)
+            db.session.commit()
+            updated += len(changes)
+
+    invalidate_quiz_analytics(quiz_id)
+
+    new_badges = evaluate_badges(flipped)
+    db.session.commit()
+    badges_awarded = sum(len(badges) for badges in new_badges.values())
+
+    return {
+        "quiz_id": quiz_id,
+        "attempts_scanned": scanned,
+        "attempts_updated": updated,
+        "students_flipped": len(flipped),
+        "badges_awarded": badges_awarded,
+    }
+
+def request_regrade(quiz_id, requested_by=None):
+    """Queue a regrade, or return the one already waiting for this quiz. Does not commit."""
+    job = (
+        QuizRegradeJob.query
+        .filter(QuizRegradeJob.quiz_id == quiz_id, QuizRegradeJob.status == "pending")
+        .order_by(QuizRegradeJob.id)
+        .first()
+    )
+    if job is None:
+        job = QuizRegradeJob(quiz_id=quiz_id, requested_by=requested_by, status="pending")
+        db.session.add(job)
+        db.session.flush()
+    return job
+
+def delete_regrade_jobs(quiz_id):
+    """Delete a quiz's regrade jobs, before the quiz itself. Does not commit."""
+    db.session.execute(
+        delete(QuizRegradeJob).where(QuizRegradeJob.quiz_id == quiz_id),
+        execution_options={"synchronize_session": False}
+    )
+
+def _claim_job():
+    """Claim the oldest runnable job and commit the claim. Returns its id, or None."""
+    stale_before = datetime.utcnow() - timedelta(seconds=current_app.config.get("QUIZ_REGRADE_STALE_AFTER", 3600))
+    runnable = or_(
+        QuizRegradeJob.status == "pending",
+        and_(QuizRegradeJob.status == "running", QuizRegradeJob.started_at < stale_before)
+    )
+    while True:
+        job_id = db.session.execute(
+            select(QuizRegradeJob.id).where(runnable).order_by(QuizRegradeJob.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+        claimed = db.session.execute(
+            update(QuizRegradeJob)
+            .where(QuizRegradeJob.id == job_id, runnable)
+            .values(status="running", started_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return job_id
+
+def _finish_job(job_id, **values):
+    db.session.execute(
+        update(QuizRegradeJob)
+        .where(QuizRegradeJob.id == job_id)
+        .values(finished_at=datetime.utcnow(), **values),
+        execution_options={"synchronize_session": False}
+    )
+    db.session.commit()
+
+def process_regrade_jobs(chunk_size=500):
+    """Run queued regrades one after another. Returns {"done", "failed"}."""
+    done = 0
+    failed = 0
+
+    while True:
+        job_id = _claim_job()
+        if job_id is None:
+            break
+        quiz_id = db.session.get(QuizRegradeJob, job_id).quiz_id
+        try:
+            summary = regrade_quiz(quiz_id, chunk_size=chunk_size)
+        except Exception as e:
+            current_app.logger.exception("Regrade job %s for quiz %s failed", job_id, quiz_id)
+            db.session.rollback()
+            _finish_job(job_id, status="failed", error=str(e)[:255])
+            failed += 1
+            continue
+        if summary is None:
+            _finish_job(job_id, status="failed", error="Quiz not found")
+            failed += 1
+        else:
+            _finish_job(job_id, status="done", summary=summary)
+            done += 1
+
+    return {"done": done, "failed": failed}
+
+def _background_tick():
+    process_regrade_jobs(current_app.config.get("QUIZ_REGRADE_CHUNK", 500))
+
+def init_regrade_worker(app):
+    if not app.config.get("QUIZ_REGRADE_WORKER_ENABLED", False):
+        return None
+    worker = PeriodicWorker(app, "quiz-regrader", app.config.get("QUIZ_REGRADE_INTERVAL", 10), _background_tick)
+    return start_on_first_request(app, worker)
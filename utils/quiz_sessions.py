@@ -0,0 +1,311 @@
+import atexit
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update, delete
+
+from models import db
+from models.quizzes import Quiz
+from models.quiz_session import QuizSession
+from utils.background import PeriodicWorker, start_on_first_request
+from utils.quiz_submission import submit_quiz_answers
+from utils.quiz_payload import get_attempt_summary
+
+# Server-side quiz timing. start_quiz opens a QuizSession with a deadline; the
+# client autosaves partial answers; an expired session is graded from its
+# saved answers by the sweeper (or by the student's own late submit).
+#
+# Autosaves are coalesced per worker process: changed answers are buffered in
+# _pending and merged into quiz_sessions.answers (under a row lock, so workers
+# never drop each other's answers) at most once per QUIZ_AUTOSAVE_INTERVAL per
+# session. An autosave that changes nothing is never written. Each process
+# flushes its buffers on its sweeper tick and at exit, and writes through once
+# a session is within the interval of its deadline, so the sweeper of any
+# process grades the latest answers. A crashed worker loses at most one
+# interval of autosaves; the submit request carries the full answers anyway.
+
+_pending = {}  # session_id -> {"student_id", "deadline", "answers", "changes", "saved_at", "touched_at"}
+_lock = threading.Lock()
+
+class QuizSessionError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+def _grace():
+    return timedelta(seconds=current_app.config.get("QUIZ_SESSION_GRACE_SECONDS", 30))
+
+def is_expired(deadline, now=None):
+    return deadline is not None and (now or datetime.utcnow()) > deadline + _grace()
+
+def get_active_session(student_id, quiz_id):
+    return (
+        QuizSession.query
+        .filter_by(student_id=student_id, quiz_id=quiz_id, status="active")
+        .order_by(QuizSession.id.desc())
+        .first()
+    )
+
+def session_answers(session):
+    """The session's answers, including autosaves this process has not written yet."""
+    with _lock:
+        entry = _pending.get(session.id)
+        changes = dict(entry["changes"]) if entry else {}
+    return {**(session.answers or {}), **changes}
+
+def _autosave_interval():
+    return timedelta(seconds=current_app.config.get("QUIZ_AUTOSAVE_INTERVAL", 10))
+
+def start_session(quiz, student_id):
+    """Return the student's running session for the quiz, opening one if needed.
+
+    A session that already ran out is graded first, so reopening the quiz never
+    extends the time limit; the attempts left are counted after that, and
+    QuizSessionError is raised when none remain. `quiz` may be a Quiz or its
+    cached QuizPayload. Does not commit.
+    """
+    session = get_active_session(student_id, quiz.id)
+    if session and is_expired(session.deadline):
+        expire_session(session)
+        session = None
+
+    if session is None:
+        attempts_used, _ = get_attempt_summary(student_id, quiz.id)
+        if quiz.max_attempts is not None and attempts_used >= quiz.max_attempts:
+            raise QuizSessionError("No attempts left", 403)
+
+        started_at = datetime.utcnow()
+        session = QuizSession(
+            student_id=student_id,
+            quiz_id=quiz.id,
+            started_at=started_at,
+            deadline=QuizSession.compute_deadline(quiz, started_at),
+            answers={},
+            status="active"
+        )
+        db.session.add(session)
+        db.session.flush()
+
+    return session
+
+def delete_quiz_sessions(quiz_id):
+    """Remove a quiz's sessions before the quiz itself is deleted. Does not commit."""
+    db.session.execute(
+        delete(QuizSession).where(QuizSession.quiz_id == quiz_id),
+        execution_options={"synchronize_session": False}
+    )
+
+def _load_pending(session_id, student_id):
+    session = db.session.get(QuizSession, session_id)
+    if session is None or session.student_id != student_id:
+        raise QuizSessionError("Quiz session not found", 404)
+    if session.status != "active":
+        raise QuizSessionError("Quiz session is closed", 409)
+    with _lock:
+        return _pending.setdefault(session_id, {
+            "student_id": session.student_id,
+            "deadline": session.deadline,
+            "answers": dict(session.answers or {}),
+            "changes": {},
+            "saved_at": session.saved_at or session.started_at,
+            "touched_at": datetime.utcnow(),
+        })
+
+def autosave_answers(session_id, student_id, answers):
+    """Merge partial answers into the session's buffer, writing it through when due.
+
+    Only the first autosave a process sees for a session reads the row. Does
+    not commit.
+    """
+    with _lock:
+        entry = _pending.get(session_id)
+    if entry is None:
+        entry = _load_pending(session_id, student_id)
+    if entry["student_id"] != student_id:
+        raise QuizSessionError("Quiz session not found", 404)
+    if is_expired(entry["deadline"]):
+        raise QuizSessionError("Quiz time is over", 409)
+
+    now = datetime.utcnow()
+    interval = _autosave_interval()
+    with _lock:
+        changed = {
+            key: value for key, value in answers.items()
+            if key not in entry["answers"] or entry["answers"][key] != value
+        }
+        entry["answers"].update(changed)
+        entry["changes"].update(changed)
+        entry["touched_at"] = now
+        due = bool(entry["changes"]) and (
+            now - entry["saved_at"] >= interval
+            or (entry["deadline"] is not None and now >= entry["deadline"] - interval)
+        )
+
+    if due:
+        flush_autosaves([session_id])
+        with _lock:
+            if session_id not in _pending:
+                raise QuizSessionError("Quiz session is closed", 409)
+
+    with _lock:
+        return {
+            "session_id": session_id,
+            "deadline": entry["deadline"].isoformat() if entry["deadline"] else None,
+            "saved": len(entry["answers"]),
+            "saved_at": entry["saved_at"].isoformat(),
+            "persisted": not entry["changes"],
+        }
+
+def flush_autosaves(session_ids=None):
+    """Merge buffered autosaves into their session rows. Does not commit.
+
+    Rows are locked while merging. Buffers of sessions that were closed
+    elsewhere are dropped, as are idle ones. Returns the number of sessions
+    written.
+    """
+    now = datetime.utcnow()
+    with _lock:
+        ids = list(_pending) if session_ids is None else [i for i in session_ids if i in _pending]
+        changes = {}
+        for session_id in ids:
+            entry = _pending[session_id]
+            if entry["changes"]:
+                changes[session_id] = entry["changes"]
+                entry["changes"] = {}
+            elif now - entry["touched_at"] > timedelta(hours=1):
+                del _pending[session_id]
+
+    if not changes:
+        return 0
+
+    try:
+        sessions = (
+            QuizSession.query
+            .filter(QuizSession.id.in_(list(changes)), QuizSession.status == "active")
+            .with_for_update()
+            .all()
+        )
+        for session in sessions:
+            session.answers = {**(session.answers or {}), **changes[session.id]}
+            session.saved_at = now
+        db.session.flush()
+    except Exception:
+        # Put the answers back under any newer ones so the next flush retries them
+        with _lock:
+            for session_id, buffered in changes.items():
+                if session_id in _pending:
+                    _pending[session_id]["changes"] = {**buffered, **_pending[session_id]["changes"]}
+        raise
+
+    written = {session.id: session for session in sessions}
+    with _lock:
+        for session_id in changes:
+            entry = _pending.get(session_id)
+            if entry is None:
+                continue
+            if session_id in written:
+                entry["answers"] = {**written[session_id].answers, **entry["changes"]}
+                entry["saved_at"] = now
+            else:
+                del _pending[session_id]
+    return len(written)
+
+def claim_session(session, status):
+    """Move an active session to `status` with a conditional UPDATE; False if
+    another request or the sweeper closed it first. Does not commit.
+    """
+    table = QuizSession.__table__
+    return db.session.execute(
+        update(table)
+        .where(table.c.id == session.id, table.c.status == "active")
+        .values(status=status)
+    ).rowcount == 1
+
+def close_session(session, attempt_id, status="submitted"):
+    session.status = status
+    session.attempt_id = attempt_id
+    session.answers = session_answers(session)
+    with _lock:
+        _pending.pop(session.id, None)
+
+def finalize_expired_session(session):
+    """Grade an expired session from its saved answers. Does not commit."""
+    quiz = Quiz.query.get(session.quiz_id)
+    outcome = submit_quiz_answers(
+        quiz, session.student_id, session_answers(session), completed_at=session.deadline
+    ) if quiz else None
+    close_session(session, outcome["attempt"].id if outcome else None, status="expired")
+    return outcome
+
+def expire_session(session):
+    """Claim and grade an expired session; None if it was already closed elsewhere."""
+    if not claim_session(session, "expired"):
+        return None
+    return finalize_expired_session(session)
+
+def sweep_expired_sessions(batch_size=100):
+    """Grade every session past its deadline (plus grace), one transaction per session.
+
+    Sessions are claimed with a conditional UPDATE, so concurrent sweepers (one
+    per worker process, or cron) never grade the same session twice.
+    """
+    flush_autosaves()
+    db.session.commit()
+
+    cutoff = datetime.utcnow() - _grace()
+    graded = 0
+    failed = 0
+    skipped = set()
+
+    while True:
+        query = QuizSession.query.filter(
+            QuizSession.status == "active",
+            QuizSession.deadline.isnot(None),
+            QuizSession.deadline < cutoff
+        )
+        if skipped:
+            query = query.filter(QuizSession.id.notin_(skipped))
+        batch = query.order_by(QuizSession.deadline).limit(batch_size).all()
+        if not batch:
+            break
+
+        for session in batch:
+            if not claim_session(session, "expired"):
+                db.session.rollback()
+                skipped.add(session.id)
+                continue
+            try:
+                finalize_expired_session(session)
+                db.session.commit()
+                graded += 1
+            except Exception:
+                current_app.logger.exception("Could not grade expired quiz session %s", session.id)
+                db.session.rollback()
+                skipped.add(session.id)
+                failed += 1
+
+        if len(batch) < batch_size:
+            break
+
+    return {"graded": graded, "failed": failed}
+
+def _background_tick():
+    sweep_expired_sessions(current_app.config.get("QUIZ_SESSION_SWEEP_BATCH", 100))
+
+def _flush_at_exit(app):
+    with app.app_context():
+        try:
+            flush_autosaves()
+            db.session.commit()
+        except Exception:
+            app.logger.exception("Could not flush quiz autosaves at exit")
+        finally:
+            db.session.remove()
+
+def init_quiz_session_sweeper(app):
+    atexit.register(_flush_at_exit, app)
+    if not app.config.get("QUIZ_SESSION_SWEEPER_ENABLED", False):
+        return None
+    worker = PeriodicWorker(app, "quiz-session-sweeper", app.config.get("QUIZ_SESSION_SWEEP_INTERVAL", 15), _background_tick)
+    return start_on_first_request(app, worker)
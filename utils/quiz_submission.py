@@ -0,0 +1,114 @@
+from datetime import datetime
+from sqlalchemy import insert
+
+from models import db
+from models.quiz_attempts import QuizAttempt
+from models.quiz_attempts_answers import QuizAttemptAnswer
+from models.lesson_section import LessonSection
+from models.section_progress import SectionProgress
+from utils.quiz_grading import get_answer_key, grade
+from utils.attempt_answers import attempt_answer_rows
+from utils.attempt_counter import allocate_attempt
+from utils.progress_service import record_section_completion
+from utils.student_stats import record_attempts
+from utils.activity_service import record_activity, record_section_activity
+from utils.badge_jobs import evaluate_or_defer
+
+# The one place graded quiz submissions are turned into attempts: manual submit,
+# client auto-submit, the expired-session sweeper and the write-behind
+# submission writer (utils/submission_queue.py) all go through here. The write
+# helpers take a list so a batch costs the same number of queries as a single
+# submission. Nothing is committed; the caller owns the transaction.
+
+def write_attempts(graded):
+    """Insert attempts with their answer rows, activity events and stats counters.
+
+    `graded` is a list of (student_id, quiz_id, attempt_number, GradeResult,
+    completed_at); returns the flushed QuizAttempt objects in the same order.
+    """
+    attempts = [
+        QuizAttempt(
+            student_id=student_id,
+            quiz_id=quiz_id,
+            attempts_used=attempt_number,
+            completed_at=completed_at,
+            score=result.percentage,
+            pass_status=result.passed,
+            needs_review=result.needs_review,
+            answers_temp=list(result.feedback),
+        )
+        for student_id, quiz_id, attempt_number, result, completed_at in graded
+    ]
+    db.session.add_all(attempts)
+    db.session.flush()
+    record_attempts(attempts)
+
+    rows = []
+    for attempt, (_, _, _, result, _) in zip(attempts, graded):
+        rows.extend(attempt_answer_rows(attempt.id, result))
+        record_activity(
+            attempt.student_id, "quiz", f"Completed a quiz with score {result.percentage:.0f}%",
+            source_id=attempt.id, occurred_at=attempt.completed_at
+        )
+    if rows:
+        db.session.execute(insert(QuizAttemptAnswer), rows)
+
+    return attempts
+
+def complete_quiz_sections(attempts):
+    """Mark the lesson sections holding these quizzes complete and evaluate badges.
+
+    Returns {student_id: [new badge dicts]} for students whose progress changed.
+    """
+    quiz_ids = {attempt.quiz_id for attempt in attempts}
+    student_ids = {attempt.student_id for attempt in attempts}
+
+    sections = {}
+    for section in LessonSection.query.filter(LessonSection.quiz_id.in_(quiz_ids)).order_by(LessonSection.id):
+        sections.setdefault(section.quiz_id, section)
+    sections = {quiz_id: section for quiz_id, section in sections.items() if section.is_active}
+    if not sections:
+        return {}
+
+    completed = set(
+        db.session.query(SectionProgress.student_id, SectionProgress.section_id)
+        .filter(
+            SectionProgress.student_id.in_(student_ids),
+            SectionProgress.section_id.in_([section.id for section in sections.values()])
+        )
+        .all()
+    )
+
+    progressed = set()
+    for attempt in attempts:
+        section = sections.get(attempt.quiz_id)
+        if section is None or (attempt.student_id, section.id) in completed:
+            continue
+        completed.add((attempt.student_id, section.id))
+
+        progress = SectionProgress(student_id=attempt.student_id, section_id=section.id)
+        db.session.add(progress)
+        record_section_completion(attempt.student_id, section)
+        record_section_activity(progress, section)
+        progressed.add(attempt.student_id)
+
+    # The attempts are flushed, so perfect scores are already in the metrics
+    return evaluate_or_defer(progressed)
+
+def submit_quiz_answers(quiz, student_id, answers, completed_at=None):
+    """Grade and store an attempt.
+
+    Returns {"attempt", "attempts_used", "result", "new_badges"}, or None when
+    the student has no attempts left.
+    """
+    attempt_number = allocate_attempt(student_id, quiz.id, quiz.max_attempts)
+    if attempt_number is None:
+        return None
+
+    result = grade(get_answer_key(quiz), answers or {})
+    attempt, = write_attempts([
+        (student_id, quiz.id, attempt_number, result, completed_at or datetime.utcnow())
+    ])
+    new_badges = complete_quiz_sections([attempt]).get(student_id, [])
+
+    return {"attempt": attempt, "attempts_used": attempt_number, "result": result, "new_badges": new_badges}
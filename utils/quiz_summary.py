@@ -0,0 +1,73 @@
+from sqlalchemy import func
+
+from models import db
+from models.quizzes import Quiz
+from models.quiz_questions import QuizQuestion
+from models.quiz_attempts import QuizAttempt
+
+# Lecturer quiz listings: quiz metadata plus question/attempt aggregates in one
+# statement (grouped subqueries outer-joined to quizzes). Questions themselves
+# are only loaded by the single-quiz endpoints.
+
+def get_lecturer_quiz_summaries(lecturer_id):
+    question_counts = (
+        db.session.query(QuizQuestion.quiz_id, func.count(QuizQuestion.id).label("question_count"))
+        .join(Quiz, Quiz.id == QuizQuestion.quiz_id)
+        .filter(Quiz.lecturer_id == lecturer_id)
+        .group_by(QuizQuestion.quiz_id)
+        .subquery()
+    )
+    attempt_stats = (
+        db.session.query(
+            QuizAttempt.quiz_id,
+            func.count(QuizAttempt.id).label("attempt_count"),
+            func.avg(QuizAttempt.score).label("average_score")
+        )
+        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
+        .filter(Quiz.lecturer_id == lecturer_id)
+        .group_by(QuizAttempt.quiz_id)
+        .subquery()
+    )
+
+    rows = (
+        db.session.query(
+            Quiz.id,
+            Quiz.title,
+            Quiz.description,
+            Quiz.max_attempts,
+            Quiz.time_limit,
+            Quiz.randomize_questions,
+            Quiz.immediate_feedback,
+            Quiz.passing_score,
+            Quiz.deadline,
+            Quiz.lecturer_id,
+            func.coalesce(question_counts.c.question_count, 0),
+            func.coalesce(attempt_stats.c.attempt_count, 0),
+            attempt_stats.c.average_score
+        )
+        .outerjoin(question_counts, question_counts.c.quiz_id == Quiz.id)
+        .outerjoin(attempt_stats, attempt_stats.c.quiz_id == Quiz.id)
+        .filter(Quiz.lecturer_id == lecturer_id)
+        .order_by(Quiz.id)
+        .all()
+    )
+
+    return [
+        {
+            "id": quiz_id,
+            "title": title,
+            "description": description,
+            "max_attempts": max_attempts,
+            "time_limit": time_limit,
+            "randomize_questions": randomize_questions,
+            "immediate_feedback": immediate_feedback,
+            "passing_score": passing_score,
+            "deadline": deadline.isoformat() if deadline else None,
+            "lecturer_id": owner_id,
+            "question_count": question_count,
+            "attempt_count": attempt_count,
+            "average_score": round(float(average_score), 2) if average_score is not None else None,
+        }
+        for (quiz_id, title, description, max_attempts, time_limit, randomize_questions, immediate_feedback,
+             passing_score, deadline, owner_id, question_count, attempt_count, average_score) in rows
+    ]
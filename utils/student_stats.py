@@ -0,0 +1,263 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import select, update, insert, bindparam, func
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from models.student_stats import StudentStats
+from models.users import User
+from models.section_progress import SectionProgress
+from models.quiz_attempts import QuizAttempt
+from models.assignment_submission import AssignmentSubmission
+from models.badges import UserBadge
+from utils.timeliness import TIMELINESS_METRICS, timeliness_counts, submission_timeliness
+
+# One student_stats row per student with running activity counters, so badge
+# thresholds and dashboard totals are a single-row read instead of a COUNT over
+# every source table. The write paths apply deltas in the same transaction as
+# the change that causes them. A student without a row is seeded from the
+# source tables by the first write path that bumps one (after the triggering
+# write is flushed, so it is already counted); removals never seed, since the
+# rows being deleted would be counted. Reads never write: a student without a
+# row yet is counted from the source tables. `flask repair-student-stats`
+# creates missing rows and recomputes everything if the counters ever drift.
+# Nothing here commits; the caller owns the transaction.
+
+COUNTERS = (
+    "sections_completed", "quizzes_attempted", "quizzes_passed", "perfect_scores",
+    "assignments_submitted", "due_submissions", "on_time_submissions", "early_submissions",
+    "badges_earned",
+)
+
+def _count(column, conditions):
+    return lambda student_id: select(func.count(column)).where(*conditions(student_id)).scalar_subquery()
+
+# counter -> correlated COUNT over its source table; the timeliness counters
+# are joined in from utils/timeliness.py
+_SOURCES = {
+    "sections_completed": _count(
+        SectionProgress.id, lambda s: [SectionProgress.student_id == s]
+    ),
+    "quizzes_attempted": _count(
+        QuizAttempt.id, lambda s: [QuizAttempt.student_id == s]
+    ),
+    "quizzes_passed": _count(
+        QuizAttempt.id, lambda s: [QuizAttempt.student_id == s, QuizAttempt.pass_status.is_(True)]
+    ),
+    "perfect_scores": _count(
+        QuizAttempt.id, lambda s: [QuizAttempt.student_id == s, QuizAttempt.score >= 100]
+    ),
+    "assignments_submitted": _count(
+        AssignmentSubmission.id, lambda s: [AssignmentSubmission.student_id == s]
+    ),
+    "badges_earned": _count(
+        UserBadge.id, lambda s: [UserBadge.student_id == s]
+    ),
+}
+
+def count_stats(student_ids):
+    """{student_id: {counter: value}} recomputed from the source tables, in one query."""
+    student_ids = list(student_ids)
+    if not student_ids:
+        return {}
+
+    timeliness = timeliness_counts(student_ids).subquery()
+    stmt = (
+        select(
+            User.id,
+            *(source(User.id).label(name) for name, source in _SOURCES.items()),
+            *(timeliness.c[name] for name in TIMELINESS_METRICS)
+        )
+        .outerjoin(timeliness, timeliness.c.student_id == User.id)
+        .where(User.id.in_(student_ids))
+    )
+    return {
+        row.id: {name: int(getattr(row, name) or 0) for name in COUNTERS}
+        for row in db.session.execute(stmt)
+    }
+
+def _seed(student_ids):
+    """Insert rows for students that have none. Returns the students another
+    transaction seeded first (their counts may not include this transaction).
+    """
+    db.session.flush()
+    counts = count_stats(student_ids)
+    if not counts:
+        return []
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(StudentStats), [
+                {"student_id": student_id, "updated_at": datetime.utcnow(), **values}
+                for student_id, values in counts.items()
+            ])
+        return []
+    except IntegrityError:
+        pass  # someone else seeded part of the batch; go row by row
+
+    raced = []
+    for student_id, values in counts.items():
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(StudentStats).values(
+                    student_id=student_id, updated_at=datetime.utcnow(), **values
+                ))
+        except IntegrityError:
+            raced.append(student_id)
+    return raced
+
+def bump_stats(deltas, seed=True):
+    """Add {student_id: {counter: delta}} to the students' counters.
+
+    With `seed`, students without a row get one built from the source tables;
+    pass seed=False when the deltas are for rows about to be deleted.
+    """
+    rows = [
+        {"_student_id": student_id, **{f"_{name}": values.get(name, 0) for name in COUNTERS}}
+        for student_id, values in deltas.items()
+        if any(values.values())
+    ]
+    if not rows:
+        return
+
+    table = StudentStats.__table__
+    stmt = (
+        update(table)
+        .where(table.c.student_id == bindparam("_student_id"))
+        .values(updated_at=datetime.utcnow(), **{name: table.c[name] + bindparam(f"_{name}") for name in COUNTERS})
+    )
+    if db.session.execute(stmt, rows).rowcount == len(rows) or not seed:
+        return
+
+    student_ids = [row["_student_id"] for row in rows]
+    existing = set(db.session.execute(
+        select(StudentStats.student_id).where(StudentStats.student_id.in_(student_ids))
+    ).scalars())
+    raced = set(_seed([student_id for student_id in student_ids if student_id not in existing]))
+    if raced:
+        db.session.execute(stmt, [row for row in rows if row["_student_id"] in raced])
+
+def record_attempts(attempts):
+    """Count newly written QuizAttempt rows."""
+    deltas = {}
+    for attempt in attempts:
+        counters = deltas.setdefault(attempt.student_id, Counter())
+        counters["quizzes_attempted"] += 1
+        counters["quizzes_passed"] += bool(attempt.pass_status)
+        counters["perfect_scores"] += (attempt.score or 0) >= 100
+    bump_stats(deltas)
+
+def record_submission(student_id, submitted_at, due_date, removed=False):
+    """Count an assignment submission, or un-count one that is about to be deleted."""
+    sign = -1 if removed else 1
+    values = {"assignments_submitted": 1, **submission_timeliness(submitted_at, due_date)}
+    bump_stats({student_id: {name: value * sign for name, value in values.items()}}, seed=not removed)
+
+def remove_submission_stats(submissions, due_date):
+    """Un-count assignment submissions about to be deleted, e.g. with their assignment."""
+    deltas = {}
+    for submission in submissions:
+        counters = deltas.setdefault(submission.student_id, Counter())
+        counters["assignments_submitted"] -= 1
+        for name, value in submission_timeliness(submission.submitted_at, due_date).items():
+            counters[name] -= value
+    bump_stats(deltas, seed=False)
+
+def move_submission_stats(submissions, old_due_date, new_due_date):
+    """Re-count the timeliness of an assignment's submissions after its due date changed."""
+    deltas = {}
+    for submission in submissions:
+        counters = deltas.setdefault(submission.student_id, Counter())
+        for name, value in submission_timeliness(submission.submitted_at, old_due_date).items():
+            counters[name] -= value
+        for name, value in submission_timeliness(submission.submitted_at, new_due_date).items():
+            counters[name] += value
+    # Students without a row are counted from the source tables when read
+    bump_stats(deltas, seed=False)
+
+def remove_section_stats(section_ids):
+    """Un-count the SectionProgress rows of sections about to be deleted."""
+    rows = db.session.execute(
+        select(SectionProgress.student_id, func.count(SectionProgress.id))
+        .where(SectionProgress.section_id.in_(list(section_ids)))
+        .group_by(SectionProgress.student_id)
+    ).all()
+    bump_stats({student_id: {"sections_completed": -count} for student_id, count in rows}, seed=False)
+
+def get_stats(student_ids):
+    """{student_id: {counter: value}}. Students without a row are counted from
+    the source tables; nothing is written.
+    """
+    student_ids = list(student_ids)
+    if not student_ids:
+        return {}
+
+    stats = {
+        row.student_id: row.to_dict()
+        for row in StudentStats.query.filter(StudentStats.student_id.in_(student_ids)).all()
+    }
+    missing = [student_id for student_id in student_ids if student_id not in stats]
+    if missing:
+        stats.update(count_stats(missing))
+    return stats
+
+def get_student_stats(student_id):
+    return get_stats([student_id]).get(student_id, dict.fromkeys(COUNTERS, 0))
+
+def repair_stats(chunk_size=1000):
+    """Recompute every student's counters from the source tables, one
+    transaction per chunk of students. Returns {"students", "repaired", "created"}.
+
+    Each chunk's rows are locked before they are counted; run it when the
+    source tables are quiet or after fixing data by hand.
+    """
+    students = 0
+    repaired = 0
+    created = 0
+    last_id = 0
+    table = StudentStats.__table__
+
+    while True:
+        student_ids = db.session.execute(
+            select(User.id)
+            .where(User.role == "student", User.id > last_id)
+            .order_by(User.id)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not student_ids:
+            break
+
+        current = {
+            row.student_id: {name: getattr(row, name) for name in COUNTERS}
+            for row in db.session.execute(
+                select(table).where(table.c.student_id.in_(student_ids)).with_for_update()
+            )
+        }
+        expected = count_stats(student_ids)
+
+        drifted = [
+            {"_student_id": student_id, **{f"_{name}": values[name] for name in COUNTERS}}
+            for student_id, values in expected.items()
+            if student_id in current and current[student_id] != values
+        ]
+        missing = [
+            {"student_id": student_id, "updated_at": datetime.utcnow(), **values}
+            for student_id, values in expected.items()
+            if student_id not in current
+        ]
+        if drifted:
+            db.session.execute(
+                update(table)
+                .where(table.c.student_id == bindparam("_student_id"))
+                .values(updated_at=datetime.utcnow(), **{name: bindparam(f"_{name}") for name in COUNTERS}),
+                drifted
+            )
+        if missing:
+            db.session.execute(insert(StudentStats), missing)
+        db.session.commit()
+
+        students += len(student_ids)
+        repaired += len(drifted)
+        created += len(missing)
+        last_id = student_ids[-1]
+
+    return {"students": students, "repaired": repaired, "created": created}
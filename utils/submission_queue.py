@@ -0,0 +1,169 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update, delete, bindparam
+
+from models import db
+from models.quiz_submission import QuizSubmission
+from utils.background import PeriodicWorker, start_on_first_request
+from utils.quiz_grading import GradeResult, get_answer_key, grade
+from utils.attempt_counter import allocate_attempt
+from utils.quiz_submission import write_attempts, complete_quiz_sections, submit_quiz_answers
+
+# Write-behind quiz submissions (QUIZ_SUBMISSION_MODE = "queued"). The request
+# reserves the attempt number, grades from the cached answer key and stores the
+# graded result as one quiz_submissions row, so a burst at a quiz deadline
+# costs each request three short statements. A background writer then turns
+# pending rows into attempts, answer rows, section progress and badges in
+# batched transactions.
+#
+# A batch is claimed inside its own transaction with a conditional UPDATE, so a
+# crashed writer leaves its rows pending and concurrent writers never write the
+# same submission twice.
+#
+# Reserved attempt numbers count toward max_attempts while the row is pending.
+# A submission that cannot be written is marked "failed" and keeps its number;
+# the client sees the status at GET /api/student/quiz/submissions/<id>, and
+# `flask flush-quiz-submissions --retry-failed` writes it once the cause is fixed.
+
+def enqueue_submission(quiz, student_id, answers, completed_at=None):
+    """Grade and queue an attempt. Same return shape as submit_quiz_answers, with
+    "attempt" None and the pending "submission" instead. Does not commit.
+    """
+    attempt_number = allocate_attempt(student_id, quiz.id, quiz.max_attempts)
+    if attempt_number is None:
+        return None
+
+    result = grade(get_answer_key(quiz), answers or {})
+    submission = QuizSubmission(
+        student_id=student_id,
+        quiz_id=quiz.id,
+        attempts_used=attempt_number,
+        submitted_at=completed_at or datetime.utcnow(),
+        result=result.to_dict(),
+        status="pending"
+    )
+    db.session.add(submission)
+    db.session.flush()
+
+    return {"attempt": None, "submission": submission, "attempts_used": attempt_number, "result": result, "new_badges": []}
+
+def accept_submission(quiz, student_id, answers):
+    """Write the attempt through, or queue it when QUIZ_SUBMISSION_MODE is "queued"."""
+    if current_app.config.get("QUIZ_SUBMISSION_MODE") == "queued":
+        return enqueue_submission(quiz, student_id, answers)
+    return submit_quiz_answers(quiz, student_id, answers)
+
+def delete_quiz_submissions(quiz_id):
+    """Remove a quiz's queued submissions before the quiz itself is deleted.
+
+    Pending rows are dropped with the quiz they would have been written to.
+    Does not commit.
+    """
+    db.session.execute(
+        delete(QuizSubmission).where(QuizSubmission.quiz_id == quiz_id),
+        execution_options={"synchronize_session": False}
+    )
+
+def _claim(submission_ids):
+    claimed = db.session.execute(
+        update(QuizSubmission)
+        .where(QuizSubmission.id.in_(submission_ids), QuizSubmission.status == "pending")
+        .values(status="written", processed_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    return claimed == len(submission_ids)
+
+def _write(submissions):
+    attempts = write_attempts([
+        (s.student_id, s.quiz_id, s.attempts_used, GradeResult.from_dict(s.result), s.submitted_at)
+        for s in submissions
+    ])
+    complete_quiz_sections(attempts)
+
+    table = QuizSubmission.__table__
+    db.session.execute(
+        update(table).where(table.c.id == bindparam("submission_id")).values(attempt_id=bindparam("attempt_id")),
+        [{"submission_id": s.id, "attempt_id": attempt.id} for s, attempt in zip(submissions, attempts)]
+    )
+
+def _write_one(submission_id):
+    submission = db.session.get(QuizSubmission, submission_id)
+    if submission is None or not _claim([submission_id]):
+        db.session.rollback()
+        return False
+    _write([submission])
+    db.session.commit()
+    return True
+
+def _mark_failed(submission_id, error):
+    db.session.execute(
+        update(QuizSubmission)
+        .where(QuizSubmission.id == submission_id, QuizSubmission.status == "pending")
+        .values(status="failed", error=str(error)[:255], processed_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    db.session.commit()
+
+def flush_submissions(batch_size=200):
+    """Write pending submissions, one transaction per batch.
+
+    A batch that fails is retried one submission at a time so a single bad row
+    is marked failed instead of blocking the queue.
+    """
+    written = 0
+    failed = 0
+
+    while True:
+        batch = (
+            QuizSubmission.query
+            .filter(QuizSubmission.status == "pending")
+            .order_by(QuizSubmission.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        submission_ids = [s.id for s in batch]
+
+        try:
+            if not _claim(submission_ids):
+                # Another writer took part of this batch; pick up what is left
+                db.session.rollback()
+                continue
+            _write(batch)
+            db.session.commit()
+            written += len(batch)
+        except Exception:
+            current_app.logger.exception("Could not write quiz submission batch %s..%s", submission_ids[0], submission_ids[-1])
+            db.session.rollback()
+            for submission_id in submission_ids:
+                try:
+                    written += _write_one(submission_id)
+                except Exception as e:
+                    current_app.logger.exception("Could not write quiz submission %s", submission_id)
+                    db.session.rollback()
+                    _mark_failed(submission_id, e)
+                    failed += 1
+
+        if len(batch) < batch_size:
+            break
+
+    return {"written": written, "failed": failed}
+
+def retry_failed_submissions():
+    """Put failed submissions back in the queue. Returns how many. Does not commit."""
+    return db.session.execute(
+        update(QuizSubmission)
+        .where(QuizSubmission.status == "failed")
+        .values(status="pending", error=None, processed_at=None),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+
+def _background_tick():
+    flush_submissions(current_app.config.get("QUIZ_SUBMISSION_BATCH", 200))
+
+def init_submission_writer(app):
+    if app.config.get("QUIZ_SUBMISSION_MODE") != "queued":
+        return None
+    worker = PeriodicWorker(app, "quiz-submission-writer", app.config.get("QUIZ_SUBMISSION_FLUSH_INTERVAL", 2), _background_tick)
+    return start_on_first_request(app, worker)
@@ -0,0 +1,78 @@
+from sqlalchemy import select, func, case, Float
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+from models.assignment import Assignment
+from models.assignment_submission import AssignmentSubmission
+
+# Assignment punctuality per student from one joined aggregate over
+# assignment_submissions ⨝ assignments. Only submissions to assignments with a
+# due date count; "early" means at least EARLY_SECONDS before the deadline.
+# Used to seed the student_stats counters (utils/student_stats.py), which the
+# student dashboard reads its punctuality summary from.
+
+EARLY_SECONDS = 24 * 3600
+
+class seconds_between(FunctionElement):
+    """Seconds from `start` to `end` (positive when end is later), on any backend."""
+    type = Float()
+    name = "seconds_between"
+    inherit_cache = True
+
+@compiles(seconds_between)
+def _seconds_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "((julianday(%s) - julianday(%s)) * 86400.0)" % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+@compiles(seconds_between, "mysql")
+def _seconds_between_mysql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "TIMESTAMPDIFF(SECOND, %s, %s)" % (compiler.process(start, **kw), compiler.process(end, **kw))
+
+@compiles(seconds_between, "postgresql")
+def _seconds_between_postgresql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "EXTRACT(EPOCH FROM (%s - %s))" % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+TIMELINESS_METRICS = ("due_submissions", "on_time_submissions", "early_submissions")
+
+def timeliness_counts(student_ids):
+    """SELECT student_id, due_submissions, on_time_submissions, early_submissions ... GROUP BY student_id."""
+    on_time = AssignmentSubmission.submitted_at <= Assignment.due_date
+    early = seconds_between(AssignmentSubmission.submitted_at, Assignment.due_date) >= EARLY_SECONDS
+
+    return (
+        select(
+            AssignmentSubmission.student_id.label("student_id"),
+            func.count(AssignmentSubmission.id).label("due_submissions"),
+            func.coalesce(func.sum(case((on_time, 1), else_=0)), 0).label("on_time_submissions"),
+            func.coalesce(func.sum(case((early, 1), else_=0)), 0).label("early_submissions")
+        )
+        .join(Assignment, Assignment.id == AssignmentSubmission.assignment_id)
+        .where(
+            AssignmentSubmission.student_id.in_(list(student_ids)),
+            Assignment.due_date.isnot(None),
+            AssignmentSubmission.submitted_at.isnot(None)
+        )
+        .group_by(AssignmentSubmission.student_id)
+    )
+
+def submission_timeliness(submitted_at, due_date):
+    """{"due_submissions", "on_time_submissions", "early_submissions"} as 0/1 for one submission, matching timeliness_counts."""
+    if submitted_at is None or due_date is None:
+        return dict.fromkeys(TIMELINESS_METRICS, 0)
+    return {
+        "due_submissions": 1,
+        "on_time_submissions": int(submitted_at <= due_date),
+        "early_submissions": int((due_date - submitted_at).total_seconds() >= EARLY_SECONDS),
+    }
+
+def punctuality(stats):
+    """Dashboard summary from a student's counters: on-time / early / late counts and the on-time rate in percent."""
+    due = stats["due_submissions"]
+    return {
+        "on_time": stats["on_time_submissions"],
+        "early": stats["early_submissions"],
+        "late": due - stats["on_time_submissions"],
+        "on_time_rate": round(stats["on_time_submissions"] / due * 100, 2) if due else None,
+    }